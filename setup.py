@@ -506,7 +506,8 @@ ext_modules = [
     Extension(
         'autopick_ext',
         include_dirs=[numpy.get_include()],
-        extra_compile_args=extra_compile_args,
+        extra_compile_args=extra_compile_args + omp_arg,
+        extra_link_args=[] + omp_lib,
         sources=[op.join('src', 'ext', 'autopick_ext.c')]),
 
     Extension(
@@ -882,12 +882,18 @@ def command_ttt(args):
             '--force', dest='force', action='store_true',
             help='overwrite existing files')
 
+        parser.add_option(
+            '--nworkers', dest='nworkers', type='int', metavar='N',
+            default=1,
+            help='compute tables of N phase groups in parallel')
+
     parser, options, args = cl_parse('ttt', args, setup=setup)
 
     store_dir = get_store_dir(args)
     try:
         store = gf.Store(store_dir)
-        store.make_travel_time_tables(force=options.force)
+        store.make_travel_time_tables(
+            force=options.force, nworkers=options.nworkers)
 
     except gf.StoreError as e:
         die(e)
@@ -931,12 +937,19 @@ def command_sat(args):
             default='takeoff_angle',
             help='calculate interpolation table for selected ray attributes.')
 
+        parser.add_option(
+            '--nworkers', dest='nworkers', type='int', metavar='N',
+            default=1,
+            help='compute tables of N phase groups in parallel')
+
     parser, options, args = cl_parse('sat', args, setup=setup)
 
     store_dir = get_store_dir(args)
     try:
         store = gf.Store(store_dir)
-        store.make_stored_table(options.attribute, force=options.force)
+        store.make_stored_table(
+            options.attribute, force=options.force,
+            nworkers=options.nworkers)
 
     except gf.StoreError as e:
         die(e)
@@ -4,6 +4,8 @@
 # ---|P------/S----------~Lg----------
 from __future__ import absolute_import
 
+from collections import defaultdict
+
 from . import autopick_ext
 import numpy as num
 
@@ -25,7 +27,7 @@ def recursive_stalta(
     nl = int(round(tlong/energytrace.deltat))
 
     if temp is None:
-        temp = num.zeros((ns+2,), dtype=num.float32)
+        temp = num.zeros((ns+3,), dtype=num.float32)
 
     if not inplace:
         energytrace = energytrace.copy()
@@ -38,3 +40,309 @@ def recursive_stalta(
         return temp
     else:
         return energytrace, temp
+
+
+def recursive_stalta_many(
+        tshort, tlong, kshort, klong, kderivative, data, deltat,
+        temp=None, nparallel=None):
+
+    '''
+    Recursive STA/LTA on many channels at once.
+
+    Multi-channel version of :py:func:`recursive_stalta`. The channels are
+    processed in parallel by the C extension.
+
+    :param data: energy of the channels as 2D NumPy array of type float32
+        with shape ``(nchannels, nsamples)``. It is overwritten with the
+        characteristic functions.
+    :param deltat: sampling interval [s]
+    :param temp: filter state of shape ``(nchannels, ns+3)`` as returned by
+        the previous call, to continue processing of a data stream. The
+        results are then the same as if the data had been processed in one
+        piece. If ``None``, the filters are initialized with the averages over
+        the first ``tlong`` and ``tshort`` seconds of the data or start from
+        zero if there are not enough samples.
+    :param nparallel: number of threads to use, by default the number of
+        available CPUs
+    :returns: filter state, to be passed as ``temp`` in the next call
+
+    The data must contain more than ``tshort/deltat`` samples. Use
+    :py:class:`StaLtaDetector` to process streams with short windows.
+    '''
+
+    if nparallel is None:
+        import multiprocessing
+        nparallel = multiprocessing.cpu_count()
+
+    if not data.dtype == num.float32 or data.ndim != 2:
+        raise AutopickError(
+            'data given to recursive_stalta_many() must be a 2D array in '
+            'float32 format.')
+
+    ns = int(round(tshort/deltat))
+    nl = int(round(tlong/deltat))
+
+    if data.shape[1] <= ns:
+        raise AutopickError(
+            'data given to recursive_stalta_many() must have more than %i '
+            'samples.' % ns)
+
+    initialize = temp is None and data.shape[1] > ns + nl
+    if temp is None:
+        temp = num.zeros((data.shape[0], ns+3), dtype=num.float32)
+
+    autopick_ext.recursive_stalta_many(
+        ns, nl, kshort/ns, klong/nl, kderivative, data, temp, initialize,
+        nparallel)
+
+    return temp
+
+
+def detect_triggers(cf, level_on, level_off=None, active=None):
+    '''
+    Find trigger on and off samples in characteristic functions.
+
+    A trigger is switched on where the characteristic function reaches
+    ``level_on`` and switched off where it falls below ``level_off``.
+
+    :param cf: characteristic functions as 2D NumPy array with shape
+        ``(nchannels, nsamples)``
+    :param level_on: trigger on level
+    :param level_off: trigger off level, by default equal to ``level_on``
+    :param active: boolean array of shape ``(nchannels,)`` with trigger states
+        at the start of the data, by default all off
+    :returns: ``(triggers, active)``, where ``triggers`` is a list with
+        ``(ichannel, ion, ioff)`` tuples and ``active`` holds the trigger
+        states at the end of the data. ``ion`` is ``None`` for triggers which
+        were already on at the start, ``ioff`` is ``None`` for triggers still
+        on at the end.
+    '''
+
+    if level_off is None:
+        level_off = level_on
+
+    nchannels, nsamples = cf.shape
+    if active is None:
+        active = num.zeros(nchannels, dtype=bool)
+
+    code = num.empty((nchannels, nsamples+1), dtype=num.int8)
+    code[:, 0] = active
+    code[:, 1:] = num.where(
+        cf >= level_on, 1, num.where(cf < level_off, 0, -1))
+
+    # carry the last decided state through undecided samples
+    idx = num.where(code >= 0, num.arange(nsamples+1)[num.newaxis, :], 0)
+    num.maximum.accumulate(idx, axis=1, out=idx)
+    state = num.take_along_axis(code, idx, axis=1)
+    changes = num.diff(state, axis=1)
+
+    triggers = []
+    ion = {}
+    for ichannel in num.nonzero(active)[0]:
+        ion[int(ichannel)] = None
+
+    for ichannel, isample in zip(*num.nonzero(changes)):
+        ichannel, isample = int(ichannel), int(isample)
+        if changes[ichannel, isample] > 0:
+            ion[ichannel] = isample
+        else:
+            triggers.append((ichannel, ion.pop(ichannel), isample))
+
+    for ichannel in sorted(ion.keys()):
+        triggers.append((ichannel, ion[ichannel], None))
+
+    return triggers, state[:, -1].astype(bool)
+
+
+class _StaLtaState(object):
+    def __init__(
+            self, tmin_next, deltat, temp, active, ton, tlast, pending=None):
+
+        self.tmin_next = tmin_next
+        self.deltat = deltat
+        self.temp = temp
+        self.active = active
+        self.ton = ton
+        self.tlast = tlast
+        self.pending = pending
+
+
+class StaLtaDetector(object):
+    '''
+    Multi-channel recursive STA/LTA trigger.
+
+    Characteristic functions are computed with
+    :py:func:`recursive_stalta_many` from the squared samples of the traces
+    and trigger on and off times are determined with
+    :py:func:`detect_triggers`. Filter and trigger states are kept for each
+    channel, so that consecutive time windows of a data stream, e.g. as
+    produced by :py:meth:`pyrocko.squirrel.base.Squirrel.chopper_waveforms`
+    without padding, can be passed to :py:meth:`process` one after another.
+    Processing of a channel restarts when its data is not contiguous. The
+    filters of new or restarted channels are initialized as in
+    :py:func:`recursive_stalta_many`, so their data is buffered until more
+    than ``tlong + tshort`` worth of samples are available. Likewise, windows
+    of continued channels with no more than ``tshort`` worth of samples are
+    buffered and prepended to the next window of the channel. Apart from
+    these delays, the characteristic functions are the same as if the
+    stream had been processed in one piece.
+
+    :param tshort: short time window [s]
+    :param tlong: long time window [s]
+    :param level_on: trigger on level
+    :param level_off: trigger off level, by default equal to ``level_on``
+    :param nparallel: number of threads to use, by default the number of
+        available CPUs
+
+    See :py:func:`recursive_stalta` for the remaining arguments.
+    '''
+
+    def __init__(
+            self, tshort, tlong, level_on, level_off=None,
+            kshort=1., klong=1., kderivative=1., nparallel=None):
+
+        self.tshort = tshort
+        self.tlong = tlong
+        self.level_on = level_on
+        self.level_off = level_off
+        self.kshort = kshort
+        self.klong = klong
+        self.kderivative = kderivative
+        self.nparallel = nparallel
+        self.reset()
+
+    def reset(self):
+        '''
+        Forget all filter and trigger states.
+        '''
+
+        self._states = {}
+
+    def _get_state(self, key, tr):
+        state = self._states.get(key, None)
+        if state is None:
+            return None, []
+
+        if state.deltat == tr.deltat \
+                and abs(state.tmin_next - tr.tmin) < 0.01 * tr.deltat:
+            return state, []
+
+        del self._states[key]
+        if state.active:
+            return None, [(key[:4], state.ton, state.tlast)]
+        else:
+            return None, []
+
+    def process(self, traces):
+        '''
+        Process next time window of data.
+
+        :param traces: list of :py:class:`~pyrocko.trace.Trace` objects
+        :returns: ``(cf_traces, triggers)``, where ``cf_traces`` are new
+            traces holding the characteristic functions and ``triggers`` is a
+            list of ``(nslc_id, tmin, tmax)`` tuples of all triggers which
+            have been switched off, sorted by ``tmin``
+        '''
+
+        groups = defaultdict(list)
+        triggers = []
+        for tr in traces:
+            key = tr.nslc_id + (tr.extra,)
+            state, closed = self._get_state(key, tr)
+            triggers.extend(closed)
+
+            if state is not None and state.pending is not None:
+                pending = state.pending
+                state.pending = None
+                tr_new = tr
+                tr = pending.copy(data=False)
+                tr.set_ydata(num.concatenate((pending.ydata, tr_new.ydata)))
+
+            # new channels need enough samples to initialize the filters and
+            # are processed separately from continued ones
+            new = state is None or state.temp is None
+            nmin = int(round(self.tshort/tr.deltat))
+            if new:
+                nmin += int(round(self.tlong/tr.deltat))
+
+            if tr.data_len() <= nmin:
+                if state is None:
+                    state = _StaLtaState(
+                        tmin_next=None, deltat=tr.deltat, temp=None,
+                        active=False, ton=None, tlast=None)
+
+                    self._states[key] = state
+
+                state.tmin_next = tr.tmin + tr.data_len()*tr.deltat
+                state.pending = tr.copy()
+                continue
+
+            groups[tr.deltat, tr.data_len(), new].append((tr, state))
+
+        cf_traces = []
+        for (deltat, nsamples, new), group_states in groups.items():
+            group = [tr for (tr, _) in group_states]
+            states = [state for (_, state) in group_states]
+
+            data = num.empty((len(group), nsamples), dtype=num.float32)
+            for itr, tr in enumerate(group):
+                data[itr, :] = tr.ydata.astype(num.float64)**2
+
+            if new:
+                temp = None
+                active = None
+            else:
+                temp = num.array([state.temp for state in states])
+                active = num.array([state.active for state in states])
+
+            temp = recursive_stalta_many(
+                self.tshort, self.tlong, self.kshort, self.klong,
+                self.kderivative, data, deltat, temp=temp,
+                nparallel=self.nparallel)
+
+            group_triggers, active_end = detect_triggers(
+                data, self.level_on, self.level_off, active)
+
+            tons = [
+                state.ton if state is not None and state.active else None
+                for state in states]
+
+            for itr, ion, ioff in group_triggers:
+                tr = group[itr]
+                ton = tons[itr] if ion is None else tr.tmin + ion*deltat
+                if ioff is None:
+                    tons[itr] = ton
+                else:
+                    triggers.append((tr.nslc_id, ton, tr.tmin + ioff*deltat))
+
+            for itr, tr in enumerate(group):
+                self._states[tr.nslc_id + (tr.extra,)] = _StaLtaState(
+                    tmin_next=tr.tmin + nsamples*deltat,
+                    deltat=deltat,
+                    temp=temp[itr].copy(),
+                    active=bool(active_end[itr]),
+                    ton=tons[itr],
+                    tlast=tr.tmax)
+
+                cf_tr = tr.copy(data=False)
+                cf_tr.set_ydata(data[itr])
+                cf_traces.append(cf_tr)
+
+        triggers.sort(key=lambda x: x[1])
+        return cf_traces, triggers
+
+    def flush(self):
+        '''
+        Switch off all active triggers at the end of the data stream.
+
+        :returns: list of ``(nslc_id, tmin, tmax)`` tuples, sorted by
+            ``tmin``. Filter states are reset.
+        '''
+
+        triggers = [
+            (key[:4], state.ton, state.tlast)
+            for (key, state) in self._states.items() if state.active]
+
+        self.reset()
+        triggers.sort(key=lambda x: x[1])
+        return triggers
@@ -30,6 +30,8 @@ from __future__ import absolute_import
 import re
 import logging
 import socket
+import threading
+from io import BytesIO
 
 
 from pyrocko import util
@@ -216,14 +218,110 @@ class Timeout(DownloadError):
     pass
 
 
+g_session_local = threading.local()
+
+
+def get_session():
+    '''
+    Get HTTP session object of the calling thread.
+
+    Requests made through the same session reuse open connections to a server
+    (HTTP keep-alive). Each thread gets its own session.
+
+    :returns: :py:class:`requests.Session` object
+    '''
+
+    session = getattr(g_session_local, 'session', None)
+    if session is None:
+        import requests
+        session = requests.Session()
+        g_session_local.session = session
+
+    return session
+
+
+def _request_session(
+        session,
+        url,
+        post=False,
+        user=None,
+        passwd=None,
+        timeout=g_timeout,
+        **kwargs):
+
+    import requests
+    from requests.auth import HTTPDigestAuth
+
+    url_values = urlencode(kwargs)
+    if url_values:
+        url += '?' + url_values
+
+    logger.debug('Accessing URL %s (session)' % url)
+
+    auth = None
+    if user is not None:
+        auth = HTTPDigestAuth(user, passwd or '')
+
+    headers = {'Accept': '*/*'}
+
+    try:
+        if post:
+            if isinstance(post, newstr):
+                post = post.encode('utf8')
+            logger.debug('POST data: \n%s' % post.decode('utf8'))
+            resp = session.post(
+                url, data=post, headers=headers, auth=auth, timeout=timeout)
+        else:
+            resp = session.get(
+                url, headers=headers, auth=auth, timeout=timeout)
+
+    except requests.exceptions.Timeout:
+        raise Timeout(
+            'Timeout error. No response received within %i s. You '
+            'may want to retry with a longer timeout setting.' % timeout)
+
+    except requests.exceptions.RequestException as e:
+        raise DownloadError(
+            'Request failed for url "%s": %s' % (url, str(e)))
+
+    logger.debug('Response: %s' % resp.status_code)
+
+    if resp.status_code == 204:
+        raise EmptyResult(url)
+
+    elif resp.status_code == 413:
+        raise RequestEntityTooLarge(url)
+
+    elif resp.status_code == 401:
+        raise DownloadError(
+            'Authentication failed when accessing url "%s".' % url)
+
+    elif resp.status_code >= 400:
+        raise DownloadError(
+            'Error content returned by server (HTML stripped):\n%s\n'
+            '  Original error was: HTTP Error %i: %s' % (
+                indent(
+                    strip_html(resp.content),
+                    '  !  '),
+                resp.status_code, resp.reason))
+
+    return BytesIO(resp.content)
+
+
 def _request(
         url,
         post=False,
         user=None,
         passwd=None,
         timeout=g_timeout,
+        session=None,
         **kwargs):
 
+    if session is not None:
+        return _request_session(
+            session, url, post=post, user=user, passwd=passwd,
+            timeout=timeout, **kwargs)
+
     url_values = urlencode(kwargs)
     if url_values:
         url += '?' + url_values
@@ -487,6 +585,7 @@ def dataselect(
         passwd=None,
         token=None,
         selection=None,
+        session=None,
         **kwargs):
 
     '''
@@ -522,6 +621,11 @@ def dataselect(
         If given, selection to be queried as a list of tuples
         ``(network, station, location, channel, tmin, tmax)``.
     :type selection: list of tuples, optional
+    :param session:
+        If given, the request is made through this HTTP session, reusing
+        open connections (see :py:func:`get_session`). The response is then
+        read completely before returning.
+    :type session: :py:class:`requests.Session`, optional
     :param \\*\\*kwargs:
         Parameters passed to the server (see `FDSN web services specification
         <https://www.fdsn.org/webservices>`_).
@@ -562,10 +666,12 @@ def dataselect(
 
         post = '\n'.join(lst)
         return _request(
-            url, user=user, passwd=passwd, post=post.encode(), timeout=timeout)
+            url, user=user, passwd=passwd, post=post.encode(), timeout=timeout,
+            session=session)
     else:
         return _request(
-            url, user=user, passwd=passwd, timeout=timeout, **params)
+            url, user=user, passwd=passwd, timeout=timeout, session=session,
+            **params)
 
 
 def event(
@@ -14,6 +14,10 @@ static struct module_state _state;
 #endif
 
 #include <math.h>
+#include <stdlib.h>
+#if defined(_OPENMP)
+    # include <omp.h>
+#endif
 
 #ifndef max
    #define max( a, b ) ( ((a) > (b)) ? (a) : (b) )
@@ -38,11 +42,17 @@ static int good_array(const PyObject* o, int typenum) {
     return 1;
 }
 
-int autopick_recursive_stalta( int ns, int nl, float ks, float kl, float k, int nsamples, float *inout, float *intermediates, int init)
+int autopick_recursive_stalta( int ns, int nl, float ks, float kl, float k, int nsamples, float *inout, float *intermediates, float *xlast, int init)
 {
+    /* intermediates holds the last ns values of the characteristic function
+     * and the final STA and LTA values. If xlast is not NULL, it holds the
+     * last input sample, so that the derivative term is continued exactly
+     * across calls. Otherwise the last characteristic function value is used
+     * in its place. */
+
     int i, istart;
     float eps = 1.0e-7;
-    float scf0, lcf0, sta0, lta0, nshort, nlong, maxlta;
+    float scf0, lcf0, sta0, lta0, nshort, nlong, maxlta, inout_last;
     float *cf, *sta, *lta;
 
     cf = (float*)calloc(nsamples*3, sizeof(float));
@@ -54,7 +64,8 @@ int autopick_recursive_stalta( int ns, int nl, float ks, float kl, float k, int
 
     cf[0] = inout[0];
     if (init == 0) {
-        cf[0] = inout[0] + fabs(k*(inout[0]-intermediates[ns-1]));
+        cf[0] = inout[0] + fabs(k*(inout[0]-(
+            xlast != NULL ? *xlast : intermediates[ns-1])));
     }
     for (i=1;i<nsamples;i++)
     {
@@ -94,7 +105,7 @@ int autopick_recursive_stalta( int ns, int nl, float ks, float kl, float k, int
         for (i=0; i<nl+ns; i++) {
             sta[i] = lta[i] = 0.0;
         }
-        istart = nl+ns;
+        istart = nl+ns+1;
 
     } else {
 
@@ -103,14 +114,15 @@ int autopick_recursive_stalta( int ns, int nl, float ks, float kl, float k, int
             return 1;
         }
 
-        sta[0] = intermediates[ns];
-        lta[0] = intermediates[ns+1];
+        sta[0] = (ks*cf[0]+(1.-ks)*intermediates[ns]);
+        lta[0] = (kl*intermediates[0]+(1.-kl)*intermediates[ns+1]);
+        maxlta = fabs(lta[0]);
         istart = ns;
 
         for(i=1;i<ns;i++)
         {
             sta[i] = (ks*cf[i]+(1.-ks)*sta[i-1]);
-            lta[i] = (kl*(intermediates[i-1]) + (1.-kl)*lta[i-1]);
+            lta[i] = (kl*intermediates[i] + (1.-kl)*lta[i-1]);
             maxlta = max(fabs(lta[i]), maxlta);
         }
     }
@@ -126,6 +138,8 @@ int autopick_recursive_stalta( int ns, int nl, float ks, float kl, float k, int
         maxlta = eps*eps;
     }
 
+    inout_last = inout[nsamples-1];
+
     for(i=0;i<nsamples;i++)
     {
         inout[i] = (sta[i]+eps*maxlta)/(lta[i]+eps*maxlta);
@@ -139,6 +153,10 @@ int autopick_recursive_stalta( int ns, int nl, float ks, float kl, float k, int
     intermediates[ns] = sta[nsamples-1];
     intermediates[ns+1] = lta[nsamples-1];
 
+    if (xlast != NULL) {
+        *xlast = inout_last;
+    }
+
     free(cf);
     return 0;
 }
@@ -172,12 +190,88 @@ static PyObject* autopick_recursive_stalta_wrapper(PyObject *module, PyObject *a
     nsamples = PyArray_SIZE(inout_array);
     ntemp = PyArray_SIZE(temp_array);
 
-    if (ntemp != ns+2) {
-        PyErr_SetString(st->error, "temp_data must have length of ns+2.");
+    if (ntemp != ns+2 && ntemp != ns+3) {
+        PyErr_SetString(st->error, "temp_data must have length of ns+2 or ns+3.");
         return NULL;
     }
 
-    if (0 != autopick_recursive_stalta(ns, nl, ks, kl, k, nsamples, (float*)PyArray_DATA(inout_array), (float*)PyArray_DATA(temp_array), initialize)) {
+    if (0 != autopick_recursive_stalta(ns, nl, ks, kl, k, nsamples, (float*)PyArray_DATA(inout_array), (float*)PyArray_DATA(temp_array), ntemp == ns+3 ? (float*)PyArray_DATA(temp_array) + ns+2 : NULL, initialize)) {
+        PyErr_SetString(st->error, "running STA/LTA failed.");
+        return NULL;
+    }
+
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+int autopick_recursive_stalta_many(int ns, int nl, float ks, float kl, float k, int ntraces, int nsamples, float *inout, float *intermediates, int init, int nparallel)
+{
+    int itrace, nfailed;
+    (void) nparallel;
+
+    nfailed = 0;
+
+    Py_BEGIN_ALLOW_THREADS
+
+    #if defined(_OPENMP)
+        #pragma omp parallel for schedule(dynamic, 1) reduction(+:nfailed) num_threads(nparallel)
+    #endif
+    for (itrace=0; itrace<ntraces; itrace++) {
+        if (0 != autopick_recursive_stalta(
+                ns, nl, ks, kl, k, nsamples,
+                inout + (size_t)itrace*nsamples,
+                intermediates + (size_t)itrace*(ns+3),
+                intermediates + (size_t)itrace*(ns+3) + ns+2,
+                init)) {
+            nfailed++;
+        }
+    }
+
+    Py_END_ALLOW_THREADS
+
+    return nfailed != 0;
+}
+
+static PyObject* autopick_recursive_stalta_many_wrapper(PyObject *module, PyObject *args) {
+    PyObject *inout_array_obj, *temp_array_obj;
+    PyArrayObject *inout_array = NULL;
+    PyArrayObject *temp_array = NULL;
+    int ns, nl, initialize, nparallel;
+    npy_intp *shape, *temp_shape;
+    double ks, kl, k;
+
+    struct module_state *st = GETSTATE(module);
+    if (!PyArg_ParseTuple(args, "iidddOOii", &ns, &nl, &ks, &kl, &k, &inout_array_obj, &temp_array_obj, &initialize, &nparallel)) {
+        PyErr_SetString(st->error, "invalid arguments in recursive_stalta_many(ns, nl, ks, kl, k, inout_data, temp_data, initialize, nparallel)" );
+        return NULL;
+    }
+
+    if (!good_array(inout_array_obj, NPY_FLOAT32)) {
+        PyErr_SetString(st->error, "recursive_stalta_many: inout_data must be float32 and contiguous." );
+        return NULL;
+    }
+    inout_array = (PyArrayObject*)(inout_array_obj);
+
+    if (!good_array(temp_array_obj, NPY_FLOAT32)) {
+        PyErr_SetString(st->error, "recursive_stalta_many: temp_data must be float32 and contiguous." );
+        return NULL;
+    }
+    temp_array = (PyArrayObject*)(temp_array_obj);
+
+    if (PyArray_NDIM(inout_array) != 2 || PyArray_NDIM(temp_array) != 2) {
+        PyErr_SetString(st->error, "recursive_stalta_many: inout_data and temp_data must be 2D arrays." );
+        return NULL;
+    }
+
+    shape = PyArray_DIMS(inout_array);
+    temp_shape = PyArray_DIMS(temp_array);
+
+    if (temp_shape[0] != shape[0] || temp_shape[1] != ns+3) {
+        PyErr_SetString(st->error, "temp_data must have shape (ntraces, ns+3).");
+        return NULL;
+    }
+
+    if (0 != autopick_recursive_stalta_many(ns, nl, ks, kl, k, (int)shape[0], (int)shape[1], (float*)PyArray_DATA(inout_array), (float*)PyArray_DATA(temp_array), initialize, nparallel)) {
         PyErr_SetString(st->error, "running STA/LTA failed.");
         return NULL;
     }
@@ -190,6 +284,9 @@ static PyMethodDef AutoPickMethods[] = {
     {"recursive_stalta",  (PyCFunction) autopick_recursive_stalta_wrapper, METH_VARARGS,
         "Recursive STA/LTA picker." },
 
+    {"recursive_stalta_many",  (PyCFunction) autopick_recursive_stalta_many_wrapper, METH_VARARGS,
+        "Recursive STA/LTA picker on many equally sized traces." },
+
     {NULL, NULL, 0, NULL}        /* Sentinel */
 };
 
@@ -569,6 +569,52 @@ class Timing(SObject):
         except spit.OutOfBounds:
             raise OutOfBounds(args)
 
+    def evaluate_many(self, get_phase_many, args):
+        '''
+        Evaluate timing for many points at once.
+
+        :param get_phase_many: callable returning a vectorized phase
+            evaluation function for a given phase definition, e.g.
+            :py:meth:`pyrocko.gf.store.Store.get_phase_many`
+        :param args: tuple of equally sized arrays with the index coordinates
+            of the points (without component index)
+        :returns: :py:class:`numpy.ndarray` of times, ``NaN`` where the
+            timing is undefined
+        '''
+
+        npoints = args[0].size
+
+        if self.offset_is == 'slowness' and self.offset != 0.0:
+            phase_offset = get_phase_many(
+                'vel_surface:%g' % (1.0/self.offset))
+            offset = phase_offset(args)
+        else:
+            offset = self.offset
+
+        if not self.phase_defs:
+            return num.zeros(npoints) + offset
+
+        times = num.vstack([
+            get_phase_many(phase_def)(args)
+            for phase_def in self.phase_defs])
+
+        if self.offset_is == 'percent':
+            times = times * (1. + offset/100.)
+        else:
+            times = times + offset
+
+        if self.select == 'first':
+            return num.fmin.reduce(times, axis=0)
+        elif self.select == 'last':
+            return num.fmax.reduce(times, axis=0)
+        else:
+            result = times[0].copy()
+            for times_phase in times[1:]:
+                mask = num.isnan(result)
+                result[mask] = times_phase[mask]
+
+            return result
+
     phase_defs = List.T(String.T())
     offset = Float.T(default=0.0)
     offset_is = String.T(optional=True)
@@ -794,6 +840,9 @@ class DiscretizedSource(Object):
                 'source type "%s" does not support GF component scheme "%s"' %
                 (cls.__name__, scheme))
 
+    # __setattr__ only resets the cache, which is set up after construction
+    guts_direct_init = True
+
     def __init__(self, **kwargs):
         Object.__init__(self, **kwargs)
         self._latlons = None
@@ -2008,7 +2057,7 @@ class ConfigTypeA(Config):
         return args[1]
 
     def get_distance(self, args):
-        return math.sqrt(args[0]**2 + args[1]**2)
+        return num.sqrt(args[0]**2 + args[1]**2)
 
     def get_source_depth(self, args):
         return args[0]
@@ -2259,7 +2308,7 @@ class ConfigTypeB(Config):
         'elastic2', 'elastic5', 'elastic8', 'elastic10', 'poroelastic10']
 
     def get_distance(self, args):
-        return math.sqrt((args[1] - args[0])**2 + args[2]**2)
+        return num.sqrt((args[1] - args[0])**2 + args[2]**2)
 
     def get_surface_distance(self, args):
         return args[2]
@@ -28,7 +28,7 @@ Name               Description
 
 from __future__ import absolute_import, division, print_function
 
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from functools import cmp_to_key
 import time
 import math
@@ -1473,7 +1473,7 @@ class ExplosionSource(SourceWithDerivedMagnitude):
 
     def base_key(self):
         return SourceWithDerivedMagnitude.base_key(self) + \
-            (self.volume_change,)
+            (self.magnitude, self.volume_change)
 
     def check_conflicts(self):
         if self.magnitude is not None and self.volume_change is not None:
@@ -1609,10 +1609,9 @@ class RectangularExplosionSource(ExplosionSource):
              ' practically no effect.')
 
     def base_key(self):
-        return Source.base_key(self) + (self.strike, self.dip, self.length,
-                                        self.width, self.nucleation_x,
-                                        self.nucleation_y, self.velocity,
-                                        self.anchor)
+        return ExplosionSource.base_key(self) + (
+            self.strike, self.dip, self.length, self.width, self.nucleation_x,
+            self.nucleation_y, self.velocity, self.anchor)
 
     def discretize_basesource(self, store, target=None):
 
@@ -2127,7 +2126,9 @@ class RectangularSource(SourceWithDerivedMagnitude):
             self.nucleation_x,
             self.nucleation_y,
             self.velocity,
+            self.opening_fraction,
             self.decimation_factor,
+            self.aggressive_oversampling,
             self.anchor)
 
     def check_conflicts(self):
@@ -2528,6 +2529,13 @@ class PseudoDynamicRupture(SourceWithDerivedMagnitude):
         default=False,
         help='Calculate only shear tractions and omit tensile tractions.')
 
+    coef_mat_cache = Bool.T(
+        optional=True,
+        default=False,
+        help='Cache coefficient matrices on disk, in the Pyrocko cache '
+             'directory. Ruptures with identical patch geometry and elastic '
+             'parameters then reuse the matrix instead of recalculating it.')
+
     smooth_rupture = Bool.T(
         default=True,
         help='Smooth the tractions by weighting partially ruptured'
@@ -2657,12 +2665,20 @@ class PseudoDynamicRupture(SourceWithDerivedMagnitude):
             self.rake,
             self.length,
             self.width,
-            float(self.nucleation_x.mean()),
-            float(self.nucleation_y.mean()),
+            tuple(self.nucleation_x.tolist()),
+            tuple(self.nucleation_y.tolist()),
+            tuple(self.nucleation_time.tolist())
+            if self.nucleation_time is not None else None,
+            self.nx,
+            self.ny,
             self.decimation_factor,
+            self.eikonal_decimation,
+            self.smooth_rupture,
+            self.aggressive_oversampling,
             self.anchor,
             self.pure_shear,
             self.gamma,
+            self.tractions.dump() if self.tractions is not None else None,
             tuple(self.patch_mask))
 
     def check_conflicts(self):
@@ -3386,16 +3402,28 @@ class PseudoDynamicRupture(SourceWithDerivedMagnitude):
 
         return ds
 
-    def calc_coef_mat(self):
+    def calc_coef_mat(self, cache=None):
         '''
         Calculate coefficients connecting tractions and dislocations.
+
+        :param cache:
+            If ``True``, reuse coefficient matrices cached on disk for ruptures
+            with identical patch geometry and elastic parameters. See
+            :py:func:`~pyrocko.modelling.okada.make_okada_coefficient_matrix`.
+            By default, :py:attr:`coef_mat_cache` is used.
+        :type cache:
+            optional, bool or str
         '''
         if not self.patches:
             raise ValueError(
                 'Patches are needed. Please calculate them first.')
 
+        if cache is None:
+            cache = self.coef_mat_cache
+
         self.coef_mat = make_okada_coefficient_matrix(
-            self.patches, nthreads=self.nthreads, pure_shear=self.pure_shear)
+            self.patches, nthreads=self.nthreads, pure_shear=self.pure_shear,
+            cache=cache)
 
     def get_patch_attribute(self, attr):
         '''
@@ -4242,6 +4270,11 @@ class CombiSource(Source):
 
         Source.__init__(self, subsources=subsources, **kwargs)
 
+    def base_key(self):
+        return Source.base_key(self) + tuple(
+            subsource.base_key() + (subsource.get_factor(),)
+            for subsource in self.subsources)
+
     def get_factor(self):
         return 1.0
 
@@ -4489,6 +4522,9 @@ class ProcessingStats(Object):
     n_subrequests = Int.T(default=0)
     n_stores = Int.T(default=0)
     n_records_stacked = Int.T(default=0)
+    n_dsource_cache_hits = Int.T(default=0)
+    n_dsource_cache_misses = Int.T(default=0)
+    n_dsource_cache_size = Int.T(default=0)
 
 
 class Response(Object):
@@ -4750,12 +4786,12 @@ def process_dynamic_timeseries(work, psources, ptargets, engine, nthreads=0):
     for w in work:
         _, _, isources, itargets = w
 
-        sources.update([psources[isource] for isource in isources])
+        sources.update([(isource, psources[isource]) for isource in isources])
         targets.update([ptargets[itarget] for itarget in itargets])
 
     store_ids = set([t.store_id for t in targets])
 
-    for isource, source in enumerate(psources):
+    for isource, source in sorted(sources, key=lambda x: x[0]):
 
         components = set()
         for itarget, target in enumerate(targets):
@@ -4867,33 +4903,117 @@ def process_dynamic(work, psources, ptargets, engine, nthreads=0):
 
 
 def process_static(work, psources, ptargets, engine, nthreads=0):
+    # Static targets sharing store, interpolation and snapshot time are
+    # processed in one batch per source, also across subrequests.
+    source_itargets = defaultdict(list)
     for w in work:
         _, _, isources, itargets = w
+        for isource in isources:
+            source_itargets[isource].extend(itargets)
 
-        sources = [psources[isource] for isource in isources]
-        targets = [ptargets[itarget] for itarget in itargets]
+    for isource in sorted(source_itargets.keys()):
+        source = psources[isource]
 
-        for isource, source in zip(isources, sources):
-            for itarget, target in zip(itargets, targets):
-                components = engine.get_rule(source, target)\
-                    .required_components(target)
+        batches = defaultdict(list)
+        for itarget in source_itargets[isource]:
+            target = ptargets[itarget]
+            batches[
+                target.store_id,
+                target.interpolation,
+                target.tsnapshot].append(itarget)
+
+        for itargets in batches.values():
+            targets = [ptargets[itarget] for itarget in itargets]
+            targets_components = [
+                engine.get_rule(source, target).required_components(target)
+                for target in targets]
+
+            components = set()
+            for target_components in targets_components:
+                components.update(target_components)
+
+            try:
+                base_statics_list, tcounters = engine.base_statics_batch(
+                    source, targets, components, nthreads)
+            except meta.OutOfBounds as e:
+                e.context = OutOfBoundsContext(
+                    source=source,
+                    target=targets[0],
+                    distance=float('nan'),
+                    components=sorted(components))
+                raise
+
+            for itarget, target, target_components, base_statics in zip(
+                    itargets, targets, targets_components,
+                    base_statics_list):
+
+                base_statics = dict(
+                    (component, base_statics[component])
+                    for component in target_components)
 
-                try:
-                    base_statics, tcounters = engine.base_statics(
-                        source, target, components, nthreads)
-                except meta.OutOfBounds as e:
-                    e.context = OutOfBoundsContext(
-                        source=sources[0],
-                        target=targets[0],
-                        distance=float('nan'),
-                        components=components)
-                    raise
                 result = engine._post_process_statics(
                     base_statics, source, target)
                 tcounters.append(xtime())
 
                 yield (isource, itarget, result), tcounters
 
+                # Only the first target of a batch accounts for the time
+                # spent in the batched computation.
+                tcounters = [tcounters[-1]] * 4
+
+
+def _process_shard(process_func, work, pshared):
+    return list(process_func(
+        work, pshared['psources'], pshared['ptargets'], pshared['engine'],
+        nthreads=1))
+
+
+def process_sharded(process_func, work, psources, ptargets, engine, nworkers):
+
+    '''
+    Run subrequest processing function in a pool of worker processes.
+
+    The sources of each subrequest in ``work`` are distributed among a number
+    of shards, such that every source is handled by exactly one shard. The
+    shards are processed in forked worker processes and results are yielded
+    shard by shard. Only the shard definitions and the results are passed
+    between the processes, the engine, sources and targets are inherited by
+    the workers. Stores must be opened before calling this function, so that
+    workers share the memory-mapped GF data with the parent process. Stacking
+    is single-threaded within each worker, because the OpenMP thread pool of
+    the parent process cannot be used in forked child processes.
+    '''
+
+    from pyrocko.parimap import parimap
+
+    nshards = 4 * nworkers
+    shards = []
+    for ishard in range(nshards):
+        shard = []
+        for (i, nsub, isources, itargets) in work:
+            isources_shard = [
+                isource for isource in isources
+                if isource % nshards == ishard]
+
+            if isources_shard and itargets:
+                shard.append((i, nsub, isources_shard, itargets))
+
+        if shard:
+            shards.append(shard)
+
+    pshared = dict(psources=psources, ptargets=ptargets, engine=engine)
+
+    for results in parimap(
+            _process_shard,
+            [process_func] * len(shards),
+            shards,
+            nprocs=nworkers,
+            eprintignore=Exception,
+            pshared=pshared):
+
+        for result in results:
+            yield result
+
 
 class LocalEngine(Engine):
     '''
@@ -4929,6 +5049,7 @@ class LocalEngine(Engine):
     def __init__(self, **kwargs):
         use_env = kwargs.pop('use_env', False)
         use_config = kwargs.pop('use_config', False)
+        dsource_cache_size = kwargs.pop('dsource_cache_size', 100)
         Engine.__init__(self, **kwargs)
         if use_env:
             env_store_superdirs = os.environ.get('GF_STORE_SUPERDIRS', '')
@@ -4948,6 +5069,10 @@ class LocalEngine(Engine):
         self._id_to_store_dir = {}
         self._open_stores = {}
         self._effective_default_store_id = None
+        self._dsource_cache = OrderedDict()
+        self._dsource_cache_size = dsource_cache_size
+        self._dsource_cache_nhits = 0
+        self._dsource_cache_nmisses = 0
 
     def _check_store_dirs_type(self):
         for sdir in ['store_dirs', 'store_superdirs']:
@@ -5097,9 +5222,57 @@ class LocalEngine(Engine):
                 target.store_id,
                 source.__class__.__name__))
 
+    def set_dsource_cache_size(self, size):
+        '''
+        Set maximum number of discretized sources to be kept in the cache.
+
+        Discretized sources are cached across calls to :py:meth:`process`,
+        using the source's :py:meth:`~Source.base_key`, the store ID and the
+        target's interpolation method as key. When the cache is full, the
+        least recently used entries are discarded. A size of zero disables the
+        cache.
+        '''
+
+        self._dsource_cache_size = size
+        self._prune_dsource_cache()
+
+    def clear_dsource_cache(self):
+        '''
+        Remove all entries from the discretized source cache.
+        '''
+
+        self._dsource_cache.clear()
+
+    def _prune_dsource_cache(self):
+        while len(self._dsource_cache) > self._dsource_cache_size:
+            self._dsource_cache.popitem(last=False)
+
+    def _discretize_basesource(self, source, store, target):
+        if self._dsource_cache_size == 0:
+            return source.discretize_basesource(store, target)
+
+        key = (
+            source.base_key(),
+            store.config.id,
+            target.interpolation if target is not None else None)
+
+        try:
+            dsource = self._dsource_cache[key]
+            self._dsource_cache.move_to_end(key)
+            self._dsource_cache_nhits += 1
+
+        except KeyError:
+            dsource = source.discretize_basesource(store, target)
+            self._dsource_cache[key] = dsource
+            self._dsource_cache_nmisses += 1
+            self._prune_dsource_cache()
+
+        return dsource
+
     def _cached_discretize_basesource(self, source, store, cache, target):
         if (source, store) not in cache:
-            cache[source, store] = source.discretize_basesource(store, target)
+            cache[source, store] = self._discretize_basesource(
+                source, store, target)
 
         return cache[source, store]
 
@@ -5200,7 +5373,23 @@ class LocalEngine(Engine):
         return base_seismogram, tcounters
 
     def base_statics(self, source, target, components, nthreads):
+        base_statics_list, tcounters = self.base_statics_batch(
+            source, [target], components, nthreads)
+
+        return base_statics_list[0], tcounters
+
+    def base_statics_batch(self, source, targets, components, nthreads):
         tcounters = [xtime()]
+
+        target = targets[0]
+
+        if len(set((t.store_id, t.interpolation, t.tsnapshot)
+                   for t in targets)) > 1:
+
+            raise BadRequest(
+                'Targets have different stores, interpolation schemes or '
+                'snapshot times.')
+
         store_ = self.get_store(target.store_id)
 
         if target.tsnapshot is not None:
@@ -5210,13 +5399,13 @@ class LocalEngine(Engine):
             itsnapshot = None
         tcounters.append(xtime())
 
-        base_source = source.discretize_basesource(store_, target=target)
+        base_source = self._discretize_basesource(source, store_, target)
 
         tcounters.append(xtime())
 
-        base_statics = store_.statics(
+        base_statics_list = store_.calc_statics(
             base_source,
-            target,
+            targets,
             itsnapshot,
             components,
             target.interpolation,
@@ -5224,7 +5413,7 @@ class LocalEngine(Engine):
 
         tcounters.append(xtime())
 
-        return base_statics, tcounters
+        return base_statics_list, tcounters
 
     def _post_process_dynamic(self, base_seismogram, source, target):
         base_any = next(iter(base_seismogram.values()))
@@ -5283,6 +5472,19 @@ class LocalEngine(Engine):
         The request can be given a a :py:class:`Request` object, or such an
         object is created using ``Request(**kwargs)`` for convenience.
 
+        The number of threads used for stacking can be set with the
+        ``nthreads`` keyword argument. With ``nworkers`` set to a value larger
+        than one, the sources of the request are instead distributed among a
+        pool of single-threaded worker processes. The workers are forked after
+        all required GF stores have been opened, so that the memory-mapped GF
+        data is shared between them.
+
+        Discretized sources are kept in a cache on the engine, so that
+        repeated requests involving the same sources do not have to
+        discretize them again (see :py:meth:`set_dsource_cache_size`). In
+        multi-process mode, the cache is only read, but not updated by the
+        worker processes.
+
         :returns: :py:class:`Response` object
         '''
 
@@ -5304,6 +5506,8 @@ class LocalEngine(Engine):
         if nprocs is not None:
             nthreads = nprocs
 
+        nworkers = kwargs.pop('nworkers', None)
+
         if request is None:
             request = Request(**kwargs)
 
@@ -5312,6 +5516,9 @@ class LocalEngine(Engine):
             rc0 = resource.getrusage(resource.RUSAGE_CHILDREN)
         tt0 = xtime()
 
+        nhits0 = self._dsource_cache_nhits
+        nmisses0 = self._dsource_cache_nmisses
+
         # make sure stores are open before fork()
         store_ids = set(target.store_id for target in request.targets)
         for store_id in store_ids:
@@ -5335,14 +5542,20 @@ class LocalEngine(Engine):
         nsub = len(skeys)
         isub = 0
 
-        # Processing dynamic targets through
-        # parimap(process_subrequest_dynamic)
-
         if calc_timeseries:
             _process_dynamic = process_dynamic_timeseries
         else:
             _process_dynamic = process_dynamic
 
+        def run(process_func, work):
+            if nworkers is not None and nworkers > 1:
+                return process_sharded(
+                    process_func, work, request.sources, request.targets,
+                    self, nworkers)
+            else:
+                return process_func(
+                    work, request.sources, request.targets, self, nthreads)
+
         if request.has_dynamic:
             work_dynamic = [
                 (i, nsub,
@@ -5351,9 +5564,8 @@ class LocalEngine(Engine):
                   if not isinstance(target, StaticTarget)])
                 for (i, k) in enumerate(skeys)]
 
-            for ii_results, tcounters_dyn in _process_dynamic(
-                    work_dynamic, request.sources, request.targets, self,
-                    nthreads):
+            for ii_results, tcounters_dyn in run(
+                    _process_dynamic, work_dynamic):
 
                 tcounters_dyn_list.append(num.diff(tcounters_dyn))
                 isource, itarget, result = ii_results
@@ -5373,9 +5585,8 @@ class LocalEngine(Engine):
                   if isinstance(target, StaticTarget)])
                 for (i, k) in enumerate(skeys)]
 
-            for ii_results, tcounters_static in process_static(
-                    work_static, request.sources, request.targets, self,
-                    nthreads=nthreads):
+            for ii_results, tcounters_static in run(
+                    process_static, work_static):
 
                 tcounters_static_list.append(num.diff(tcounters_static))
                 isource, itarget, result = ii_results
@@ -5436,6 +5647,9 @@ class LocalEngine(Engine):
                 s.t_perc_optimize += result.t_optimize / shr
                 s.t_perc_stack += result.t_stack / shr
         s.n_records_stacked = int(n_records_stacked)
+        s.n_dsource_cache_hits = self._dsource_cache_nhits - nhits0
+        s.n_dsource_cache_misses = self._dsource_cache_nmisses - nmisses0
+        s.n_dsource_cache_size = len(self._dsource_cache)
         if t_dyn != 0.:
             s.t_perc_optimize /= t_dyn * 100
             s.t_perc_stack /= t_dyn * 100
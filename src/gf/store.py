@@ -19,6 +19,7 @@ import copy
 import logging
 import re
 import hashlib
+from collections import OrderedDict
 from glob import glob
 
 import numpy as num
@@ -343,7 +344,8 @@ class BaseStore(object):
         with open(data_fn, 'wb') as f:
             f.write(b'\0' * 32)
 
-    def __init__(self, store_dir, mode='r', use_memmap=True):
+    def __init__(self, store_dir, mode='r', use_memmap=True,
+                 record_cache_size=None):
         assert mode in 'rw'
         self.store_dir = store_dir
         self.mode = mode
@@ -354,6 +356,11 @@ class BaseStore(object):
         self._f_data = None
         self._records = None
         self.cstore = None
+        self._record_cache = OrderedDict()
+        self._record_cache_size = record_cache_size
+        self._record_cache_nbytes = 0
+        self._record_cache_nhits = 0
+        self._record_cache_nmisses = 0
 
     def open(self):
         assert self._f_index is None
@@ -476,8 +483,44 @@ class BaseStore(object):
         del self._records
         self._records = None
 
+        self.clear_record_cache()
+
         self.mode = ''
 
+    def set_record_cache_size(self, size):
+        '''
+        Set the size limit of the in-process GF trace cache [bytes].
+
+        When enabled, traces retrieved with :py:meth:`get` are kept in memory,
+        using the record number, the decimation factor and the requested time
+        span as key. Least recently used traces are discarded when the limit
+        is exceeded. Use ``None`` or ``0`` to disable the cache (default).
+
+        Cached trace data is marked read-only. Traces returned from the cache
+        share their data arrays with the cache.
+        '''
+
+        self._record_cache_size = size
+        if not size:
+            self.clear_record_cache()
+        else:
+            self._prune_record_cache()
+
+    def clear_record_cache(self):
+        '''
+        Remove all traces from the in-process GF trace cache.
+        '''
+
+        self._record_cache.clear()
+        self._record_cache_nbytes = 0
+
+    def _prune_record_cache(self):
+        while self._record_cache \
+                and self._record_cache_nbytes > self._record_cache_size:
+
+            _, (args, nbytes) = self._record_cache.popitem(last=False)
+            self._record_cache_nbytes -= nbytes
+
     def _get_record(self, irecord):
         if not self._f_index:
             self.open()
@@ -495,6 +538,38 @@ class BaseStore(object):
         if not self.mode == 'r':
             raise StoreError('store not open in read mode')
 
+        if not self._record_cache_size:
+            return self._get_uncached(
+                irecord, itmin, nsamples, decimate, implementation)
+
+        key = (irecord, decimate, itmin, nsamples)
+        try:
+            args, _ = self._record_cache[key]
+            self._record_cache.move_to_end(key)
+            self._record_cache_nhits += 1
+            return GFTrace(*args)
+
+        except KeyError:
+            self._record_cache_nmisses += 1
+
+        tr = self._get_uncached(
+            irecord, itmin, nsamples, decimate, implementation)
+
+        if tr is not None:
+            tr.data.flags.writeable = False
+            args = (tr.data, tr.itmin, tr.deltat, tr.is_zero,
+                    tr.begin_value, tr.end_value)
+
+            nbytes = tr.data.nbytes + 100
+            self._record_cache[key] = (args, nbytes)
+            self._record_cache_nbytes += nbytes
+            self._prune_record_cache()
+
+        return tr
+
+    def _get_uncached(self, irecord, itmin, nsamples, decimate,
+                      implementation):
+
         if implementation == 'c' and decimate == 1:
 
             if nsamples is None:
@@ -1012,11 +1087,15 @@ class BaseStore(object):
             zero=counter[1],
             size_data=self.size_data,
             size_index=self.size_index,
+            record_cache_nhits=self._record_cache_nhits,
+            record_cache_nmisses=self._record_cache_nmisses,
+            record_cache_nbytes=self._record_cache_nbytes,
         )
 
         return stats
 
-    stats_keys = 'total inserted empty short zero size_data size_index'.split()
+    stats_keys = '''total inserted empty short zero size_data size_index
+        record_cache_nhits record_cache_nmisses record_cache_nbytes'''.split()
 
 
 def remake_dir(dpath, force):
@@ -1029,6 +1108,90 @@ def remake_dir(dpath, force):
     os.mkdir(dpath)
 
 
+def make_stored_table_phase(config, attribute, phase_id, fn):
+    '''
+    Compute table of a ray attribute for a single phase group and save it.
+
+    Used by :py:meth:`Store.make_stored_table`. This is a module level
+    function, so that it can be run in worker processes.
+    '''
+
+    from pyrocko import cake
+
+    mod = config.earthmodel_1d
+
+    pdef = [pdef_ for pdef_ in config.tabulated_phases
+            if pdef_.id == phase_id][0]
+
+    phases = pdef.phases
+
+    if attribute == 'phase':
+        ftol = config.deltat * 0.5
+        horvels = pdef.horizontal_velocities
+    else:
+        ftol = config.deltat * 0.01
+
+    def evaluate(args):
+
+        nargs = len(args)
+        if nargs == 2:
+            receiver_depth, source_depth, distance = (
+                config.receiver_depth,) + args
+        elif nargs == 3:
+            receiver_depth, source_depth, distance = args
+        else:
+            raise ValueError(
+                'Number of input arguments %i is not supported!'
+                'Supported number of arguments: 2 or 3' % nargs)
+
+        ray_attribute_values = []
+        arrival_times = []
+        if phases:
+            rays = mod.arrivals(
+                phases=phases,
+                distances=[distance * cake.m2d],
+                zstart=source_depth,
+                zstop=receiver_depth)
+
+            for ray in rays:
+                arrival_times.append(ray.t)
+                if attribute != 'phase':
+                    ray_attribute_values.append(
+                        getattr(ray, attribute)())
+
+        if attribute == 'phase':
+            for v in horvels:
+                arrival_times.append(distance / (v * km))
+
+        if arrival_times:
+            if attribute == 'phase':
+                return min(arrival_times)
+            else:
+                earliest_idx = num.argmin(arrival_times)
+                return ray_attribute_values[earliest_idx]
+        else:
+            return None
+
+    logger.info(
+        'making "%s" table for phasegroup "%s"', attribute, phase_id)
+
+    ip = spit.SPTree(
+        f=evaluate,
+        ftol=ftol,
+        xbounds=num.transpose((config.mins, config.maxs)),
+        xtols=config.deltas)
+
+    util.ensuredirs(fn)
+    ip.dump(fn)
+
+
+def work_stored_table_phase(store_dir, attribute, phase_id, fn):
+    # store config is not picklable, it is reloaded in the worker process
+    store = Store(store_dir)
+    make_stored_table_phase(store.config, attribute, phase_id, fn)
+    store.close()
+
+
 class MakeTimingParamsFailed(StoreError):
     pass
 
@@ -1152,8 +1315,12 @@ class Store(BaseStore):
             dpath = os.path.join(store_dir, sub_dir)
             remake_dir(dpath, force)
 
-    def __init__(self, store_dir, mode='r', use_memmap=True):
-        BaseStore.__init__(self, store_dir, mode=mode, use_memmap=use_memmap)
+    def __init__(self, store_dir, mode='r', use_memmap=True,
+                 record_cache_size=None):
+
+        BaseStore.__init__(
+            self, store_dir, mode=mode, use_memmap=use_memmap,
+            record_cache_size=record_cache_size)
         config_fn = self.config_fn()
         if not os.path.isfile(config_fn):
             raise StoreError(
@@ -1551,13 +1718,29 @@ class Store(BaseStore):
     def _decimated_store_dir(self, decimate):
         return os.path.join(self.store_dir, 'decimated', str(decimate))
 
+    def set_record_cache_size(self, size):
+        '''
+        Set the size limit of the in-process GF trace cache [bytes].
+
+        See :py:meth:`BaseStore.set_record_cache_size`. The setting is also
+        applied to the decimated versions of the store.
+        '''
+
+        BaseStore.set_record_cache_size(self, size)
+        for store in self._decimated.values():
+            if store is not None:
+                store.set_record_cache_size(size)
+
     def _decimated_store(self, decimate):
         if decimate == 1 or decimate not in self._decimated:
             return self, decimate
         else:
             store = self._decimated[decimate]
             if store is None:
-                store = Store(self._decimated_store_dir(decimate), 'r')
+                store = Store(
+                    self._decimated_store_dir(decimate), 'r',
+                    record_cache_size=self._record_cache_size)
+
                 self._decimated[decimate] = store
 
             return store, 1
@@ -1651,6 +1834,130 @@ class Store(BaseStore):
 
         raise StoreError('unsupported phase provider: %s' % provider)
 
+    def get_phase_many(self, phase_def):
+        '''
+        Get vectorized phase arrival evaluation function.
+
+        Like :py:meth:`get_phase`, but the returned function takes a tuple of
+        arrays with index coordinates and returns an array of arrival times,
+        with ``NaN`` where the phase is undefined. Stored travel time tables
+        and velocity based phase definitions are evaluated in a vectorized
+        way, other providers point by point.
+        '''
+
+        toks = phase_def.split(':', 1)
+        if len(toks) == 2:
+            provider, phase_def = toks
+        else:
+            provider, phase_def = 'stored', toks[0]
+
+        if provider == 'stored':
+            spt = self.get_stored_phase(phase_def)
+
+            def evaluate(args):
+                x = num.column_stack(args)
+                outside = num.logical_or(
+                    x < spt.xbounds[:, 0], x > spt.xbounds[:, 1]).any(axis=1)
+
+                if num.any(outside):
+                    raise meta.OutOfBounds(
+                        tuple(x[num.where(outside)[0][0]]))
+
+                return spt.interpolate_many(x)
+
+            return evaluate
+
+        elif provider in ('vel', 'vel_surface') and isinstance(
+                self.config, (meta.ConfigTypeA, meta.ConfigTypeB)):
+
+            vel = float(phase_def) * 1000.
+
+            if provider == 'vel':
+                def evaluate(args):
+                    return self.config.get_distance(args) / vel
+            else:
+                def evaluate(args):
+                    return self.config.get_surface_distance(args) / vel
+
+            return evaluate
+
+        else:
+            phase = self.get_phase(
+                provider + ':' + phase_def)
+
+            def evaluate(args):
+                times = num.empty(args[0].size)
+                for i, args_point in enumerate(zip(*args)):
+                    t = phase(tuple(float(x) for x in args_point))
+                    times[i] = t if t is not None else num.nan
+
+                return times
+
+            return evaluate
+
+    def t_many(self, timings, args):
+        '''
+        Compute interpolated phase arrivals for many points at once.
+
+        **Example:**
+
+        If ``test_store`` is of :py:class:`~pyrocko.gf.meta.ConfigTypeA`::
+
+            source_depths = num.array([1000., 2000.])
+            distances = num.array([10000., 20000.])
+            test_store.t_many(
+                ['first{stored:p|stored:P}', '{stored:S}+10'],
+                (source_depths, distances))
+
+        :param timings: timing or list of timings as described in
+            :py:meth:`t`
+        :type timings: str or :py:class:`~pyrocko.gf.meta.Timing` or list of
+            these
+        :param args: :py:class:`~pyrocko.gf.meta.Config` index tuple of
+            arrays, without the component index, e.g.
+            ``(source_depths, distances)`` as in
+            :py:class:`~pyrocko.gf.meta.ConfigTypeA` or
+            ``(receiver_depths, source_depths, distances)`` as in
+            :py:class:`~pyrocko.gf.meta.ConfigTypeB`. Scalars are broadcast.
+        :type args: tuple
+        :returns: Phase arrivals, ``NaN`` where undefined. The shape is
+            ``(npoints,)`` for a single timing and ``(ntimings, npoints)``
+            for a list of timings.
+        :rtype: :py:class:`numpy.ndarray`
+        '''
+
+        single = not isinstance(timings, (list, tuple))
+        if single:
+            timings = [timings]
+
+        timings = [
+            timing if isinstance(timing, meta.Timing) else meta.Timing(timing)
+            for timing in timings]
+
+        args = tuple(num.broadcast_arrays(
+            *[num.asarray(arg, dtype=float).ravel() for arg in args]))
+
+        # phases shared between timings are only evaluated once
+        phase_times = {}
+
+        def get_phase_many(phase_def):
+            def evaluate(args):
+                if phase_def not in phase_times:
+                    phase_times[phase_def] = self.get_phase_many(
+                        phase_def)(args)
+
+                return phase_times[phase_def]
+
+            return evaluate
+
+        times = num.vstack([
+            timing.evaluate_many(get_phase_many, args) for timing in timings])
+
+        if single:
+            return times[0]
+        else:
+            return times
+
     def t(self, timing, *args):
         '''
         Compute interpolated phase arrivals.
@@ -1737,12 +2044,17 @@ class Store(BaseStore):
                     attribute, phase_def,
                     self.get_available_interpolation_tables()))
 
-    def make_stored_table(self, attribute, force=False):
+    def make_stored_table(self, attribute, force=False, nworkers=1):
         '''
         Compute tables for selected ray attributes.
 
         :param attribute: phase / takeoff_angle [deg]/ incidence_angle [deg]
         :type attribute: str
+        :param nworkers: number of worker processes to use, ``None`` to use
+            all available CPUs. Each phase group's table is computed as a
+            whole in a single worker, so that the results are identical to
+            those of the serial computation.
+        :type nworkers: int
 
         Tables are computed using the 1D earth model defined in
         :py:attr:`~pyrocko.gf.meta.Config.earthmodel_1d` for each defined phase
@@ -1755,7 +2067,6 @@ class Store(BaseStore):
                 'Supported attribute tables: {}'.format(
                     attribute, available_stored_tables))
 
-        from pyrocko import cake
         config = self.config
 
         if not config.tabulated_phases:
@@ -1769,75 +2080,35 @@ class Store(BaseStore):
         if config.earthmodel_receiver_1d:
             self.check_earthmodels(config)
 
+        phase_ids = []
+        fns = []
         for pdef in config.tabulated_phases:
-
-            phase_id = pdef.id
-            phases = pdef.phases
-
-            if attribute == 'phase':
-                ftol = config.deltat * 0.5
-                horvels = pdef.horizontal_velocities
-            else:
-                ftol = config.deltat * 0.01
-
-            fn = self.phase_filename(phase_id, attribute)
+            fn = self.phase_filename(pdef.id, attribute)
 
             if os.path.exists(fn) and not force:
                 logger.info('file already exists: %s' % fn)
                 continue
 
-            def evaluate(args):
-
-                nargs = len(args)
-                if nargs == 2:
-                    receiver_depth, source_depth, distance = (
-                        config.receiver_depth,) + args
-                elif nargs == 3:
-                    receiver_depth, source_depth, distance = args
-                else:
-                    raise ValueError(
-                        'Number of input arguments %i is not supported!'
-                        'Supported number of arguments: 2 or 3' % nargs)
+            phase_ids.append(pdef.id)
+            fns.append(fn)
 
-                ray_attribute_values = []
-                arrival_times = []
-                if phases:
-                    rays = mod.arrivals(
-                        phases=phases,
-                        distances=[distance * cake.m2d],
-                        zstart=source_depth,
-                        zstop=receiver_depth)
+        n = len(phase_ids)
+        if nworkers == 1 or n < 2:
+            for phase_id, fn in zip(phase_ids, fns):
+                make_stored_table_phase(config, attribute, phase_id, fn)
 
-                    for ray in rays:
-                        arrival_times.append(ray.t)
-                        if attribute != 'phase':
-                            ray_attribute_values.append(
-                                getattr(ray, attribute)())
-
-                if attribute == 'phase':
-                    for v in horvels:
-                        arrival_times.append(distance / (v * km))
-
-                if arrival_times:
-                    if attribute == 'phase':
-                        return min(arrival_times)
-                    else:
-                        earliest_idx = num.argmin(arrival_times)
-                        return ray_attribute_values[earliest_idx]
-                else:
-                    return None
-
-            logger.info(
-                'making "%s" table for phasegroup "%s"', attribute, phase_id)
+        else:
+            from pyrocko.parimap import parimap
 
-            ip = spit.SPTree(
-                f=evaluate,
-                ftol=ftol,
-                xbounds=num.transpose((config.mins, config.maxs)),
-                xtols=config.deltas)
+            for _ in parimap(
+                    work_stored_table_phase,
+                    [self.store_dir]*n, [attribute]*n, phase_ids, fns,
+                    nprocs=nworkers,
+                    eprintignore=(StoreError,),
+                    startup=util.setup_logging,
+                    startup_args=util.subprocess_setup_logging_args()):
 
-            util.ensuredirs(fn)
-            ip.dump(fn)
+                pass
 
     def make_timing_params(self, begin, end, snap_vred=True, force=False):
         '''
@@ -1922,7 +2193,7 @@ use `fomosto tttlsd` to fix holes.''' % w
             tlenmax_vred=tlenmax_vred,
             vred=vred)
 
-    def make_travel_time_tables(self, force=False):
+    def make_travel_time_tables(self, force=False, nworkers=1):
         '''
         Compute travel time tables.
 
@@ -1930,13 +2201,16 @@ use `fomosto tttlsd` to fix holes.''' % w
         :py:attr:`~pyrocko.gf.meta.Config.earthmodel_1d` for each defined phase
         in :py:attr:`~pyrocko.gf.meta.Config.tabulated_phases`. The accuracy of
         the tablulated times is adjusted to the sampling rate of the store.
+        Tables of different phase groups are computed in parallel when
+        ``nworkers`` is not ``1`` (see :py:meth:`make_stored_table`).
         '''
-        self.make_stored_table(attribute='phase', force=force)
+        self.make_stored_table(
+            attribute='phase', force=force, nworkers=nworkers)
 
-    def make_ttt(self, force=False):
-        self.make_travel_time_tables(force=force)
+    def make_ttt(self, force=False, nworkers=1):
+        self.make_travel_time_tables(force=force, nworkers=nworkers)
 
-    def make_takeoff_angle_tables(self, force=False):
+    def make_takeoff_angle_tables(self, force=False, nworkers=1):
         '''
         Compute takeoff-angle tables.
 
@@ -1946,9 +2220,10 @@ use `fomosto tttlsd` to fix holes.''' % w
         The accuracy of the tablulated times is adjusted to 0.01 times the
         sampling rate of the store.
         '''
-        self.make_stored_table(attribute='takeoff_angle', force=force)
+        self.make_stored_table(
+            attribute='takeoff_angle', force=force, nworkers=nworkers)
 
-    def make_incidence_angle_tables(self, force=False):
+    def make_incidence_angle_tables(self, force=False, nworkers=1):
         '''
         Compute incidence-angle tables.
 
@@ -1958,7 +2233,8 @@ use `fomosto tttlsd` to fix holes.''' % w
         The accuracy of the tablulated times is adjusted to 0.01 times the
         sampling rate of the store.
         '''
-        self.make_stored_table(attribute='incidence_angle', force=force)
+        self.make_stored_table(
+            attribute='incidence_angle', force=force, nworkers=nworkers)
 
     def get_provided_components(self):
 
@@ -1998,16 +2274,35 @@ use `fomosto tttlsd` to fix holes.''' % w
 
     def statics(self, source, multi_location, itsnapshot, components,
                 interpolation='nearest_neighbor', nthreads=0):
+
+        return self.calc_statics(
+            source, [multi_location], itsnapshot, components,
+            interpolation=interpolation, nthreads=nthreads)[0]
+
+    def calc_statics(self, source, multi_locations, itsnapshot, components,
+                     interpolation='nearest_neighbor', nthreads=0):
+        '''
+        Calculate static displacements for many multi-location targets.
+
+        The coordinates of all given targets are stacked into one array, so
+        that the GF summation is done in a single call for all of them.
+
+        :returns: list of dicts with component names as keys and arrays of
+            static displacements as values, one for each element in
+            ``multi_locations``
+        '''
+
         if not self._f_index:
             self.open()
 
-        out = {}
-        ntargets = multi_location.ntargets
+        ntargets = [
+            multi_location.ntargets for multi_location in multi_locations]
+
         source_terms = source.get_source_terms(self.config.component_scheme)
         # TODO: deal with delays for snapshots > 1 sample
 
         if itsnapshot is not None:
-            delays = source.times
+            delays = source.times.copy()
 
             # Fringe case where we sample at sample 0 and sample 1
             tsnapshot = itsnapshot * self.config.deltat
@@ -2018,28 +2313,38 @@ use `fomosto tttlsd` to fix holes.''' % w
             delays = source.times * 0
             itsnapshot = 1
 
-        if ntargets == 0:
+        if 0 in ntargets:
             raise StoreError('MultiLocation.coords5 is empty')
 
+        if len(multi_locations) == 1:
+            receiver_coords = multi_locations[0].coords5
+        else:
+            receiver_coords = num.vstack([
+                multi_location.coords5
+                for multi_location in multi_locations])
+
         res = store_ext.store_calc_static(
             self.cstore,
             source.coords5(),
             source_terms,
             delays,
-            multi_location.coords5,
+            receiver_coords,
             self.config.component_scheme,
             interpolation,
             itsnapshot,
             nthreads)
 
-        out = {}
-        for icomp, (comp, comp_res) in enumerate(
-                zip(self.get_provided_components(), res)):
+        offsets = num.concatenate([[0], num.cumsum(ntargets)])
+
+        outs = [{} for _ in multi_locations]
+        for icomp, comp in enumerate(self.get_provided_components()):
             if comp not in components:
                 continue
-            out[comp] = res[icomp]
 
-        return out
+            for i, out in enumerate(outs):
+                out[comp] = res[icomp][offsets[i]:offsets[i+1]]
+
+        return outs
 
     def calc_seismograms(self, source, receivers, components, deltat=None,
                          itmin=None, nsamples=None,
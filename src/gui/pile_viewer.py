@@ -14,6 +14,7 @@ import logging
 import operator
 import copy
 import enum
+import threading
 from itertools import groupby
 
 import numpy as num
@@ -767,6 +768,127 @@ class PileViewerMainException(Exception):
     pass
 
 
+class ProcessingJob(object):
+    '''
+    Trace preparation job to be run by a :py:class:`ProcessingWorker`.
+
+    :param vec: state vector the job's results are valid for
+    :param iter_processed: generator function yielding batches of processed
+        traces, called with the job as argument
+    '''
+
+    def __init__(self, vec, iter_processed):
+        self.vec = vec
+        self.iter_processed = iter_processed
+        self.cancelled = False
+        self.traces = []
+
+
+def iter_locked(iterator, lock):
+    '''
+    Iterate, holding given lock only while the next item is retrieved.
+    '''
+
+    try:
+        while True:
+            with lock:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+
+            yield item
+
+    finally:
+        with lock:
+            iterator.close()
+
+
+class ProcessingWorker(qc.QThread):
+    '''
+    Background thread to prepare traces for display.
+
+    Only one job is run at a time. Submitting a new job cancels the running
+    one. Batches of processed traces are handed back with the
+    ``batch_ready`` signal, which is delivered in the GUI thread. The jobs
+    are responsible for locking shared data they access.
+    '''
+
+    batch_ready = qc.pyqtSignal(object, object)
+    job_finished = qc.pyqtSignal(object)
+
+    def __init__(self):
+        qc.QThread.__init__(self)
+        self.mutex = qc.QMutex()
+        self.condition = qc.QWaitCondition()
+        self.pending_job = None
+        self.current_job = None
+        self._sun_is_shining = True
+
+    def submit(self, job):
+        self.mutex.lock()
+        for old_job in (self.pending_job, self.current_job):
+            if old_job is not None:
+                old_job.cancelled = True
+
+        self.pending_job = job
+        self.condition.wakeAll()
+        self.mutex.unlock()
+
+    def cancel(self):
+        self.submit(None)
+
+    def run(self):
+        while True:
+            self.mutex.lock()
+            while self.pending_job is None and self._sun_is_shining:
+                self.condition.wait(self.mutex)
+
+            job = self.pending_job
+            self.pending_job = None
+            self.current_job = job
+            sun_is_shining = self._sun_is_shining
+            self.mutex.unlock()
+
+            if not sun_is_shining:
+                break
+
+            batches = job.iter_processed(job)
+            finished = False
+            while not job.cancelled:
+                try:
+                    traces = next(batches)
+
+                except StopIteration:
+                    finished = True
+                    break
+
+                except Exception as e:
+                    logger.error('Processing traces failed: %s' % e)
+                    break
+
+                self.batch_ready.emit(job, traces)
+
+            batches.close()
+
+            if finished and not job.cancelled:
+                self.job_finished.emit(job)
+
+            self.mutex.lock()
+            self.current_job = None
+            self.mutex.unlock()
+
+    def stop(self):
+        self.mutex.lock()
+        self._sun_is_shining = False
+        self.mutex.unlock()
+        self.cancel()
+
+        logger.debug('Waiting for processing thread to terminate...')
+        self.wait()
+        logger.debug('Processing thread has terminated.')
+
+
 class PileViewerMenuBar(qw.QMenuBar):
     ...
 
@@ -1117,6 +1239,16 @@ def MakePileViewerMainClass(base):
             self.menuitem_degap.setCheckable(True)
             self.menuitem_degap.setChecked(True)
 
+            self.menuitem_overviews = options_menu.addAction(
+                'Use Overviews')
+            self.menuitem_overviews.setCheckable(True)
+            self.menuitem_overviews.setChecked(True)
+
+            self.menuitem_background_processing = options_menu.addAction(
+                'Background Processing')
+            self.menuitem_background_processing.setCheckable(True)
+            self.menuitem_background_processing.setChecked(True)
+
             options_menu.addSeparator()
 
             self.menuitem_fft_filtering = options_menu.addAction(
@@ -1176,6 +1308,12 @@ def MakePileViewerMainClass(base):
 
             self.cached_vec = None
             self.cached_processed_traces = None
+            self.processing_worker = None
+            self.processing_job = None
+
+            # held by the GUI thread while using the pile and by the
+            # processing worker while reading raw traces from it
+            self.pile_lock = threading.RLock()
 
             self.timer = qc.QTimer(self)
             self.timer.timeout.connect(self.periodical)
@@ -1280,11 +1418,12 @@ def MakePileViewerMainClass(base):
         def add_blacklist_pattern(self, pattern):
             if pattern == 'empty':
                 keys = set(self.pile.nslc_ids)
-                trs = self.pile.all(
-                    tmin=self.tmin,
-                    tmax=self.tmax,
-                    load_data=False,
-                    degap=False)
+                with self.pile_lock:
+                    trs = self.pile.all(
+                        tmin=self.tmin,
+                        tmax=self.tmax,
+                        load_data=False,
+                        degap=False)
 
                 for tr in trs:
                     if tr.nslc_id in keys:
@@ -1577,13 +1716,14 @@ def MakePileViewerMainClass(base):
 
             self.automatic_updates = False
 
-            self.pile.load_files(
-                sorted(fns),
-                filename_attributes=regex,
-                cache=cache,
-                fileformat=format,
-                show_progress=False,
-                update_progress=update_progress)
+            with self.pile_lock:
+                self.pile.load_files(
+                    sorted(fns),
+                    filename_attributes=regex,
+                    cache=cache,
+                    fileformat=format,
+                    show_progress=False,
+                    update_progress=update_progress)
 
             self.automatic_updates = True
             self.update()
@@ -1656,7 +1796,9 @@ def MakePileViewerMainClass(base):
         def add_traces(self, traces):
             if traces:
                 mtf = pyrocko.pile.MemTracesFile(None, traces)
-                self.pile.add_file(mtf)
+                with self.pile_lock:
+                    self.pile.add_file(mtf)
+
                 ticket = (self.pile, mtf)
                 return ticket
             else:
@@ -1666,12 +1808,16 @@ def MakePileViewerMainClass(base):
             for ticket in tickets:
                 pile, mtf = ticket
                 if pile is not None:
-                    pile.remove_file(mtf)
+                    with self.pile_lock:
+                        pile.remove_file(mtf)
 
         def periodical(self):
             if self.menuitem_watch.isChecked():
-                if self.pile.reload_modified():
-                    self.update()
+                with self.pile_lock:
+                    reloaded = self.pile.reload_modified()
+
+                if reloaded:
+                    self.clean_update()
 
         def get_pile(self):
             return self.pile
@@ -2286,8 +2432,13 @@ def MakePileViewerMainClass(base):
                     self.set_time_range(tgo-dt/2., tgo+dt/2.)
 
             elif keytext == 'r':
-                if self.pile.reload_modified():
+                with self.pile_lock:
+                    reloaded = self.pile.reload_modified()
+
+                if reloaded:
                     self.reloaded = True
+                    self.cancel_background_processing()
+                    self.cached_processed_traces = None
 
             elif keytext == 'R':
                 self.setup_snufflings()
@@ -2768,8 +2919,9 @@ def MakePileViewerMainClass(base):
             painter = qg.QPainter()
             painter.begin(printer)
             page = printer.pageRect()
-            self.drawit(
-                painter, printmode=False, w=page.width(), h=page.height())
+            with self.pile_lock:
+                self.drawit(
+                    painter, printmode=False, w=page.width(), h=page.height())
 
             painter.end()
 
@@ -2801,7 +2953,8 @@ def MakePileViewerMainClass(base):
 
                     painter = qg.QPainter()
                     painter.begin(generator)
-                    self.drawit(painter, printmode=False, w=w, h=h)
+                    with self.pile_lock:
+                        self.drawit(painter, printmode=False, w=w, h=h)
                     painter.end()
 
                 except Exception as e:
@@ -2838,7 +2991,17 @@ def MakePileViewerMainClass(base):
             if self.menuitem_antialias.isChecked():
                 painter.setRenderHint(qg.QPainter.Antialiasing)
 
-            self.drawit(painter)
+            # do not wait for the processing worker, which holds the lock
+            # while reading from the pile, but show what is available
+            if self.pile_lock.acquire(False):
+                try:
+                    self.drawit(painter)
+                finally:
+                    self.pile_lock.release()
+
+            else:
+                self.drawit(painter, use_pile=False)
+                qc.QTimer.singleShot(100, self.update)
 
             logger.debug(
                 'Time spent drawing:   '
@@ -2858,7 +3021,9 @@ def MakePileViewerMainClass(base):
 
         def determine_box_styles(self):
 
-            traces = list(self.pile.iter_traces())
+            with self.pile_lock:
+                traces = list(self.pile.iter_traces())
+
             traces.sort(key=operator.attrgetter('full_id'))
             istyle = 0
             trace_styles = {}
@@ -3043,19 +3208,25 @@ def MakePileViewerMainClass(base):
                             t = tb
                             pcount = count
 
-        def drawit(self, p, printmode=False, w=None, h=None):
+        def drawit(self, p, printmode=False, w=None, h=None, use_pile=True):
             '''
             This performs the actual drawing.
+
+            With ``use_pile=False``, the pile is not accessed and only traces
+            which have already been prepared are shown.
             '''
 
             self.timer_draw.start()
-            show_boxes = self.menuitem_showboxes.isChecked()
+            show_boxes = self.menuitem_showboxes.isChecked() and use_pile
             sq = self.get_squirrel()
 
             if self.gather is None:
+                if not use_pile:
+                    return
+
                 self.set_gathering()
 
-            if self.pile_has_changed:
+            if self.pile_has_changed and use_pile:
 
                 if not self.sortingmode_change_delayed():
                     self.sortingmode_change()
@@ -3123,7 +3294,8 @@ def MakePileViewerMainClass(base):
                 self.tmin, self.tmax,
                 trace_selector=self.trace_selector,
                 degap=self.menuitem_degap.isChecked(),
-                demean=self.menuitem_demean.isChecked())
+                demean=self.menuitem_demean.isChecked(),
+                use_pile=use_pile)
 
             if not printmode and show_boxes:
                 if (self.view_mode is ViewMode.Wiggle) \
@@ -3482,6 +3654,7 @@ def MakePileViewerMainClass(base):
             return ndecimate, tpad, tsee
 
         def clean_update(self):
+            self.cancel_background_processing()
             self.cached_processed_traces = None
             self.update()
 
@@ -3501,7 +3674,17 @@ def MakePileViewerMainClass(base):
 
         def prepare_cutout2(
                 self, tmin, tmax, trace_selector=None, degap=True,
-                demean=True, nmax=6000):
+                demean=True, nmax=6000, use_pile=True):
+
+            if not use_pile:
+                # the pile is in use by the processing worker; show traces
+                # prepared so far
+                if self.processing_job is not None:
+                    processed_traces = list(self.processing_job.traces)
+                else:
+                    processed_traces = self.cached_processed_traces or []
+
+                return self.chop_processed_traces(processed_traces, tmin, tmax)
 
             if self.pile.is_empty():
                 return []
@@ -3539,185 +3722,232 @@ def MakePileViewerMainClass(base):
             tpad = self.get_adequate_tpad()
             tpad = max(tpad, tsee)
 
+            lowpass, highpass, rotate = self.lowpass, self.highpass, \
+                self.rotate
+
+            hooks_enabled = any(
+                snuffling._pre_process_hook_enabled
+                or snuffling._post_process_hook_enabled
+                for snuffling in self.snufflings)
+
+            # draw traces too densely sampled for the raw path from their
+            # min/max overviews, when no processing is requested
+            use_overviews = (
+                self.menuitem_overviews.isChecked()
+                and isinstance(self.pile, pyrocko.pile.Pile)
+                and lowpass is None
+                and highpass is None
+                and rotate == 0.0
+                and not hooks_enabled)
+
+            # snuffling hooks may interact with the GUI and are therefore
+            # only run in the GUI thread
+            background = (
+                self.menuitem_background_processing.isChecked()
+                and isinstance(self.pile, pyrocko.pile.Pile)
+                and not hooks_enabled)
+
             # state vector to decide if cached traces can be used
             vec = (
-                tmin, tmax, tpad, trace_selector, degap, demean, self.lowpass,
-                self.highpass, fft_filtering, lphp,
-                min_deltat_allow, self.rotate, self.shown_tracks_range,
-                ads, self.pile.get_update_count())
+                tmin, tmax, tpad, trace_selector, degap, demean, lowpass,
+                highpass, fft_filtering, lphp,
+                min_deltat_allow, rotate, self.shown_tracks_range,
+                ads, use_overviews, self.pile.get_update_count())
 
-            if (self.cached_vec
-                    and self.cached_vec[0] <= vec[0]
-                    and vec[1] <= self.cached_vec[1]
-                    and vec[2:] == self.cached_vec[2:]
-                    and not (self.reloaded or self.menuitem_watch.isChecked())
-                    and self.cached_processed_traces is not None):
+            def iter_processed(job=None):
+                if use_overviews:
+                    yield self.prepare_overviews(
+                        tmin, tmax, min_deltat_allow, trace_selector, demean)
 
-                logger.debug('Using cached traces')
-                processed_traces = self.cached_processed_traces
+                with self.pile_lock:
+                    if self.pile.deltatmax < min_deltat_allow:
+                        return
 
-            else:
-                processed_traces = []
-                if self.pile.deltatmax >= min_deltat_allow:
+                if isinstance(self.pile, pyrocko.pile.Pile):
+                    def group_selector(gr):
+                        return gr.deltatmax >= min_deltat_allow
+
+                    kwargs = dict(group_selector=group_selector)
+                else:
+                    kwargs = {}
 
-                    if isinstance(self.pile, pyrocko.pile.Pile):
-                        def group_selector(gr):
-                            return gr.deltatmax >= min_deltat_allow
+                if trace_selector is not None:
+                    def trace_selectorx(tr):
+                        return tr.deltat >= min_deltat_allow \
+                            and trace_selector(tr)
+                else:
+                    def trace_selectorx(tr):
+                        return tr.deltat >= min_deltat_allow
+
+                kwargs.update(
+                    tmin=tmin, tmax=tmax, tpad=tpad,
+                    want_incomplete=True,
+                    degap=degap,
+                    maxgap=gap_lap_tolerance,
+                    maxlap=gap_lap_tolerance,
+                    keep_current_files_open=True,
+                    trace_selector=trace_selectorx,
+                    snap=(math.floor, math.ceil),
+                    include_last=True)
+
+                if job is None:
+                    chopper = self.pile.chopper(accessor_id=id(self), **kwargs)
+                else:
+                    # hand back results station by station; components to be
+                    # rotated always end up in the same batch
+                    chopper = self.pile.chopper_grouped(
+                        gather=lambda tr: tr.nslc_id[:3],
+                        accessor_id=(id(self), 'background'), **kwargs)
+
+                # only hold the lock while raw traces are read from the pile,
+                # processing is done without it
+                for traces in iter_locked(chopper, self.pile_lock):
+                    if job is not None and job.cancelled:
+                        return
+
+                    if demean:
+                        for tr in traces:
+                            if (tr.meta and tr.meta.get('tabu', False)):
+                                continue
+                            y = tr.get_ydata()
+                            tr.set_ydata(y - num.mean(y))
+
+                    if job is None:
+                        traces = self.pre_process_hooks(traces)
 
-                        kwargs = dict(group_selector=group_selector)
-                    else:
-                        kwargs = {}
+                    processed_traces = []
+                    for trace in traces:
 
-                    if trace_selector is not None:
-                        def trace_selectorx(tr):
-                            return tr.deltat >= min_deltat_allow \
-                                and trace_selector(tr)
-                    else:
-                        def trace_selectorx(tr):
-                            return tr.deltat >= min_deltat_allow
-
-                    for traces in self.pile.chopper(
-                            tmin=tmin, tmax=tmax, tpad=tpad,
-                            want_incomplete=True,
-                            degap=degap,
-                            maxgap=gap_lap_tolerance,
-                            maxlap=gap_lap_tolerance,
-                            keep_current_files_open=True,
-                            trace_selector=trace_selectorx,
-                            accessor_id=id(self),
-                            snap=(math.floor, math.ceil),
-                            include_last=True, **kwargs):
-
-                        if demean:
-                            for tr in traces:
-                                if (tr.meta and tr.meta.get('tabu', False)):
-                                    continue
-                                y = tr.get_ydata()
-                                tr.set_ydata(y - num.mean(y))
+                        if not (trace.meta
+                                and trace.meta.get('tabu', False)):
 
-                        traces = self.pre_process_hooks(traces)
+                            if fft_filtering:
+                                but = pyrocko.response.ButterworthResponse
+                                multres = pyrocko.response.MultiplyResponse
+                                if lowpass is not None \
+                                        or highpass is not None:
 
-                        for trace in traces:
+                                    it = num.arange(
+                                        trace.data_len(), dtype=float)
+                                    detr_data, m, b = detrend(
+                                        it, trace.get_ydata())
 
-                            if not (trace.meta
-                                    and trace.meta.get('tabu', False)):
+                                    trace.set_ydata(detr_data)
 
-                                if fft_filtering:
-                                    but = pyrocko.response.ButterworthResponse
-                                    multres = pyrocko.response.MultiplyResponse
-                                    if self.lowpass is not None \
-                                            or self.highpass is not None:
+                                    freqs, fdata = trace.spectrum(
+                                        pad_to_pow2=True, tfade=None)
 
-                                        it = num.arange(
-                                            trace.data_len(), dtype=float)
-                                        detr_data, m, b = detrend(
-                                            it, trace.get_ydata())
+                                    nfreqs = fdata.size
 
-                                        trace.set_ydata(detr_data)
+                                    key = (trace.deltat, nfreqs)
 
-                                        freqs, fdata = trace.spectrum(
-                                            pad_to_pow2=True, tfade=None)
+                                    if key not in self.tf_cache:
+                                        resps = []
+                                        if lowpass is not None:
+                                            resps.append(but(
+                                                order=4,
+                                                corner=lowpass,
+                                                type='low'))
 
-                                        nfreqs = fdata.size
+                                        if highpass is not None:
+                                            resps.append(but(
+                                                order=4,
+                                                corner=highpass,
+                                                type='high'))
 
-                                        key = (trace.deltat, nfreqs)
+                                        resp = multres(resps)
+                                        self.tf_cache[key] = \
+                                            resp.evaluate(freqs)
 
-                                        if key not in self.tf_cache:
-                                            resps = []
-                                            if self.lowpass is not None:
-                                                resps.append(but(
-                                                    order=4,
-                                                    corner=self.lowpass,
-                                                    type='low'))
+                                    filtered_data = num.fft.irfft(
+                                        fdata*self.tf_cache[key]
+                                        )[:trace.data_len()]
 
-                                            if self.highpass is not None:
-                                                resps.append(but(
-                                                    order=4,
-                                                    corner=self.highpass,
-                                                    type='high'))
+                                    retrended_data = retrend(
+                                        it, filtered_data, m, b)
 
-                                            resp = multres(resps)
-                                            self.tf_cache[key] = \
-                                                resp.evaluate(freqs)
+                                    trace.set_ydata(retrended_data)
 
-                                        filtered_data = num.fft.irfft(
-                                            fdata*self.tf_cache[key]
-                                            )[:trace.data_len()]
+                            else:
 
-                                        retrended_data = retrend(
-                                            it, filtered_data, m, b)
+                                if ads and lowpass is not None:
+                                    while trace.deltat \
+                                            < min_deltat_wo_decimate:
 
-                                        trace.set_ydata(retrended_data)
+                                        trace.downsample(2, demean=False)
 
-                                else:
+                                fmax = 0.5/trace.deltat
+                                if not lphp and (
+                                        lowpass is not None
+                                        and highpass is not None
+                                        and lowpass < fmax
+                                        and highpass < fmax
+                                        and highpass < lowpass):
 
-                                    if ads and self.lowpass is not None:
-                                        while trace.deltat \
-                                                < min_deltat_wo_decimate:
-
-                                            trace.downsample(2, demean=False)
-
-                                    fmax = 0.5/trace.deltat
-                                    if not lphp and (
-                                            self.lowpass is not None
-                                            and self.highpass is not None
-                                            and self.lowpass < fmax
-                                            and self.highpass < fmax
-                                            and self.highpass < self.lowpass):
-
-                                        trace.bandpass(
-                                            2, self.highpass, self.lowpass)
-                                    else:
-                                        if self.lowpass is not None:
-                                            if self.lowpass < 0.5/trace.deltat:
-                                                trace.lowpass(
-                                                    4, self.lowpass,
+                                    trace.bandpass(
+                                        2, highpass, lowpass)
+                                else:
+                                    if lowpass is not None:
+                                        if lowpass < 0.5/trace.deltat:
+                                            trace.lowpass(
+                                                4, lowpass,
+                                                demean=False)
+
+                                    if highpass is not None:
+                                        if lowpass is None \
+                                                or highpass \
+                                                < lowpass:
+
+                                            if highpass < \
+                                                    0.5/trace.deltat:
+                                                trace.highpass(
+                                                    4, highpass,
                                                     demean=False)
 
-                                        if self.highpass is not None:
-                                            if self.lowpass is None \
-                                                    or self.highpass \
-                                                    < self.lowpass:
-
-                                                if self.highpass < \
-                                                        0.5/trace.deltat:
-                                                    trace.highpass(
-                                                        4, self.highpass,
-                                                        demean=False)
-
-                            processed_traces.append(trace)
-
-                if self.rotate != 0.0:
-                    phi = self.rotate/180.*math.pi
-                    cphi = math.cos(phi)
-                    sphi = math.sin(phi)
-                    for a in processed_traces:
-                        for b in processed_traces:
-                            if (a.network == b.network
-                                    and a.station == b.station
-                                    and a.location == b.location
-                                    and ((a.channel.lower().endswith('n')
-                                         and b.channel.lower().endswith('e'))
-                                         or (a.channel.endswith('1')
-                                             and b.channel.endswith('2')))
-                                    and abs(a.deltat-b.deltat) < a.deltat*0.001
-                                    and abs(a.tmin-b.tmin) < a.deltat*0.01 and
-                                    len(a.get_ydata()) == len(b.get_ydata())):
-
-                                aydata = a.get_ydata()*cphi+b.get_ydata()*sphi
-                                bydata = -a.get_ydata()*sphi+b.get_ydata()*cphi
-                                a.set_ydata(aydata)
-                                b.set_ydata(bydata)
+                        processed_traces.append(trace)
+
+                    if rotate != 0.0:
+                        self.rotate_traces(processed_traces, rotate)
+
+                    yield processed_traces
+
+            if (self.cached_vec
+                    and self.cached_vec[0] <= vec[0]
+                    and vec[1] <= self.cached_vec[1]
+                    and vec[2:] == self.cached_vec[2:]
+                    and (background or not (
+                        self.reloaded or self.menuitem_watch.isChecked()))
+                    and self.cached_processed_traces is not None):
+
+                logger.debug('Using cached traces')
+                processed_traces = self.cached_processed_traces
+
+            elif background:
+                processed_traces = self.get_background_processed_traces(
+                    vec, iter_processed)
+
+            else:
+                self.cancel_background_processing()
+                processed_traces = []
+                for traces in iter_processed():
+                    processed_traces.extend(traces)
 
                 processed_traces = self.post_process_hooks(processed_traces)
 
                 self.cached_processed_traces = processed_traces
                 self.cached_vec = vec
 
+            chopped_traces = self.chop_processed_traces(
+                processed_traces, tmin_, tmax_)
+
+            self.timer_cutout.stop()
+            return chopped_traces
+
+        def chop_processed_traces(self, processed_traces, tmin, tmax):
             chopped_traces = []
             for trace in processed_traces:
-                chop_tmin = tmin_ - trace.deltat*4
-                chop_tmax = tmax_ + trace.deltat*4
+                chop_tmin = tmin - trace.deltat*4
+                chop_tmax = tmax + trace.deltat*4
 
                 try:
                     ctrace = trace.chop(
@@ -3732,9 +3962,101 @@ def MakePileViewerMainClass(base):
 
                 chopped_traces.append(ctrace)
 
-            self.timer_cutout.stop()
             return chopped_traces
 
+        def rotate_traces(self, traces, rotate):
+            phi = rotate/180.*math.pi
+            cphi = math.cos(phi)
+            sphi = math.sin(phi)
+            for a in traces:
+                for b in traces:
+                    if (a.network == b.network
+                            and a.station == b.station
+                            and a.location == b.location
+                            and ((a.channel.lower().endswith('n')
+                                 and b.channel.lower().endswith('e'))
+                                 or (a.channel.endswith('1')
+                                     and b.channel.endswith('2')))
+                            and abs(a.deltat-b.deltat) < a.deltat*0.001
+                            and abs(a.tmin-b.tmin) < a.deltat*0.01 and
+                            len(a.get_ydata()) == len(b.get_ydata())):
+
+                        aydata = a.get_ydata()*cphi+b.get_ydata()*sphi
+                        bydata = -a.get_ydata()*sphi+b.get_ydata()*cphi
+                        a.set_ydata(aydata)
+                        b.set_ydata(bydata)
+
+        def get_processing_worker(self):
+            if self.processing_worker is None:
+                self.processing_worker = ProcessingWorker()
+                self.processing_worker.batch_ready.connect(
+                    self.processing_batch_ready)
+                self.processing_worker.job_finished.connect(
+                    self.processing_job_finished)
+                self.processing_worker.start()
+
+            return self.processing_worker
+
+        def get_background_processed_traces(self, vec, iter_processed):
+            '''
+            Get traces prepared so far by the background processing worker.
+
+            A new job is submitted, cancelling the running one, if the state
+            vector is not covered by the current job.
+            '''
+
+            job = self.processing_job
+            if not (job is not None
+                    and job.vec[0] <= vec[0]
+                    and vec[1] <= job.vec[1]
+                    and vec[2:] == job.vec[2:]):
+
+                job = ProcessingJob(vec, iter_processed)
+                self.processing_job = job
+                self.get_processing_worker().submit(job)
+
+            return list(job.traces)
+
+        def processing_batch_ready(self, job, traces):
+            if job is self.processing_job:
+                job.traces.extend(traces)
+                self.update()
+
+        def processing_job_finished(self, job):
+            if job is self.processing_job:
+                self.cached_processed_traces = job.traces
+                self.cached_vec = job.vec
+                self.processing_job = None
+                self.update()
+
+        def cancel_background_processing(self):
+            if self.processing_job is not None:
+                self.processing_job = None
+                self.processing_worker.cancel()
+
+        def prepare_overviews(
+                self, tmin, tmax, deltat_pixel, trace_selector, demean):
+
+            cache = pyrocko.pile.get_overview_cache(os.path.join(
+                pyrocko.config.config().cache_dir, 'overview'))
+
+            def group_selector(gr):
+                return gr.deltatmin is not None and \
+                    gr.deltatmin * 2**cache.level_min <= deltat_pixel
+
+            envelopes = self.pile.overview_chop(
+                tmin, tmax, deltat_pixel, cache,
+                group_selector=group_selector,
+                trace_selector=trace_selector,
+                lock=self.pile_lock)
+
+            if demean:
+                for tr in envelopes:
+                    y = tr.get_ydata()
+                    tr.set_ydata(y - num.mean(y))
+
+            return envelopes
+
         def pre_process_hooks(self, traces):
             for snuffling in self.snufflings:
                 if snuffling._pre_process_hook_enabled:
@@ -4099,6 +4421,11 @@ def MakePileViewerMainClass(base):
             for snuffling in list(self.snufflings):
                 self.remove_snuffling(snuffling)
 
+            if self.processing_worker is not None:
+                self.processing_job = None
+                self.processing_worker.stop()
+                self.processing_worker = None
+
         def set_error_message(self, key, value):
             if value is None:
                 if key in self.error_messages:
@@ -1681,7 +1681,14 @@ class Snuffling(object):
 
         try:
             self._call_in_progress[method] = True
-            method()
+            viewer = self._viewer
+            if viewer is not None and hasattr(viewer, 'pile_lock'):
+                # keep the viewer's background processing off the pile
+                with viewer.pile_lock:
+                    method()
+            else:
+                method()
+
             return 0
 
         except SnufflingError as e:
@@ -14,7 +14,11 @@ import re
 import sys
 import types
 import copy
+import functools
+import os
 import os.path as op
+import pickle
+import hashlib
 from collections import defaultdict
 
 from io import BytesIO
@@ -252,6 +256,7 @@ def expand_stream_args(mode):
         f(..., filename='myfilename', ...) or as f(..., string='mydata', ...).
         '''
 
+        @functools.wraps(f)
         def g(*args, **kwargs):
             stream = kwargs.pop('stream', None)
             filename = kwargs.get('filename', None)
@@ -335,6 +340,31 @@ class TBase(object):
         cls.xmltagname_to_name_multivalued = {}
         cls.xmltagname_to_class = {}
         cls.content_property = None
+        cls.init_table = []
+        cls.direct_init = False
+
+    @classmethod
+    def update_init_table(cls):
+        '''
+        Precompute how properties are set up by :py:meth:`Object.__init__`.
+
+        Entries are tuples ``(name, mode, value)``, where mode is ``0`` for
+        required properties, ``1`` for properties with a default ``value``,
+        which can be used as is and ``2`` for properties for which the default
+        has to be made on each instantiation by ``value.default()``.
+        '''
+
+        table = []
+        for prop in cls.properties:
+            if not prop.optional and not prop.has_default():
+                table.append((prop.name, 0, None))
+            elif type(prop).default is TBase.default and not isinstance(
+                    prop._default, (DefaultMaker, Object)):
+                table.append((prop.name, 1, prop._default))
+            else:
+                table.append((prop.name, 2, prop))
+
+        cls.init_table = table
 
     def __init__(
             self,
@@ -430,6 +460,7 @@ class TBase(object):
 
         cls.properties.remove(prop)
         cls.propnames.remove(name)
+        cls.update_init_table()
 
         return prop
 
@@ -463,6 +494,7 @@ class TBase(object):
         cls.properties.sort(key=lambda x: x.position)
 
         cls.propnames = [p.name for p in cls.properties]
+        cls.update_init_table()
 
         if prop.xmlstyle == 'content':
             cls.content_property = prop
@@ -534,6 +566,14 @@ class TBase(object):
         if self.optional and val is None:
             return val
 
+        if type(val) is self.cls and not self.force_regularize:
+            # Shortcut for the most common case, same outcome as below.
+            self.validate_extra(val)
+            if depth != 0:
+                val = self.validate_children(val, regularize, depth)
+
+            return val
+
         is_derived = isinstance(val, self.cls)
         is_exact = type(val) == self.cls
 
@@ -581,7 +621,8 @@ class TBase(object):
         pass
 
     def validate_children(self, val, regularize, depth):
-        for prop, propval in self.ipropvals(val):
+        for prop in self.properties:
+            propval = getattr(val, prop.name)
             newpropval = prop.validate(propval, regularize, depth-1)
             if regularize and (newpropval is not propval):
                 setattr(val, prop.name, newpropval)
@@ -704,6 +745,27 @@ class TBase(object):
         return cls.props_help_string()
 
 
+def _can_init_directly(cls, T):
+    # Property values may be stored straight into the instance dict on
+    # construction, unless attribute assignment is customized. A class
+    # customizing __setattr__ can allow this by setting guts_direct_init to
+    # True.
+
+    if cls.__setattr__ is not object.__setattr__:
+        owner = next(
+            c for c in cls.__mro__ if '__setattr__' in c.__dict__)
+
+        if owner.__dict__.get('guts_direct_init', False) is not True:
+            return False
+
+    for name in T.propnames:
+        attr = getattr(cls, name, None)
+        if hasattr(attr, '__set__') or hasattr(attr, '__delete__'):
+            return False
+
+    return True
+
+
 class ObjectMetaClass(type):
     def __new__(meta, classname, bases, class_dict):
         cls = type.__new__(meta, classname, bases, class_dict)
@@ -802,6 +864,8 @@ class ObjectMetaClass(type):
             if hasattr(cls, 'xmltagname'):
                 g_xmltagname_to_class[T.xmlns + ' ' + T.xmltagname] = cls
 
+            T.direct_init = _can_init_directly(cls, T)
+
             cls.T = T
             T.instance = T()
 
@@ -903,20 +967,28 @@ class Object(with_metaclass(ObjectMetaClass, object)):
         if not kwargs.get('init_props', True):
             return
 
-        for prop in self.T.properties:
-            k = prop.name
+        T = self.T
+        values = []
+        for k, mode, default in T.init_table:
             if k in kwargs:
-                setattr(self, k, kwargs.pop(k))
+                values.append((k, kwargs.pop(k)))
+            elif mode == 1:
+                values.append((k, default))
+            elif mode == 2:
+                values.append((k, default.default()))
             else:
-                if not prop.optional and not prop.has_default():
-                    raise ArgumentError('Missing argument to %s: %s' % (
-                        self.T.tagname, prop.name))
-                else:
-                    setattr(self, k, prop.default())
+                raise ArgumentError('Missing argument to %s: %s' % (
+                    T.tagname, k))
 
         if kwargs:
             raise ArgumentError('Invalid argument to %s: %s' % (
-                self.T.tagname, ', '.join(list(kwargs.keys()))))
+                T.tagname, ', '.join(list(kwargs.keys()))))
+
+        if T.direct_init:
+            self.__dict__.update(values)
+        else:
+            for k, v in values:
+                setattr(self, k, v)
 
     @classmethod
     def D(cls, *args, **kwargs):
@@ -1721,13 +1793,32 @@ re_compatibility = re.compile(
 )
 
 
+_yaml_str_tag = 'tag:yaml.org,2002:str'
+
+
 def multi_constructor(loader, tag_suffix, node):
     tagname = str(tag_suffix)
 
     tagname = re_compatibility.sub('pf.', tagname)
 
     cls = g_tagname_to_class[tagname]
-    kwargs = dict(iter(loader.construct_pairs(node, deep=True)))
+    if not isinstance(node, yaml.MappingNode):
+        raise yaml.constructor.ConstructorError(
+            None, None,
+            'expected a mapping node, but found %s' % node.id,
+            node.start_mark)
+
+    # construct keys and values in a single pass over the mapping node
+    construct_object = loader.construct_object
+    kwargs = {}
+    for key_node, value_node in node.value:
+        if key_node.tag == _yaml_str_tag:
+            key = key_node.value
+        else:
+            key = construct_object(key_node, deep=True)
+
+        kwargs[key] = construct_object(value_node, deep=True)
+
     o = cls(**kwargs)
     o.validate(regularize=True, depth=1)
     return o
@@ -1856,7 +1947,10 @@ class Constructor(object):
             if self.add_namespace_maps:
                 o.namespace_map = self.get_current_namespace_map()
 
-            if self.stack and not all(x[1] is None for x in self.stack):
+            if self.stack and (
+                    self.stack[-1][1] is not None
+                    or not all(x[1] is None for x in self.stack)):
+
                 self.stack[-1][-2].append((ns_name, o))
             else:
                 self.queue.append(o)
@@ -2285,11 +2379,119 @@ def path_to_str(path):
     return '.'.join(path_element(x) for x in path)
 
 
+CACHE_VERSION = 1
+
+
+def _get_cache_path(filename, kind, cache, options):
+    if cache is True:
+        from pyrocko import config
+        cache_dir = op.join(config.config().cache_dir, 'guts')
+    else:
+        cache_dir = cache
+
+    # loader options (strict, ns_hints, Loader, ...) may change the result
+    key = '%s:%s:%r' % (kind, op.abspath(filename), sorted(options.items()))
+    return op.join(
+        cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+
+def _get_file_stamp(filename):
+    # cached objects are not validated on load, so pickles written by other
+    # versions of Pyrocko, possibly with different class definitions, are
+    # not reused
+    import pyrocko
+    version = getattr(pyrocko, '__version__', None)
+
+    st = os.stat(filename)
+    return (CACHE_VERSION, version, st.st_mtime_ns, st.st_size)
+
+
+def _cache_get(path, stamp):
+    try:
+        with open(path, 'rb') as f:
+            if pickle.load(f) == stamp:
+                return True, pickle.load(f)
+
+    except Exception:
+        pass
+
+    return False, None
+
+
+def _cache_put(path, stamp, obj):
+    try:
+        data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return
+
+    tmp_path = '%s.%i.tmp' % (path, os.getpid())
+    try:
+        if not op.isdir(op.dirname(path)):
+            os.makedirs(op.dirname(path))
+
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(stamp, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.write(data)
+
+        os.replace(tmp_path, path)
+
+    except OSError:
+        if op.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def cached_load_args(kind):
+    '''
+    Decorator adding a file cache to loader functions.
+
+    Wraps a loader function f(..., filename=None, ...) so that it can be
+    called as f(..., filename='myfilename', cache=True, ...). The loaded
+    objects are pickled to a cache file, which is reused as long as
+    modification time and size of the original file and the Pyrocko version
+    are unchanged. Calls with different loader options use separate cache
+    files. With ``cache=True``, the cache files are placed into a
+    subdirectory of Pyrocko's ``cache_dir``; a directory path may be given
+    instead. Files loaded with ``!include`` support enabled are not cached,
+    neither are calls with positional arguments.
+    '''
+
+    def wrap(f):
+
+        @functools.wraps(f)
+        def g(*args, **kwargs):
+            cache = kwargs.pop('cache', False)
+            filename = kwargs.get('filename', None)
+            allow_include = kwargs.get('allow_include', None)
+            if allow_include is None:
+                allow_include = ALLOW_INCLUDE
+
+            if not cache or filename is None or allow_include or args:
+                return f(*args, **kwargs)
+
+            options = dict(
+                (k, v) for (k, v) in kwargs.items()
+                if k not in ('filename', 'allow_include'))
+
+            cache_path = _get_cache_path(filename, kind, cache, options)
+            stamp = _get_file_stamp(filename)
+            found, retval = _cache_get(cache_path, stamp)
+            if not found:
+                retval = f(*args, **kwargs)
+                _cache_put(cache_path, stamp, retval)
+
+            return retval
+
+        return g
+
+    return wrap
+
+
 @expand_stream_args('w')
 def dump(*args, **kwargs):
     return _dump(*args, **kwargs)
 
 
+@cached_load_args('yaml')
 @expand_stream_args('r')
 def load(*args, **kwargs):
     return _load(*args, **kwargs)
@@ -2304,6 +2506,7 @@ def dump_all(*args, **kwargs):
     return _dump_all(*args, **kwargs)
 
 
+@cached_load_args('yaml_all')
 @expand_stream_args('r')
 def load_all(*args, **kwargs):
     return _load_all(*args, **kwargs)
@@ -2319,6 +2522,7 @@ def dump_xml(*args, **kwargs):
     return _dump_xml(*args, **kwargs)
 
 
+@cached_load_args('xml')
 @expand_stream_args('r')
 def load_xml(*args, **kwargs):
     kwargs.pop('filename', None)
@@ -2334,6 +2538,7 @@ def dump_all_xml(*args, **kwargs):
     return _dump_all_xml(*args, **kwargs)
 
 
+@cached_load_args('xml_all')
 @expand_stream_args('r')
 def load_all_xml(*args, **kwargs):
     kwargs.pop('filename', None)
@@ -85,17 +85,100 @@ pyrocko_ms_readtraces(MSTraceGroup **ppmstg, const char *msfile, flag dataflag,
 }
 
 static PyObject *
-mseed_get_traces(PyObject *m, PyObject *args, PyObject *kwds)
+mstg_to_list(struct module_state *st, MSTraceGroup *mstg, flag unpackdata, off_t offset, int last)
 {
-    char *filename;
-    MSTraceGroup *mstg = NULL;
     MSTrace *mst = NULL;
-    int retcode;
     npy_intp array_dims[1] = {0};
     PyObject *array = NULL;
     PyObject *out_traces = NULL;
     PyObject *out_trace = NULL;
     int numpytype;
+
+    /* check that there is data in the traces */
+    if (unpackdata)
+    {
+        mst = mstg->traces;
+        while (mst)
+        {
+            if (mst->datasamples == NULL)
+            {
+                PyErr_SetString(st->error, "Error reading file - datasamples is NULL");
+                return NULL;
+            }
+            mst = mst->next;
+        }
+    }
+
+    out_traces = Py_BuildValue("[]");
+    if (out_traces == NULL)
+        return NULL;
+
+    mst = mstg->traces;
+    while (mst)
+    {
+
+        if (unpackdata)
+        {
+            array_dims[0] = mst->numsamples;
+            switch (mst->sampletype)
+            {
+            case 'i':
+                assert(ms_samplesize('i') == 4);
+                numpytype = NPY_INT32;
+                break;
+            case 'a':
+                assert(ms_samplesize('a') == 1);
+                numpytype = NPY_INT8;
+                break;
+            case 'f':
+                assert(ms_samplesize('f') == 4);
+                numpytype = NPY_FLOAT32;
+                break;
+            case 'd':
+                assert(ms_samplesize('d') == 8);
+                numpytype = NPY_FLOAT64;
+                break;
+            default:
+                PyErr_Format(st->error, "Unknown sampletype %c\n", mst->sampletype);
+                Py_XDECREF(out_traces);
+                return NULL;
+            }
+            array = PyArray_SimpleNew(1, array_dims, numpytype);
+            memcpy(PyArray_DATA((PyArrayObject *)array), mst->datasamples, mst->numsamples * ms_samplesize(mst->sampletype));
+        }
+        else
+        {
+            Py_INCREF(Py_None);
+            array = Py_None;
+        }
+
+        /* convert data to python tuple */
+        out_trace = Py_BuildValue("(c,s,s,s,s,L,L,d,N,L,O)",
+                                  mst->dataquality, mst->network, mst->station, mst->location, mst->channel,
+                                  mst->starttime, mst->endtime, mst->samprate, array,
+                                  (long long)offset, last ? Py_True : Py_False);
+
+        if (out_trace == NULL)
+        {
+            Py_XDECREF(out_traces);
+            return NULL;
+        }
+
+        PyList_Append(out_traces, out_trace);
+        Py_XDECREF(out_trace);
+        mst = mst->next;
+    }
+
+    return out_traces;
+}
+
+static PyObject *
+mseed_get_traces(PyObject *m, PyObject *args, PyObject *kwds)
+{
+    char *filename;
+    MSTraceGroup *mstg = NULL;
+    int retcode;
+    PyObject *out_traces = NULL;
     PyObject *unpackdata = NULL;
 
     off_t offset = 0;
@@ -157,89 +240,205 @@ mseed_get_traces(PyObject *m, PyObject *args, PyObject *kwds)
         return NULL;
     }
 
-    /* check that there is data in the traces */
-    if (unpackdata == Py_True)
+    out_traces = mstg_to_list(st, mstg, (unpackdata == Py_True), offset, (retcode == MS_ENDOFFILE));
+    mst_freegroup(&mstg);
+    return out_traces;
+}
+
+static int
+pyrocko_ms_parsetraces(MSTraceGroup **ppmstg, char *buffer, Py_ssize_t buflen, int reclen, flag dataflag, Py_ssize_t *offset)
+{
+    MSRecord *msr = NULL;
+    int retcode = MS_NOERROR;
+    Py_ssize_t remaining;
+
+    if (!ppmstg)
+        return MS_GENERROR;
+
+    if (!*ppmstg)
     {
-        mst = mstg->traces;
-        while (mst)
+        *ppmstg = mst_initgroup(*ppmstg);
+
+        if (!*ppmstg)
         {
-            if (mst->datasamples == NULL)
-            {
-                PyErr_SetString(st->error, "Error reading file - datasamples is NULL");
-                mst_freegroup(&mstg);
-                return NULL;
-            }
-            mst = mst->next;
+            return MS_GENERROR;
         }
     }
 
-    out_traces = Py_BuildValue("[]");
-    if (out_traces == NULL)
+    /* Loop over the records in the buffer, the input data is not modified */
+    while (*offset < buflen)
+    {
+        remaining = buflen - *offset;
+        if (remaining > MAXRECLEN)
+            remaining = MAXRECLEN;
+
+        if (reclen > 0 && remaining < reclen)
+        {
+            retcode = reclen - (int)remaining;
+            break;
+        }
+
+        retcode = msr_parse(buffer + *offset, (int)remaining, &msr, reclen, dataflag, 0);
+
+        if (retcode != MS_NOERROR)
+            break;
+
+        mst_addmsrtogroup(*ppmstg, msr, 0, -1., -1.);
+        *offset += msr->reclen;
+    }
+
+    msr_free(&msr);
+
+    /* Incomplete record at end of buffer: leave it unconsumed */
+    if (retcode > 0)
+        retcode = MS_NOERROR;
+
+    return retcode;
+}
+
+static PyObject *
+mseed_get_traces_bytes(PyObject *m, PyObject *args, PyObject *kwds)
+{
+    Py_buffer buffer;
+    MSTraceGroup *mstg = NULL;
+    int retcode;
+    int record_length = 0;
+    Py_ssize_t offset = 0;
+    PyObject *out_traces = NULL;
+    PyObject *unpackdata = NULL;
+
+    struct module_state *st = GETSTATE(m);
+    (void)m;
+
+    static char *kwlist[] = {"data", "dataflag", "record_length", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "y*O|i", kwlist, &buffer, &unpackdata, &record_length))
+        return NULL;
+
+    if (!PyBool_Check(unpackdata))
     {
-        mst_freegroup(&mstg);
+        PyErr_SetString(st->error, "dataflag argument must be a boolean");
+        PyBuffer_Release(&buffer);
         return NULL;
     }
 
-    mst = mstg->traces;
-    while (mst)
+    if (record_length < 0)
+    {
+        PyErr_SetString(st->error, "record_length must be positive");
+        PyBuffer_Release(&buffer);
+        return NULL;
+    }
+
+    /* parse records directly from the buffer, without copying it */
+    Py_BEGIN_ALLOW_THREADS
+        retcode = pyrocko_ms_parsetraces(&mstg, (char *)buffer.buf, buffer.len, record_length, (unpackdata == Py_True), &offset);
+    Py_END_ALLOW_THREADS
+
+    if (retcode < 0)
+    {
+        PyErr_Format(st->error, "Cannot parse record at offset %lld: %s", (long long)offset, ms_errorstr(retcode));
+        if (mstg != NULL)
+            mst_freegroup(&mstg);
+        PyBuffer_Release(&buffer);
+        return NULL;
+    }
+
+    if (mstg == NULL)
+    {
+        PyErr_SetString(st->error, "Error parsing records");
+        PyBuffer_Release(&buffer);
+        return NULL;
+    }
+
+    out_traces = mstg_to_list(st, mstg, (unpackdata == Py_True), (off_t)offset, (offset == buffer.len));
+    mst_freegroup(&mstg);
+    PyBuffer_Release(&buffer);
+    return out_traces;
+}
+
+static PyObject *
+mseed_get_records(PyObject *m, PyObject *args, PyObject *kwds)
+{
+    Py_buffer buffer;
+    MSRecord *msr = NULL;
+    int retcode = MS_NOERROR;
+    int record_length = 0;
+    Py_ssize_t offset = 0;
+    Py_ssize_t remaining;
+    PyObject *out_records = NULL;
+    PyObject *out_record = NULL;
+
+    struct module_state *st = GETSTATE(m);
+    (void)m;
+
+    static char *kwlist[] = {"data", "record_length", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "y*|i", kwlist, &buffer, &record_length))
+        return NULL;
+
+    if (record_length < 0)
+    {
+        PyErr_SetString(st->error, "record_length must be positive");
+        PyBuffer_Release(&buffer);
+        return NULL;
+    }
+
+    out_records = Py_BuildValue("[]");
+    if (out_records == NULL)
+    {
+        PyBuffer_Release(&buffer);
+        return NULL;
+    }
+
+    /* parse record headers only, data is not unpacked */
+    while (offset < buffer.len)
     {
+        remaining = buffer.len - offset;
+        if (remaining > MAXRECLEN)
+            remaining = MAXRECLEN;
+
+        if (record_length > 0 && remaining < record_length)
+            break;
+
+        retcode = msr_parse((char *)buffer.buf + offset, (int)remaining, &msr, record_length, 0, 0);
 
-        if (unpackdata == Py_True)
+        if (retcode > 0)
         {
-            array_dims[0] = mst->numsamples;
-            switch (mst->sampletype)
-            {
-            case 'i':
-                assert(ms_samplesize('i') == 4);
-                numpytype = NPY_INT32;
-                break;
-            case 'a':
-                assert(ms_samplesize('a') == 1);
-                numpytype = NPY_INT8;
-                break;
-            case 'f':
-                assert(ms_samplesize('f') == 4);
-                numpytype = NPY_FLOAT32;
-                break;
-            case 'd':
-                assert(ms_samplesize('d') == 8);
-                numpytype = NPY_FLOAT64;
-                break;
-            default:
-                PyErr_Format(st->error, "Unknown sampletype %c\n", mst->sampletype);
-                Py_XDECREF(out_traces);
-                mst_freegroup(&mstg);
-                return NULL;
-            }
-            array = PyArray_SimpleNew(1, array_dims, numpytype);
-            memcpy(PyArray_DATA((PyArrayObject *)array), mst->datasamples, mst->numsamples * ms_samplesize(mst->sampletype));
+            retcode = MS_NOERROR;
+            break;
         }
-        else
+
+        if (retcode != MS_NOERROR)
         {
-            Py_INCREF(Py_None);
-            array = Py_None;
+            PyErr_Format(st->error, "Cannot parse record at offset %lld: %s", (long long)offset, ms_errorstr(retcode));
+            Py_DECREF(out_records);
+            msr_free(&msr);
+            PyBuffer_Release(&buffer);
+            return NULL;
         }
 
-        /* convert data to python tuple */
-        out_trace = Py_BuildValue("(c,s,s,s,s,L,L,d,N,L,O)",
-                                  mst->dataquality, mst->network, mst->station, mst->location, mst->channel,
-                                  mst->starttime, mst->endtime, mst->samprate, array,
-                                  (long long)offset, (retcode == MS_ENDOFFILE) ? Py_True : Py_False);
+        out_record = Py_BuildValue("(s,s,s,s,L,i,L,L,d,L)",
+                                   msr->network, msr->station, msr->location, msr->channel,
+                                   (long long)offset, msr->reclen,
+                                   (long long)msr->starttime, (long long)msr_endtime(msr),
+                                   msr_samprate(msr), (long long)msr->samplecnt);
 
-        if (out_trace == NULL)
+        if (out_record == NULL)
         {
-            Py_XDECREF(out_traces);
-            mst_freegroup(&mstg);
+            Py_DECREF(out_records);
+            msr_free(&msr);
+            PyBuffer_Release(&buffer);
             return NULL;
         }
 
-        PyList_Append(out_traces, out_trace);
-        Py_XDECREF(out_trace);
-        mst = mst->next;
+        PyList_Append(out_records, out_record);
+        Py_DECREF(out_record);
+        offset += msr->reclen;
     }
 
-    mst_freegroup(&mstg);
-    return out_traces;
+    msr_free(&msr);
+    PyBuffer_Release(&buffer);
+    return out_records;
 }
 
 static int tuple2mst(PyObject *in_trace, MSTrace *mst, int *msdetype, int steim)
@@ -538,6 +737,26 @@ static PyMethodDef mseed_ext_methods[] = {
                "in libmseed. If dataflag is True, `data` is a numpy array containing the\n"
                "data. If dataflag is False, the data is not unpacked and `data` is None.\n")},
 
+    {"get_traces_bytes", (PyCFunction)(void(*)(void))mseed_get_traces_bytes, METH_VARARGS | METH_KEYWORDS,
+     PyDoc_STR("get_traces_bytes(data, dataflag, record_length=0)\n"
+               "Get all traces stored in mseed records held in a memory buffer.\n\n"
+               "`data` may be any object supporting the buffer protocol (e.g.\n"
+               "bytes, bytearray, memoryview or mmap). The records are parsed in\n"
+               "place, without copying the buffer. If record_length is 0, the\n"
+               "record length is detected automatically.\n\n"
+               "Returns a list of tuples with the same layout as get_traces. The\n"
+               "offset element gives the number of bytes consumed. An incomplete\n"
+               "record at the end of the buffer is not consumed.\n")},
+
+    {"get_records", (PyCFunction)(void(*)(void))mseed_get_records, METH_VARARGS | METH_KEYWORDS,
+     PyDoc_STR("get_records(data, record_length=0)\n"
+               "Get header information of all mseed records in a memory buffer.\n\n"
+               "Only the record headers are parsed. Returns a list of tuples, one\n"
+               "for each record:\n\n"
+               "  (network, station, location, channel, offset, record_length,\n"
+               "   starttime, endtime, samprate, nsamples)\n\n"
+               "An incomplete record at the end of the buffer is ignored.\n")},
+
     {"store_traces", (PyCFunction)(void(*)(void))mseed_store_traces, METH_VARARGS | METH_KEYWORDS,
      PyDoc_STR("store_traces(traces, filename, record_length=4096)\n")},
 
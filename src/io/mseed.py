@@ -24,6 +24,34 @@ class CodeTooLong(FileSaveError):
     pass
 
 
+def from_tuple(tr_tuple):
+    '''
+    Convert trace tuple as returned by :py:mod:`pyrocko.mseed_ext` to trace.
+
+    Returns ``None`` for traces with a sampling rate of zero.
+    '''
+
+    from pyrocko import mseed_ext
+
+    network, station, location, channel = tr_tuple[1:5]
+    tmin = float(tr_tuple[5])/float(mseed_ext.HPTMODULUS)
+    tmax = float(tr_tuple[6])/float(mseed_ext.HPTMODULUS)
+    try:
+        deltat = reuse(1.0/float(tr_tuple[7]))
+    except ZeroDivisionError:
+        return None
+
+    return trace.Trace(
+        network.strip(),
+        station.strip(),
+        location.strip(),
+        channel.strip(),
+        tmin,
+        tmax,
+        deltat,
+        tr_tuple[8])
+
+
 def iload(filename, load_data=True, offset=0, segment_size=0, nsegments=0):
     from pyrocko import mseed_ext
 
@@ -38,27 +66,11 @@ def iload(filename, load_data=True, offset=0, segment_size=0, nsegments=0):
                 break
 
             for tr_tuple in tr_tuples:
-                network, station, location, channel = tr_tuple[1:5]
-                tmin = float(tr_tuple[5])/float(mseed_ext.HPTMODULUS)
-                tmax = float(tr_tuple[6])/float(mseed_ext.HPTMODULUS)
-                try:
-                    deltat = reuse(1.0/float(tr_tuple[7]))
-                except ZeroDivisionError:
+                tr = from_tuple(tr_tuple)
+                if tr is None:
                     have_zero_rate_traces = True
                     continue
 
-                ydata = tr_tuple[8]
-
-                tr = trace.Trace(
-                    network.strip(),
-                    station.strip(),
-                    location.strip(),
-                    channel.strip(),
-                    tmin,
-                    tmax,
-                    deltat,
-                    ydata)
-
                 tr.meta = {
                     'offset_start': offset,
                     'offset_end': tr_tuple[9],
@@ -83,6 +95,59 @@ def iload(filename, load_data=True, offset=0, segment_size=0, nsegments=0):
             '(maybe LOG traces)' % filename)
 
 
+def iload_bytes(data, load_data=True, record_length=0):
+    '''
+    Read traces from miniSEED records held in memory.
+
+    :param data:
+        Buffer containing the miniSEED records, e.g. :py:class:`bytes`,
+        :py:class:`bytearray`, :py:class:`memoryview` or :py:class:`mmap.mmap`.
+        The records are decoded in place, the buffer is not copied.
+    :param load_data:
+        If ``False``, only header information is read.
+    :param record_length:
+        Record length in bytes or ``0`` for autodetection. Must be given if
+        the records lack a blockette 1000.
+
+    An incomplete record at the end of the buffer is ignored. The number of
+    bytes decoded is available as ``tr.meta['offset_end']``.
+    '''
+
+    from pyrocko import mseed_ext
+
+    try:
+        tr_tuples = mseed_ext.get_traces_bytes(
+            data, load_data, record_length)
+
+    except mseed_ext.MSeedError as e:
+        raise FileLoadError(str(e) + ' (in-memory data)')
+
+    have_zero_rate_traces = False
+    for tr_tuple in tr_tuples:
+        tr = from_tuple(tr_tuple)
+        if tr is None:
+            have_zero_rate_traces = True
+            continue
+
+        tr.meta = {
+            'offset_start': 0,
+            'offset_end': tr_tuple[9],
+            'last': tr_tuple[10],
+            'segment_size': 0
+        }
+
+        yield tr
+
+    if tr_tuples and not tr_tuples[-1][10]:
+        logger.warning(
+            'Ignoring incomplete record at end of in-memory data.')
+
+    if have_zero_rate_traces:
+        logger.warning(
+            'Ignoring traces with sampling rate of zero in in-memory data '
+            '(maybe LOG traces)')
+
+
 def as_tuple(tr, dataquality='D'):
     from pyrocko import mseed_ext
     itmin = int(round(tr.tmin*mseed_ext.HPTMODULUS))
@@ -141,6 +206,12 @@ tcs = {}
 
 
 def get_bytes(traces, dataquality='D', record_length=4096, steim=1):
+    '''
+    Encode traces to miniSEED records in memory.
+
+    The result can be decoded again with :py:func:`iload_bytes`.
+    '''
+
     from pyrocko import mseed_ext
 
     assert record_length in VALID_RECORD_LENGTHS
@@ -11,6 +11,7 @@ import datetime
 import calendar
 import math
 import copy
+import re
 
 import numpy as num
 
@@ -18,6 +19,7 @@ from pyrocko.guts import (StringChoice, StringPattern, UnicodePattern, String,
                           Unicode, Int, Float, List, Object, Timestamp,
                           ValidationError, TBase, re_tz, Any, Tuple)
 from pyrocko.guts import load_xml  # noqa
+from pyrocko.guts import Constructor, expand_stream_args
 from pyrocko.util import hpfloat, time_to_str, get_time_float
 
 import pyrocko.model
@@ -2322,6 +2324,302 @@ class FDSNStationXML(Object):
                 + '\n  '.join(errors))
 
 
+class _NodeConstructor(Constructor):
+    '''
+    XML constructor emitting network, station and channel epochs one by one.
+
+    Child nodes are detached from their parents, so that only the nodes
+    currently open are held in memory.
+    '''
+
+    def __init__(self, parser, responses, **kwargs):
+        Constructor.__init__(self, **kwargs)
+        self.parser = parser
+        self.responses = responses
+        self.node_codes = []
+        self.node_offsets = []
+        self.skip_depth = 0
+        self.response_pending = False
+        self.nodes = []
+
+    def start_element(self, ns_name, attrs):
+        if self.skip_depth:
+            self.skip_depth += 1
+            return
+
+        offset = self.parser.CurrentByteIndex
+        Constructor.start_element(self, ns_name, attrs)
+        cls = self.stack[-1][1]
+
+        if cls is Response and not self.responses \
+                and len(self.stack) > 1 and self.stack[-2][1] is Channel:
+
+            # Skip response subtree, no objects are created for it.
+            self.stack.pop()
+            self.skip_depth = 1
+            self.response_pending = True
+            self.parser.CharacterDataHandler = None
+
+        elif cls in (Network, Station, Channel):
+            if cls is Channel:
+                self.response_pending = False
+
+            self.node_codes.append(attrs.get('code', ''))
+            self.node_offsets.append(offset)
+
+    def end_element(self, ns_name):
+        if self.skip_depth:
+            self.skip_depth -= 1
+            if not self.skip_depth:
+                self.parser.CharacterDataHandler = self.characters
+
+            return
+
+        cls = self.stack[-1][1]
+        Constructor.end_element(self, ns_name)
+
+        if cls in (Network, Station, Channel):
+            if self.stack and not all(x[1] is None for x in self.stack):
+                _, node = self.stack[-1][-2].pop()
+            else:
+                node = self.queue.pop()
+
+            self.node_codes.pop()
+            offset = self.node_offsets.pop()
+            if cls is Channel:
+                codes = tuple(self.node_codes) + (
+                    node.location_code.strip(), node.code)
+            else:
+                codes = tuple(self.node_codes) + (node.code,)
+
+            self.nodes.append((
+                codes, node, offset,
+                cls is Channel and self.response_pending))
+
+    def get_nodes(self):
+        nodes = self.nodes
+        self.nodes = []
+        return nodes
+
+
+@expand_stream_args('r')
+def iload_xml_nodes(stream, responses=True, bufsize=100000, filename=None):
+    '''
+    Iteratively read network, station and channel epochs from StationXML.
+
+    In contrast to :py:func:`load_xml`, the document is never held in memory
+    as a whole. Nodes are yielded as soon as their closing tag has been
+    parsed, i.e. the channels of a station come before the station itself and
+    the stations of a network before the network. The child lists of yielded
+    stations and networks are empty.
+
+    :param responses:
+        If ``False``, ``<Response>`` elements are skipped without being
+        parsed. Use :py:func:`load_channel_xml` to load a channel including its
+        response later on.
+    :type responses:
+        bool
+
+    :returns:
+        Generator yielding tuples ``(codes, node, offset, response_pending)``,
+        where ``codes`` are the codes of the node and its parents, ``node`` is
+        a :py:class:`Network`, :py:class:`Station` or :py:class:`Channel`
+        object, ``offset`` is the byte offset of its start tag in the file and
+        ``response_pending`` is ``True`` for channels with a skipped response.
+    '''
+
+    from xml.parsers.expat import ParserCreate
+
+    parser = ParserCreate('UTF-8', namespace_separator=' ')
+    parser.buffer_text = True
+
+    handler = _NodeConstructor(parser, responses)
+
+    parser.StartElementHandler = handler.start_element
+    parser.EndElementHandler = handler.end_element
+    parser.CharacterDataHandler = handler.characters
+    parser.StartNamespaceDeclHandler = handler.start_namespace
+    parser.EndNamespaceDeclHandler = handler.end_namespace
+
+    while True:
+        data = stream.read(bufsize)
+        parser.Parse(data, bool(not data))
+        for node in handler.get_nodes():
+            yield node
+
+        handler.get_queued_elements()
+
+        if not data:
+            break
+
+
+def _read_start_tag(f, offset):
+    # Attributes of the start tag at given byte offset, including namespace
+    # declarations.
+
+    from xml.parsers.expat import ParserCreate, ExpatError
+
+    found = []
+    parser = ParserCreate('UTF-8')
+    parser.StartElementHandler = lambda name, attrs: found.append(attrs)
+
+    f.seek(offset)
+    while not found:
+        data = f.read(4096)
+        if not data:
+            break
+
+        try:
+            parser.Parse(data, False)
+        except ExpatError:
+            break
+
+    if not found:
+        raise StationXMLError(
+            'Cannot read XML start tag at byte offset %i.' % offset)
+
+    return found[0]
+
+
+def _rfind_start_tag(f, offset, tagname, bufsize=100000):
+    # Byte offset of closest start tag with given name preceding offset.
+
+    pattern = re.compile(br'<(?:[\w.-]+:)?' + tagname + br'[\s>/]')
+    pos = offset
+    while pos > 0:
+        start = max(0, pos - bufsize)
+        f.seek(start)
+        data = f.read(min(offset, pos + 128) - start)
+        matches = [
+            m.start() for m in pattern.finditer(data)
+            if start + m.start() < pos]
+
+        if matches:
+            return start + matches[-1]
+
+        pos = start
+
+    raise StationXMLError(
+        'No enclosing %s element found for byte offset %i.' % (
+            tagname.decode('ascii'), offset))
+
+
+def _read_element(f, offset, tagname, bufsize=100000):
+    # Raw data of the element starting at given byte offset.
+
+    pattern = re.compile(br'</(?:[\w.-]+:)?' + tagname + br'\s*>')
+    data = bytearray()
+    f.seek(offset)
+    while True:
+        chunk = f.read(bufsize)
+        if not chunk:
+            raise StationXMLError(
+                'Unterminated %s element at byte offset %i.' % (
+                    tagname.decode('ascii'), offset))
+
+        pos = max(0, len(data) - 128)
+        data.extend(chunk)
+        m = pattern.search(data, pos)
+        if m:
+            return bytes(data[:m.end()])
+
+
+def load_channel_xml(filename, offset):
+    '''
+    Load single channel epoch, including its response, from StationXML file.
+
+    Only the requested ``<Channel>`` element is parsed. Together with
+    :py:func:`iload_xml_nodes`, this allows to defer parsing of responses
+    until they are needed.
+
+    :param filename:
+        Path to the StationXML file.
+    :type filename:
+        str
+    :param offset:
+        Byte offset of the channel's start tag, as reported by
+        :py:func:`iload_xml_nodes`.
+    :type offset:
+        int
+
+    :returns:
+        Tuple ``(codes, channel)`` with ``codes`` being ``(network, station,
+        location, channel)`` and ``channel`` a :py:class:`Channel` object.
+    '''
+
+    from xml.parsers.expat import ParserCreate, ExpatError
+    from xml.sax.saxutils import quoteattr
+
+    with open(filename, 'rb') as f:
+        network_offset = _rfind_start_tag(f, offset, b'Network')
+        station_offset = _rfind_start_tag(f, offset, b'Station')
+        if not network_offset < station_offset < offset:
+            raise StationXMLError(
+                'No channel start tag at byte offset %i.' % offset)
+
+        namespaces = {}
+        codes = []
+        for attrs in [
+                _read_start_tag(f, 0),
+                _read_start_tag(f, network_offset),
+                _read_start_tag(f, station_offset)]:
+
+            namespaces.update(
+                (k, v) for (k, v) in attrs.items() if k.startswith('xmlns'))
+            codes.append(attrs.get('code', ''))
+
+        data = _read_element(f, offset, b'Channel')
+
+    # Wrap into pseudo root element to supply the namespace declarations.
+    data = b''.join([
+        b'<root',
+        b''.join(
+            (' %s=%s' % (k, quoteattr(v))).encode('utf-8')
+            for (k, v) in namespaces.items()),
+        b'>', data, b'</root>'])
+
+    parser = ParserCreate('UTF-8', namespace_separator=' ')
+    handler = Constructor(ns_hints=[guts_xmlns])
+    depth = [0]
+
+    def start_element(ns_name, attrs):
+        if depth[0] == 0:
+            handler.stack.append((ns_name, Station, {}, [], []))
+        else:
+            handler.start_element(ns_name, attrs)
+
+        depth[0] += 1
+
+    def end_element(ns_name):
+        depth[0] -= 1
+        if depth[0] != 0:
+            handler.end_element(ns_name)
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    parser.CharacterDataHandler = handler.characters
+
+    try:
+        parser.Parse(data, True)
+    except ExpatError as e:
+        raise StationXMLError(
+            'Cannot parse channel at byte offset %i in file %s: %s' % (
+                offset, filename, e))
+
+    channels = [
+        obj for (_, obj) in handler.stack[0][3] if isinstance(obj, Channel)]
+
+    if len(channels) != 1:
+        raise StationXMLError(
+            'No channel found at byte offset %i in file %s.' % (
+                offset, filename))
+
+    channel = channels[0]
+    return (
+        codes[1], codes[2], channel.location_code.strip(), channel.code), \
+        channel
+
+
 def load_channel_table(stream):
 
     networks = {}
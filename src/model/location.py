@@ -62,6 +62,9 @@ class Location(Object):
         default=0.0,
         help='depth, below surface [m]')
 
+    # __setattr__ only resets the cache, which is set up after construction
+    guts_direct_init = True
+
     def __init__(self, **kwargs):
         Object.__init__(self, **kwargs)
         self._latlon = None
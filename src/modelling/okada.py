@@ -3,6 +3,9 @@
 # The Pyrocko Developers, 21st Century
 # ---|P------/S----------~Lg----------
 
+import os
+import copy
+import hashlib
 import numpy as num
 import logging
 
@@ -361,7 +364,7 @@ def make_okada_coefficient_matrix(
         source_patches_list,
         pure_shear=False,
         rotate_sdn=True,
-        nthreads=1, variant='normal'):
+        nthreads=1, variant='normal', cache=None):
 
     '''
     Build coefficient matrix for given fault patches.
@@ -393,6 +396,14 @@ def make_okada_coefficient_matrix(
     :type nthreads:
         optional, int
 
+    :param cache:
+        If ``True``, coefficient matrices are cached on disk, in a
+        subdirectory of the Pyrocko cache directory. A path to a directory may
+        be given to use another location. Cached matrices are identified by
+        patch geometries, elastic parameters and computation options.
+    :type cache:
+        optional, bool or str
+
     :return:
         Coefficient matrix for all source combinations.
     :rtype:
@@ -400,26 +411,83 @@ def make_okada_coefficient_matrix(
         ``(len(source_patches_list) * 3, len(source_patches_list) * 3)``
     '''
 
+    source_patches = num.array([
+        src.source_patch() for src in source_patches_list])
+
+    lambda_mean = num.mean([src.lamb for src in source_patches_list])
+    mu_mean = num.mean([src.shearmod for src in source_patches_list])
+
+    if cache:
+        path = _get_coefmat_cache_path(
+            cache, source_patches, lambda_mean, mu_mean, pure_shear,
+            rotate_sdn, variant)
+
+        try:
+            coefmat = num.load(path)
+            logger.debug('Loaded coefficient matrix from cache: %s' % path)
+            return coefmat
+
+        except (OSError, ValueError):
+            pass
+
     if variant == 'slow':
-        return _make_okada_coefficient_matrix_slow(
+        coefmat = _make_okada_coefficient_matrix_slow(
             source_patches_list, pure_shear, rotate_sdn, nthreads)
 
-    source_patches = num.array([
-        src.source_patch() for src in source_patches_list])
-    receiver_coords = source_patches[:, :3].copy()
+    elif variant == 'normal':
+        coefmat = _make_okada_coefficient_block(
+            source_patches, source_patches[:, :3].copy(), lambda_mean,
+            mu_mean, pure_shear, rotate_sdn, nthreads)
 
-    npoints = len(source_patches_list)
+    else:
+        coefmat = _make_okada_coefficient_matrix_single(
+            source_patches, lambda_mean, mu_mean, pure_shear, rotate_sdn,
+            nthreads)
 
-    if pure_shear:
-        n_eq = 2
+    if cache:
+        _put_coefmat_cache(path, coefmat)
+
+    return coefmat
+
+
+def _get_coefmat_cache_path(
+        cache, source_patches, lambda_mean, mu_mean, pure_shear, rotate_sdn,
+        variant):
+
+    if cache is True:
+        from pyrocko import config
+        cache_dir = os.path.join(config.config().cache_dir, 'okada')
     else:
-        n_eq = 3
+        cache_dir = cache
 
-    coefmat = num.zeros((npoints * 3, npoints * 3))
+    h = hashlib.sha1()
+    h.update(num.ascontiguousarray(source_patches, dtype='<f8').tobytes())
+    h.update(num.array(
+        [lambda_mean, mu_mean, pure_shear, rotate_sdn],
+        dtype='<f8').tobytes())
+    h.update(variant.encode('utf-8'))
+
+    return os.path.join(cache_dir, 'coefmat_%s.npy' % h.hexdigest())
+
+
+def _put_coefmat_cache(path, coefmat):
+    tmp_path = '%s.%i.tmp' % (path, os.getpid())
+    try:
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+        with open(tmp_path, 'wb') as f:
+            num.save(f, coefmat)
+
+        os.replace(tmp_path, path)
+
+    except OSError as e:
+        logger.warning('Cannot cache coefficient matrix: %s' % e)
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
 
-    lambda_mean = num.mean([src.lamb for src in source_patches_list])
-    mu_mean = num.mean([src.shearmod for src in source_patches_list])
 
+def _unit_dislocations(pure_shear):
     unit_disl = 1.
     disl_cases = {
         'strikeslip': {
@@ -436,66 +504,110 @@ def make_okada_coefficient_matrix(
             'rake': 0.}
     }
 
-    diag_ind = [0, 4, 8]
-    kron = num.zeros(9)
-    kron[diag_ind] = 1.
-
-    if variant == 'normal':
-        kron = kron[num.newaxis, num.newaxis, :]
+    if pure_shear:
+        n_eq = 2
     else:
-        kron = kron[num.newaxis, :]
+        n_eq = 3
 
-    for idisl, case_type in enumerate([
-            'strikeslip', 'dipslip', 'tensileslip'][:n_eq]):
+    source_disls = []
+    for case_type in ['strikeslip', 'dipslip', 'tensileslip'][:n_eq]:
         case = disl_cases[case_type]
-        source_disl = num.array([
+        source_disls.append(num.array([
             case['slip'] * num.cos(case['rake'] * d2r),
             case['slip'] * num.sin(case['rake'] * d2r),
-            case['opening']])
+            case['opening']]))
+
+    return unit_disl, source_disls
+
+
+def _make_okada_coefficient_block(
+        source_patches, receiver_coords, lambda_mean, mu_mean,
+        pure_shear=False, rotate_sdn=True, nthreads=1):
+
+    '''
+    Build block of the coefficient matrix.
+
+    Rows are given by ``receiver_coords`` (three tractions per receiver),
+    columns by ``source_patches`` (three unit dislocations per source).
+    '''
+
+    nsources = source_patches.shape[0]
+    nreceivers = receiver_coords.shape[0]
+
+    coefmat = num.zeros((nreceivers * 3, nsources * 3))
+
+    diag_ind = [0, 4, 8]
+    kron = num.zeros(9)
+    kron[diag_ind] = 1.
+    kron = kron[num.newaxis, num.newaxis, :]
+
+    unit_disl, source_disls = _unit_dislocations(pure_shear)
+    for idisl, source_disl in enumerate(source_disls):
+        results = okada_ext.okada(
+            source_patches,
+            num.tile(source_disl, nsources).reshape(-1, 3),
+            receiver_coords,
+            lambda_mean,
+            mu_mean,
+            nthreads=nthreads,
+            rotate_sdn=int(rotate_sdn),
+            stack_sources=0)
+
+        eps = 0.5 * (
+            results[:, :, 3:] +
+            results[:, :, (3, 6, 9, 4, 7, 10, 5, 8, 11)])
+
+        dilatation \
+            = eps[:, :, diag_ind].sum(axis=-1)[:, :, num.newaxis]
+
+        stress_sdn = kron*lambda_mean*dilatation + 2.*mu_mean*eps
+        coefmat[:, idisl::3] = stress_sdn[:, :, (2, 5, 8)]\
+            .reshape(-1, nreceivers*3).T
+
+    if pure_shear:
+        coefmat[2::3, :] = 0.
+
+    return -coefmat / unit_disl
+
+
+def _make_okada_coefficient_matrix_single(
+        source_patches, lambda_mean, mu_mean, pure_shear=False,
+        rotate_sdn=True, nthreads=1):
 
-        if variant == 'normal':
+    receiver_coords = source_patches[:, :3].copy()
+
+    npoints = source_patches.shape[0]
+
+    coefmat = num.zeros((npoints * 3, npoints * 3))
+
+    diag_ind = [0, 4, 8]
+    kron = num.zeros(9)
+    kron[diag_ind] = 1.
+    kron = kron[num.newaxis, :]
+
+    unit_disl, source_disls = _unit_dislocations(pure_shear)
+    for idisl, source_disl in enumerate(source_disls):
+        for isrc, source in enumerate(source_patches):
             results = okada_ext.okada(
-                source_patches,
-                num.tile(source_disl, npoints).reshape(-1, 3),
+                source.reshape(1, -1),
+                source_disl.reshape(1, -1),
                 receiver_coords,
                 lambda_mean,
                 mu_mean,
                 nthreads=nthreads,
-                rotate_sdn=int(rotate_sdn),
-                stack_sources=int(variant != 'normal'))
+                rotate_sdn=int(rotate_sdn))
 
             eps = 0.5 * (
-                results[:, :, 3:] +
-                results[:, :, (3, 6, 9, 4, 7, 10, 5, 8, 11)])
+                results[:, 3:] +
+                results[:, (3, 6, 9, 4, 7, 10, 5, 8, 11)])
 
             dilatation \
-                = eps[:, :, diag_ind].sum(axis=-1)[:, :, num.newaxis]
+                = num.sum(eps[:, diag_ind], axis=1)[:, num.newaxis]
+            stress_sdn \
+                = kron * lambda_mean * dilatation+2. * mu_mean * eps
 
-            stress_sdn = kron*lambda_mean*dilatation + 2.*mu_mean*eps
-            coefmat[:, idisl::3] = stress_sdn[:, :, (2, 5, 8)]\
-                .reshape(-1, npoints*3).T
-        else:
-            for isrc, source in enumerate(source_patches):
-                results = okada_ext.okada(
-                    source.reshape(1, -1),
-                    source_disl.reshape(1, -1),
-                    receiver_coords,
-                    lambda_mean,
-                    mu_mean,
-                    nthreads=nthreads,
-                    rotate_sdn=int(rotate_sdn))
-
-                eps = 0.5 * (
-                    results[:, 3:] +
-                    results[:, (3, 6, 9, 4, 7, 10, 5, 8, 11)])
-
-                dilatation \
-                    = num.sum(eps[:, diag_ind], axis=1)[:, num.newaxis]
-                stress_sdn \
-                    = kron * lambda_mean * dilatation+2. * mu_mean * eps
-
-                coefmat[:, isrc*3 + idisl] \
-                    = stress_sdn[:, (2, 5, 8)].ravel()
+            coefmat[:, isrc*3 + idisl] \
+                = stress_sdn[:, (2, 5, 8)].ravel()
 
     if pure_shear:
         coefmat[2::3, :] = 0.
@@ -594,6 +706,343 @@ def _make_okada_coefficient_matrix_slow(
     return coefmat
 
 
+def _component_indices(ipatches):
+    return (ipatches[:, num.newaxis] * 3 + num.arange(3)).ravel()
+
+
+class _PatchCluster(object):
+
+    def __init__(self, ipatches, coords, radii, leaf_size):
+        c = coords[ipatches]
+        self.ipatches = ipatches
+        self.center = num.mean(c, axis=0)
+        self.radius = num.max(
+            num.linalg.norm(c - self.center, axis=1) + radii[ipatches])
+
+        self.diameter = 2.0 * self.radius
+        self.children = []
+
+        if ipatches.size > leaf_size:
+            # bisect along principal axis, works for arbitrarily oriented
+            # fault planes
+            _, _, vh = num.linalg.svd(c - self.center, full_matrices=False)
+            iorder = num.argsort(
+                num.dot(c - self.center, vh[0]), kind='stable')
+            nhalf = ipatches.size // 2
+            self.children = [
+                _PatchCluster(ipatches[iorder[:nhalf]], coords, radii,
+                              leaf_size),
+                _PatchCluster(ipatches[iorder[nhalf:]], coords, radii,
+                              leaf_size)]
+
+    def distance(self, other):
+        return max(
+            0.,
+            num.linalg.norm(self.center - other.center)
+            - self.radius - other.radius)
+
+
+def _aca(get_row, get_col, m, n, eps, maxrank):
+    '''
+    Adaptive cross approximation with partial pivoting.
+
+    Returns factors ``u`` (m, k) and ``v`` (k, n) or ``None`` if the
+    requested accuracy is not reached with rank ``maxrank``.
+    '''
+
+    us = []
+    vs = []
+    norm2 = 0.
+    used_rows = num.zeros(m, dtype=bool)
+    used_cols = num.zeros(n, dtype=bool)
+    irow = 0
+    while True:
+        used_rows[irow] = True
+        r = get_row(irow).copy()
+        for u, v in zip(us, vs):
+            r -= u[irow] * v
+
+        r_abs = num.abs(r)
+        r_abs[used_cols] = -1.
+        jcol = num.argmax(r_abs)
+        if r_abs[jcol] <= 0.:
+            # row already represented (or zero), try another
+            unused = num.nonzero(~used_rows)[0]
+            if unused.size == 0:
+                break
+
+            irow = unused[0]
+            continue
+
+        if len(us) == maxrank:
+            return None
+
+        v = r / r[jcol]
+        u = get_col(jcol).copy()
+        for u_, v_ in zip(us, vs):
+            u -= v_[jcol] * u_
+
+        used_cols[jcol] = True
+
+        unorm2 = num.dot(u, u)
+        vnorm2 = num.dot(v, v)
+        norm2 += unorm2 * vnorm2 + 2.0 * sum(
+            num.dot(u_, u) * num.dot(v_, v) for (u_, v_) in zip(us, vs))
+
+        us.append(u)
+        vs.append(v)
+
+        if unorm2 * vnorm2 <= eps**2 * norm2:
+            break
+
+        u_abs = num.abs(u)
+        u_abs[used_rows] = -1.
+        irow = num.argmax(u_abs)
+        if u_abs[irow] < 0.:
+            break
+
+    if not us:
+        return num.zeros((m, 0)), num.zeros((0, n))
+
+    return num.array(us).T, num.array(vs)
+
+
+class OkadaHMatrix(object):
+    '''
+    Hierarchical matrix representation of the BEM coefficient matrix.
+
+    Drop-in alternative to the dense matrix built by
+    :py:func:`make_okada_coefficient_matrix` for large numbers of patches.
+    The patches are grouped into a tree of clusters by recursive bisection.
+    Matrix blocks coupling well separated clusters are approximated by
+    low-rank factors, computed with adaptive cross approximation (ACA) from a
+    few rows and columns of the block only. The remaining blocks are stored
+    as dense matrices. Memory and computational cost grow approximately with
+    ``N log(N)`` instead of ``N**2``.
+
+    The matrix is used through matrix-vector products
+    (:py:meth:`dot`, :py:meth:`rdot`) e.g. by the iterative solver in
+    :py:func:`invert_fault_dislocations_bem`.
+
+    :param source_patches_list:
+        Source patches, to be used in BEM.
+    :type source_patches_list:
+        list of :py:class:`~pyrocko.modelling.okada.OkadaSource`.
+
+    :param pure_shear:
+        If ``True``, only shear forces are taken into account.
+    :type pure_shear:
+        optional, bool
+
+    :param rotate_sdn:
+        If ``True``, rotate to strike, dip, normal.
+    :type rotate_sdn:
+        optional, bool
+
+    :param nthreads:
+        Number of threads.
+    :type nthreads:
+        optional, int
+
+    :param eps:
+        Relative accuracy of the low-rank blocks.
+    :type eps:
+        optional, float
+
+    :param eta:
+        Admissibility parameter. Two clusters are approximated by a low-rank
+        block if the smaller of their diameters is less than ``eta`` times
+        their distance.
+    :type eta:
+        optional, float
+
+    :param leaf_size:
+        Maximum number of patches in the leaf clusters.
+    :type leaf_size:
+        optional, int
+    '''
+
+    def __init__(
+            self, source_patches_list, pure_shear=False, rotate_sdn=True,
+            nthreads=1, eps=1e-6, eta=2.0, leaf_size=32):
+
+        self.source_patches = num.array([
+            src.source_patch() for src in source_patches_list])
+        self.receiver_coords = self.source_patches[:, :3].copy()
+        self.lambda_mean = num.mean([src.lamb for src in source_patches_list])
+        self.mu_mean = num.mean([src.shearmod for src in source_patches_list])
+        self.pure_shear = pure_shear
+        self.rotate_sdn = rotate_sdn
+        self.nthreads = nthreads
+        self.eps = eps
+        self.eta = eta
+
+        npatches = self.source_patches.shape[0]
+        self.indices = None
+        self.shape = (npatches * 3, npatches * 3)
+
+        al1, al2, aw1, aw2 = self.source_patches[:, 5:9].T
+        radii = num.sqrt(
+            num.maximum(num.abs(al1), num.abs(al2))**2 +
+            num.maximum(num.abs(aw1), num.abs(aw2))**2)
+
+        root = _PatchCluster(
+            num.arange(npatches), self.receiver_coords, radii, leaf_size)
+
+        self.blocks = []
+        self._add_blocks(root, root)
+
+    def _block(self, ireceivers, isources):
+        return _make_okada_coefficient_block(
+            self.source_patches[isources],
+            self.receiver_coords[ireceivers],
+            self.lambda_mean, self.mu_mean,
+            pure_shear=self.pure_shear,
+            rotate_sdn=self.rotate_sdn,
+            nthreads=self.nthreads)
+
+    def _add_blocks(self, a, b):
+        if min(a.diameter, b.diameter) < self.eta * a.distance(b):
+            rows = {}
+            cols = {}
+
+            def get_row(i):
+                ipatch = i // 3
+                if ipatch not in rows:
+                    rows[ipatch] = self._block(
+                        a.ipatches[ipatch:ipatch+1], b.ipatches)
+
+                return rows[ipatch][i % 3]
+
+            def get_col(j):
+                ipatch = j // 3
+                if ipatch not in cols:
+                    cols[ipatch] = self._block(
+                        a.ipatches, b.ipatches[ipatch:ipatch+1])
+
+                return cols[ipatch][:, j % 3]
+
+            m = a.ipatches.size * 3
+            n = b.ipatches.size * 3
+
+            # low-rank factors larger than half of the dense block are not
+            # worth it
+            uv = _aca(get_row, get_col, m, n, self.eps, m*n // (2*(m+n)))
+            if uv is not None:
+                self.blocks.append((
+                    _component_indices(a.ipatches),
+                    _component_indices(b.ipatches),
+                    uv[0], uv[1]))
+
+                return
+
+        if a.children and b.children:
+            for a_child in a.children:
+                for b_child in b.children:
+                    self._add_blocks(a_child, b_child)
+
+            return
+
+        self.blocks.append((
+            _component_indices(a.ipatches),
+            _component_indices(b.ipatches),
+            self._block(a.ipatches, b.ipatches), None))
+
+    @property
+    def nbytes(self):
+        '''
+        Memory used by the blocks [bytes].
+        '''
+        return sum(
+            u.nbytes + (v.nbytes if v is not None else 0)
+            for (_, _, u, v) in self.blocks)
+
+    def restricted(self, indices):
+        '''
+        Get view of the matrix restricted to given rows and columns.
+
+        Equivalent to ``coef_mat[indices, :][:, indices]`` for a dense
+        coefficient matrix.
+        '''
+        other = copy.copy(self)
+        indices = num.asarray(indices, dtype=int)
+        if self.indices is not None:
+            indices = self.indices[indices]
+
+        other.indices = indices
+        other.shape = (indices.size, indices.size)
+        return other
+
+    def _full_shape(self):
+        return (self.source_patches.shape[0] * 3,) * 2
+
+    def _dot(self, x, transpose):
+        nfull = self._full_shape()[0]
+        if self.indices is not None:
+            x_full = num.zeros((nfull,) + x.shape[1:])
+            x_full[self.indices] = x
+            x = x_full
+
+        y = num.zeros((nfull,) + x.shape[1:])
+        for rows, cols, u, v in self.blocks:
+            if transpose:
+                rows, cols = cols, rows
+
+            if v is None:
+                if transpose:
+                    y[rows] += num.dot(u.T, x[cols])
+                else:
+                    y[rows] += num.dot(u, x[cols])
+
+            elif transpose:
+                y[rows] += num.dot(v.T, num.dot(u.T, x[cols]))
+            else:
+                y[rows] += num.dot(u, num.dot(v, x[cols]))
+
+        if self.indices is not None:
+            y = y[self.indices]
+
+        return y
+
+    def dot(self, x):
+        '''
+        Matrix-vector product.
+        '''
+        return self._dot(num.asarray(x, dtype=float), False)
+
+    def rdot(self, x):
+        '''
+        Matrix-vector product with the transposed matrix.
+        '''
+        return self._dot(num.asarray(x, dtype=float), True)
+
+    def to_dense(self):
+        '''
+        Get dense coefficient matrix (for testing).
+        '''
+        return self.dot(num.identity(self.shape[1]))
+
+    def solve_lsq(self, b, tolerance=1e-10, maxiter=None):
+        '''
+        Least squares solution, using LSQR.
+        '''
+
+        from scipy.sparse.linalg import LinearOperator, lsqr
+
+        op = LinearOperator(
+            self.shape, matvec=self.dot, rmatvec=self.rdot, dtype=float)
+
+        result = lsqr(
+            op, b, atol=tolerance, btol=tolerance, iter_lim=maxiter)
+
+        x, istop, itn = result[:3]
+        if istop not in (1, 2):
+            logger.warning(
+                'Iterative inversion did not converge (%i iterations).' % itn)
+
+        return x
+
+
 def invert_fault_dislocations_bem(
         stress_field,
         coef_mat=None,
@@ -601,6 +1050,7 @@ def invert_fault_dislocations_bem(
         pure_shear=False,
         epsilon=None,
         nthreads=1,
+        hmatrix=False,
         **kwargs):
     '''
     BEM least squares inversion to get fault dislocations given stress field.
@@ -622,10 +1072,12 @@ def invert_fault_dislocations_bem(
 
     :param coef_mat:
         Coefficient matrix connecting source patch dislocations and the stress
-        field.
+        field. If an :py:class:`OkadaHMatrix` is given, the least squares
+        problem is solved iteratively.
     :type coef_mat:
         optional, :py:class:`~numpy.ndarray`:
-        ``(len(source_list) * 3, len(source_list) * 3)``
+        ``(len(source_list) * 3, len(source_list) * 3)`` or
+        :py:class:`OkadaHMatrix`
 
     :param source_list:
         Source patches to be used for BEM.
@@ -644,6 +1096,14 @@ def invert_fault_dislocations_bem(
     :type nthreads:
         int
 
+    :param hmatrix:
+        If ``True`` and the coefficient matrix is calculated from
+        ``source_list``, use a hierarchical matrix (:py:class:`OkadaHMatrix`)
+        instead of a dense one. Additional keyword arguments are passed to
+        its constructor.
+    :type hmatrix:
+        optional, bool
+
     :return:
         Inverted displacements as ``displacements[isource, icomponent]``
         where isource indexes the source patch and ``icomponent`` indexes
@@ -653,18 +1113,28 @@ def invert_fault_dislocations_bem(
     '''
 
     if source_list is not None and coef_mat is None:
-        coef_mat = make_okada_coefficient_matrix(
-            source_list, pure_shear=pure_shear, nthreads=nthreads,
-            **kwargs)
+        if hmatrix:
+            coef_mat = OkadaHMatrix(
+                source_list, pure_shear=pure_shear, nthreads=nthreads,
+                **kwargs)
+        else:
+            coef_mat = make_okada_coefficient_matrix(
+                source_list, pure_shear=pure_shear, nthreads=nthreads,
+                **kwargs)
+
+    is_hmatrix = isinstance(coef_mat, OkadaHMatrix)
 
     if epsilon is not None:
+        if is_hmatrix:
+            raise ValueError(
+                'epsilon is not supported with hierarchical matrices')
+
         coef_mat[coef_mat < epsilon] = 0.
 
     idx = num.arange(0, coef_mat.shape[0])
     if pure_shear:
         idx = idx[idx % 3 != 2]
 
-    coef_mat_in = coef_mat[idx, :][:, idx]
     disloc_est = num.zeros(coef_mat.shape[0])
 
     if stress_field.ndim == 2:
@@ -672,6 +1142,15 @@ def invert_fault_dislocations_bem(
 
     threadpool_limits = get_threadpool_limits()
 
+    if is_hmatrix:
+        with threadpool_limits(limits=nthreads, user_api='blas'):
+            disloc_est[idx] = coef_mat.restricted(idx).solve_lsq(
+                stress_field[idx])
+
+        return disloc_est.reshape(-1, 3)
+
+    coef_mat_in = coef_mat[idx, :][:, idx]
+
     with threadpool_limits(limits=nthreads, user_api='blas'):
         try:
             disloc_est[idx] = num.linalg.multi_dot([
@@ -692,5 +1171,6 @@ __all__ = [
     'AnalyticalRectangularSource',
     'OkadaSource',
     'OkadaPatch',
+    'OkadaHMatrix',
     'make_okada_coefficient_matrix',
     'invert_fault_dislocations_bem']
@@ -23,7 +23,10 @@ output of :py:meth:`MomentTensor.standard_decomposition`.
 
 from __future__ import division, print_function, absolute_import
 
+import os
 import math
+import concurrent.futures
+
 import numpy as num
 
 from .guts import Object, Float
@@ -1132,6 +1135,300 @@ def kagan_angle(mt1, mt2):
     return 2. * r2d * math.acos(num.max(num.abs(qk)))
 
 
+def _as_m6s(mts):
+    if len(mts) != 0 and isinstance(mts[0], MomentTensor):
+        return num.array([mt.m6() for mt in mts], dtype=float)
+
+    m6s = num.asarray(mts, dtype=float)
+    if m6s.ndim != 2 or m6s.shape[1] != 6:
+        raise ValueError('Moment tensors must be given as (N, 6) array.')
+
+    return m6s
+
+
+def m6s_to_matrices(m6s):
+    '''
+    Convert many moment tensors from six-element to matrix representation.
+
+    :param m6s: moment tensors ``(mnn, mee, mdd, mne, mnd, med)`` as NumPy
+        array of shape ``(N, 6)``
+    :returns: NumPy array of shape ``(N, 3, 3)``
+    '''
+
+    m6s = _as_m6s(m6s)
+    ms = num.empty((m6s.shape[0], 3, 3), dtype=float)
+    for (i, j), k in zip(
+            [(0, 0), (1, 1), (2, 2), (0, 1), (0, 2), (1, 2)], range(6)):
+
+        ms[:, i, j] = m6s[:, k]
+        ms[:, j, i] = m6s[:, k]
+
+    return ms
+
+
+def _eigenvecs_many(m6s):
+    m_evals, m_evecs = num.linalg.eigh(m6s_to_matrices(m6s))
+    m_evecs[num.linalg.det(m_evecs) < 0.] *= -1.
+    return m_evals, m_evecs
+
+
+def _matrix_to_euler_many(rotmats):
+    pi = math.pi
+
+    # see matrix_to_euler
+    enodes = num.zeros((rotmats.shape[0], 3))
+    enodes[:, 0] = -rotmats[:, 2, 1]
+    enodes[:, 1] = rotmats[:, 2, 0]
+    degenerate = num.sqrt(num.sum(enodes**2, axis=1)) < 1e-10
+    enodes[degenerate] = rotmats[degenerate, 0, :]
+    enodess = num.einsum('nij,nj->ni', rotmats, enodes)
+
+    alpha = num.arccos(num.clip(rotmats[:, 2, 2], -1., 1.))
+    beta = num.mod(num.arctan2(enodes[:, 1], enodes[:, 0]), 2.*pi)
+    gamma = num.mod(-num.arctan2(enodess[:, 1], enodess[:, 0]), 2.*pi)
+
+    # see unique_euler
+    alpha = num.mod(alpha, 2.0*pi)
+
+    c1 = num.logical_and(0.5*pi < alpha, alpha <= pi)
+    c2 = num.logical_and(pi < alpha, alpha <= 1.5*pi)
+    c3 = num.logical_and(1.5*pi < alpha, alpha <= 2.0*pi)
+
+    alpha = num.select([c1, c2, c3], [pi - alpha, alpha - pi, 2.0*pi - alpha],
+                       alpha)
+    beta = num.where(num.logical_or(c1, c3), beta + pi, beta)
+    gamma = num.select(
+        [c1, c2, c3], [2.0*pi - gamma, pi - gamma, pi + gamma], gamma)
+
+    alpha = num.mod(alpha, 2.0*pi)
+    beta = num.mod(beta,  2.0*pi)
+    gamma = num.mod(gamma+pi, 2.0*pi)-pi
+
+    alpha[num.abs(alpha - 0.5*pi) < 1e-10] = 0.5*pi
+    beta[num.abs(beta - pi) < 1e-10] = pi
+    beta[num.abs(beta - 2.*pi) < 1e-10] = 0.
+    beta[num.abs(beta) < 1e-10] = 0.
+
+    c = num.logical_and(alpha == 0.5*pi, beta >= pi)
+    beta[c] = num.mod(beta[c]-pi,  2.0*pi)
+    gamma[c] = num.mod(-gamma[c]+pi, 2.0*pi)-pi
+
+    c = alpha < 1e-7
+    beta[c] = num.mod(beta[c] + gamma[c], 2.0*pi)
+    gamma[c] = 0.
+
+    return alpha, beta, gamma
+
+
+def both_strike_dip_rake_many(mts):
+    '''
+    Get both possible (strike, dip, rake) triplets for many moment tensors.
+
+    Array version of :py:meth:`MomentTensor.both_strike_dip_rake`.
+
+    :param mts: moment tensors as NumPy array of shape ``(N, 6)`` with rows
+        ``(mnn, mee, mdd, mne, mnd, med)`` or list of
+        :py:class:`MomentTensor` objects
+    :returns: NumPy array of shape ``(N, 2, 3)`` with
+        ``(strike, dip, rake)`` of both planes [degrees]
+    '''
+
+    _, m_evecs = _eigenvecs_many(_as_m6s(mts))
+
+    rotmat1 = num.matmul(
+        MomentTensor._u_evecs, m_evecs.transpose((0, 2, 1)))
+    rotmat1[num.linalg.det(rotmat1) < 0.] *= -1.
+    rotmat2 = num.matmul(MomentTensor._flip_dc, rotmat1)
+
+    # same ordering of the two planes as in MomentTensor._update
+    a1 = num.abs(rotmat1.reshape((-1, 9)))
+    a2 = num.abs(rotmat2.reshape((-1, 9)))
+    differ = a1 != a2
+    ifirst = num.argmax(differ, axis=1)
+    iall = num.arange(a1.shape[0])
+    swap = num.logical_and(
+        num.any(differ, axis=1), a2[iall, ifirst] < a1[iall, ifirst])
+
+    rotmats = num.stack([rotmat1, rotmat2], axis=1)
+    rotmats[swap] = rotmats[swap, ::-1]
+
+    sdrs = num.empty((a1.shape[0], 2, 3))
+    for i in range(2):
+        alpha, beta, gamma = _matrix_to_euler_many(rotmats[:, i])
+        sdrs[:, i, 0] = r2d*beta
+        sdrs[:, i, 1] = r2d*alpha
+        sdrs[:, i, 2] = -r2d*gamma
+
+    return sdrs
+
+
+def standard_decomposition_many(mts):
+    '''
+    Decompose many moment tensors into isotropic, DC and CLVD components.
+
+    Array version of :py:meth:`MomentTensor.standard_decomposition`.
+
+    :param mts: moment tensors as NumPy array of shape ``(N, 6)`` with rows
+        ``(mnn, mee, mdd, mne, mnd, med)`` or list of
+        :py:class:`MomentTensor` objects
+    :returns: ``(moments, ratios, ms)``, NumPy arrays of shape ``(N, 5)``,
+        ``(N, 5)`` and ``(N, 5, 3, 3)``, holding moment, ratio and moment
+        tensor of the components ordered as ``(iso, dc, clvd, devi, full)``
+    '''
+
+    epsilon = 1e-6
+
+    m = m6s_to_matrices(mts)
+    n = m.shape[0]
+
+    trace_m = num.trace(m, axis1=1, axis2=2)
+    m_iso = (trace_m / 3.)[:, num.newaxis, num.newaxis] \
+        * num.eye(3)[num.newaxis, :, :]
+    moment_iso = num.abs(trace_m / 3.)
+
+    m_devi = m - m_iso
+
+    evals, evecs = num.linalg.eigh(m_devi)
+
+    moment_devi = num.max(num.abs(evals), axis=1)
+    moment = moment_iso + moment_devi
+
+    iorder = num.argsort(num.abs(evals), axis=1)
+    evals_sorted = num.take_along_axis(evals, iorder, axis=1)
+    evecs_sorted = num.take_along_axis(
+        evecs, iorder[:, num.newaxis, :], axis=2)
+
+    with num.errstate(divide='ignore', invalid='ignore'):
+        ratio = evals_sorted[:, 0] / evals_sorted[:, 2]
+
+    iso_only = moment_devi < epsilon * moment_iso
+    assert num.all(num.logical_or(
+        iso_only,
+        num.logical_and(-epsilon <= -ratio, -ratio <= 0.5)))
+
+    signed_moment_dc = num.where(
+        iso_only, 0.,
+        evals_sorted[:, 2] * (1.0 + 2.0 * num.minimum(0.0, ratio)))
+
+    moment_dc = num.abs(signed_moment_dc)
+    v1 = evecs_sorted[:, :, 1]
+    v2 = evecs_sorted[:, :, 2]
+    m_dc = signed_moment_dc[:, num.newaxis, num.newaxis] * (
+        v2[:, :, num.newaxis] * v2[:, num.newaxis, :]
+        - v1[:, :, num.newaxis] * v1[:, num.newaxis, :])
+
+    m_clvd = m_devi - m_dc
+
+    moment_clvd = moment_devi - moment_dc
+
+    moments = num.empty((n, 5))
+    for i, x in enumerate(
+            [moment_iso, moment_dc, moment_clvd, moment_devi, moment]):
+        moments[:, i] = x
+
+    ratios = moments / moment[:, num.newaxis]
+    ms = num.stack([m_iso, m_dc, m_clvd, m_devi, m], axis=1)
+
+    return moments, ratios, ms
+
+
+def _kagan_axes(mts):
+    _, m_evecs = _eigenvecs_many(_as_m6s(mts))
+    # t, p and null axes
+    return m_evecs[:, :, 2], m_evecs[:, :, 0], m_evecs[:, :, 1]
+
+
+def _kagan_angles_block(axes_a, axes_b, ia_min, ia_max, symmetric):
+    # diagonal of the rotation matrix between the principal axes systems, see
+    # kagan_angle
+    dt, dp, db = [
+        num.dot(xa[ia_min:ia_max], xb.T) for (xa, xb) in zip(axes_a, axes_b)]
+
+    # largest absolute quaternion component, considering the symmetries of
+    # the double couple
+    q = 1. + dt + dp + db
+    num.maximum(q, 1. + dt - dp - db, out=q)
+    num.maximum(q, 1. - dt + dp - db, out=q)
+    num.maximum(q, 1. - dt - dp + db, out=q)
+    num.sqrt(num.maximum(q, 0., out=q), out=q)
+    q *= 0.5
+    num.minimum(q, 1., out=q)
+    num.arccos(q, out=q)
+    q *= 2. * r2d
+
+    if symmetric:
+        # avoid rounding noise when comparing a moment tensor with itself
+        ia = num.arange(ia_min, ia_max)
+        q[ia - ia_min, ia] = 0.
+
+    return q
+
+
+def iter_kagan_angles(mts_a, mts_b=None, block_size=1024):
+    '''
+    Compute pairwise Kagan angles block by block.
+
+    Yields ``(ia_min, ia_max, angles)`` where ``angles`` is a NumPy array of
+    shape ``(ia_max - ia_min, M)`` with the Kagan angles [degrees] between the
+    moment tensors ``mts_a[ia_min:ia_max]`` and all of ``mts_b``. Allows to
+    process pairwise angle matrices which would not fit into memory at once.
+
+    See :py:func:`kagan_angles` for a description of the arguments.
+    '''
+
+    axes_a = _kagan_axes(mts_a)
+    axes_b = axes_a if mts_b is None else _kagan_axes(mts_b)
+
+    n = axes_a[0].shape[0]
+    for ia_min in range(0, n, block_size):
+        ia_max = min(n, ia_min + block_size)
+        yield ia_min, ia_max, _kagan_angles_block(
+            axes_a, axes_b, ia_min, ia_max, mts_b is None)
+
+
+def kagan_angles(mts_a, mts_b=None, block_size=1024, nthreads=1):
+    '''
+    Compute pairwise Kagan angles between two sets of moment tensors.
+
+    Array version of :py:func:`kagan_angle`. The principal axes of the moment
+    tensors are obtained at once and the angles are computed block-wise with
+    matrix products.
+
+    :param mts_a: moment tensors as NumPy array of shape ``(N, 6)`` with rows
+        ``(mnn, mee, mdd, mne, mnd, med)`` or list of
+        :py:class:`MomentTensor` objects
+    :param mts_b: second set of ``M`` moment tensors, like ``mts_a``. If
+        ``None``, angles between all pairs of ``mts_a`` are computed.
+    :param block_size: number of rows processed at once
+    :param nthreads: number of threads to split the blocks across, ``0`` for
+        number of available CPUs
+    :returns: NumPy array of shape ``(N, M)`` with Kagan angles [degrees]
+    '''
+
+    axes_a = _kagan_axes(mts_a)
+    axes_b = axes_a if mts_b is None else _kagan_axes(mts_b)
+
+    n = axes_a[0].shape[0]
+    angles = num.empty((n, axes_b[0].shape[0]))
+
+    def work(ia_min):
+        ia_max = min(n, ia_min + block_size)
+        angles[ia_min:ia_max] = _kagan_angles_block(
+            axes_a, axes_b, ia_min, ia_max, mts_b is None)
+
+    if nthreads == 0:
+        nthreads = os.cpu_count() or 1
+
+    if nthreads == 1:
+        for ia_min in range(0, n, block_size):
+            work(ia_min)
+    else:
+        with concurrent.futures.ThreadPoolExecutor(nthreads) as executor:
+            list(executor.map(work, range(0, n, block_size)))
+
+    return angles
+
+
 def rand_to_gutenberg_richter(rand, b_value, magnitude_min):
     '''
     Draw magnitude from Gutenberg Richter distribution.
@@ -14,6 +14,7 @@ import sys
 import operator
 import math
 import hashlib
+import numpy as num
 try:
     import cPickle as pickle
 except ImportError:
@@ -30,6 +31,9 @@ is_windows = sys.platform.startswith('win')
 show_progress_force_off = False
 version_salt = 'v1-'
 
+OVERVIEW_VERSION = 1
+OVERVIEW_LEVEL_MIN = 4
+
 
 def ehash(s):
     return hashlib.sha1((version_salt + s).encode('utf8')).hexdigest()
@@ -371,6 +375,286 @@ def get_cache(cachedir):
     return TracesFileCache.caches[cachedir]
 
 
+def make_minmax_levels(ydata, level_min=OVERVIEW_LEVEL_MIN):
+    '''
+    Compute levels of a min/max overview pyramid.
+
+    Level ``k`` holds the minima and maxima of consecutive bins of ``2**k``
+    samples. Levels are computed from ``level_min`` up to the first level
+    with a single bin. An incomplete last bin is padded with the last sample.
+
+    :param ydata: sample array
+    :param level_min: finest level to compute
+    :returns: list of ``(mins, maxs)`` tuples of ``float32`` arrays
+    '''
+
+    nbin = 2**level_min
+    n = ydata.size
+    nbins = (n + nbin - 1) // nbin
+    npad = nbins * nbin - n
+    if npad:
+        ydata = num.concatenate((ydata, num.repeat(ydata[-1:], npad)))
+
+    yy = ydata.reshape((nbins, nbin))
+    mins = yy.min(axis=1).astype(num.float32)
+    maxs = yy.max(axis=1).astype(num.float32)
+    levels = [(mins, maxs)]
+    while mins.size > 1:
+        if mins.size % 2:
+            mins = num.concatenate((mins, mins[-1:]))
+            maxs = num.concatenate((maxs, maxs[-1:]))
+
+        mins = num.minimum(mins[0::2], mins[1::2])
+        maxs = num.maximum(maxs[0::2], maxs[1::2])
+        levels.append((mins, maxs))
+
+    return levels
+
+
+def overview_key(tr):
+    return tr.nslc_id + (float(tr.tmin), float(tr.tmax), float(tr.deltat))
+
+
+def can_use_overview(tr, deltat_pixel, level_min=OVERVIEW_LEVEL_MIN):
+    '''
+    Check if trace can be displayed from overview at given pixel duration.
+
+    Only traces stored in files can have overviews.
+    '''
+    return isinstance(tr.file, TracesFile) \
+        and tr.deltat * 2**level_min <= deltat_pixel
+
+
+class MinMaxPyramid(object):
+    '''
+    Min/max overview pyramid of a single trace.
+
+    :param tmin: start time of the trace
+    :param deltat: sampling interval of the trace
+    :param level_min: finest level contained
+    :param levels: list of ``(mins, maxs)`` arrays, as computed by
+        :py:func:`make_minmax_levels`
+    '''
+
+    def __init__(self, tmin, deltat, level_min, levels):
+        self.tmin = tmin
+        self.deltat = deltat
+        self.level_min = level_min
+        self.levels = levels
+
+    @property
+    def level_max(self):
+        return self.level_min + len(self.levels) - 1
+
+    def get_level(self, deltat_pixel):
+        '''
+        Get coarsest level with bins not longer than ``deltat_pixel``.
+
+        :returns: level or ``None`` if the raw samples are needed
+        '''
+
+        level = int(math.floor(
+            math.log(deltat_pixel / self.deltat, 2.) + 1e-9))
+
+        if level < self.level_min:
+            return None
+
+        return min(level, self.level_max)
+
+    def envelope(self, tmin, tmax, level):
+        '''
+        Get min/max envelope from a given level for a time span.
+
+        :returns: ``(tmin, deltat, ydata)``, where ``ydata`` holds
+            alternating minima and maxima of the bins, two samples per bin,
+            or ``None`` if the span is not covered
+        '''
+
+        mins, maxs = self.levels[level - self.level_min]
+        tbin = self.deltat * 2**level
+        i0 = max(0, int(math.floor((tmin - self.tmin) / tbin)))
+        i1 = min(mins.size, int(math.ceil((tmax - self.tmin) / tbin)) + 1)
+        if i1 <= i0:
+            return None
+
+        ydata = num.empty((i1 - i0) * 2, dtype=num.float32)
+        ydata[0::2] = mins[i0:i1]
+        ydata[1::2] = maxs[i0:i1]
+        return self.tmin + i0 * tbin, tbin * 0.5, ydata
+
+
+class OverviewCache(object):
+    '''
+    Manages persistent min/max overview pyramids of waveform files.
+
+    Pyramids are computed lazily, the first time they are requested for a
+    file. For each file, one index file and one array file are stored in the
+    cache directory. The arrays are memory mapped on access. Pyramids are
+    recomputed when the file's modification time or size changes.
+    '''
+
+    caches = {}
+
+    def __init__(self, cachedir, level_min=OVERVIEW_LEVEL_MIN):
+        '''
+        Create new overview cache.
+
+        :param cachedir: directory to hold the cache files.
+        :param level_min: finest overview level to store
+        '''
+
+        self.cachedir = cachedir
+        self.level_min = level_min
+        self.loaded = {}
+        util.ensuredir(self.cachedir)
+
+    def get(self, tfile, lock=None):
+        '''
+        Get overview pyramids of all traces in a file.
+
+        :param tfile: :py:class:`TracesFile` object
+        :param lock: optional lock, held while raw samples are read from the
+            file object, but not while the pyramids are computed
+        :returns: dict with pyramids, keyed by :py:func:`overview_key` of the
+            traces
+        '''
+
+        abspath = tfile.abspath
+        stamp = self._stamp(abspath)
+        if stamp is None:
+            return {}
+
+        if abspath in self.loaded:
+            stamp_loaded, pyramids = self.loaded[abspath]
+            if stamp_loaded == stamp:
+                return pyramids
+
+        pyramids = self._load(abspath, stamp)
+        if pyramids is None:
+            pyramids = self._make(tfile, lock)
+            self._dump(abspath, stamp, pyramids)
+            pyramids = self._load(abspath, stamp) or pyramids
+
+        self.loaded[abspath] = (stamp, pyramids)
+        return pyramids
+
+    def _stamp(self, abspath):
+        try:
+            st = os.stat(abspath)
+        except OSError:
+            return None
+
+        return (OVERVIEW_VERSION, self.level_min, st.st_mtime, st.st_size)
+
+    def _cachepath(self, abspath):
+        return pjoin(self.cachedir, ehash(abspath))
+
+    def _make(self, tfile, lock=None):
+        logger.debug('computing overviews of file: %s' % tfile.abspath)
+        if lock is not None:
+            lock.acquire()
+
+        try:
+            tfile.load_data()
+            tfile.use_data()
+            try:
+                raw = [
+                    (overview_key(tr), tr.tmin, tr.deltat, tr.ydata)
+                    for tr in tfile.traces
+                    if tr.ydata is not None and tr.ydata.size != 0]
+
+            finally:
+                tfile.drop_data()
+
+        finally:
+            if lock is not None:
+                lock.release()
+
+        pyramids = {}
+        for key, tmin, deltat, ydata in raw:
+            pyramids[key] = MinMaxPyramid(
+                tmin, deltat, self.level_min,
+                make_minmax_levels(ydata, self.level_min))
+
+        return pyramids
+
+    def _load(self, abspath, stamp):
+        cachepath = self._cachepath(abspath)
+        try:
+            with open(cachepath + '.idx', 'rb') as f:
+                stamp_cached, index = pickle.load(f)
+
+            if stamp_cached != stamp:
+                return None
+
+            arr = num.load(cachepath + '.npy', mmap_mode='r')
+
+        except (OSError, IOError, EOFError, ValueError,
+                pickle.UnpicklingError):
+            return None
+
+        pyramids = {}
+        for key, tmin, deltat, level_min, sizes in index:
+            levels = []
+            for offset, n in sizes:
+                if offset + 2*n > arr.size:
+                    return None
+
+                levels.append((
+                    arr[offset:offset+n], arr[offset+n:offset+2*n]))
+
+            pyramids[key] = MinMaxPyramid(tmin, deltat, level_min, levels)
+
+        return pyramids
+
+    def _dump(self, abspath, stamp, pyramids):
+        index = []
+        arrays = []
+        offset = 0
+        for key, pyramid in pyramids.items():
+            sizes = []
+            for mins, maxs in pyramid.levels:
+                sizes.append((offset, mins.size))
+                arrays.extend((mins, maxs))
+                offset += 2*mins.size
+
+            index.append(
+                (key, pyramid.tmin, pyramid.deltat, pyramid.level_min, sizes))
+
+        if arrays:
+            arr = num.concatenate(arrays)
+        else:
+            arr = num.zeros(0, dtype=num.float32)
+
+        cachepath = self._cachepath(abspath)
+        try:
+            for ext, dump in [
+                    ('.npy', lambda f: num.save(f, arr)),
+                    ('.idx', lambda f: pickle.dump(
+                        (stamp, index), f, protocol=2))]:
+
+                fn = cachepath + ext
+                tmpfn = fn + '.%i.tmp' % os.getpid()
+                with open(tmpfn, 'wb') as f:
+                    dump(f)
+
+                os.replace(tmpfn, fn)
+
+        except (OSError, IOError) as e:
+            logger.warning(
+                'failed to store overviews of file %s: %s' % (abspath, e))
+
+
+def get_overview_cache(cachedir):
+    '''
+    Get global OverviewCache object for given directory.
+    '''
+    if cachedir not in OverviewCache.caches:
+        OverviewCache.caches[cachedir] = OverviewCache(cachedir)
+
+    return OverviewCache.caches[cachedir]
+
+
 def loader(
         filenames, fileformat, cache, filename_attributes,
         show_progress=True, update_progress=None):
@@ -1190,6 +1474,62 @@ class Pile(TracesGroup):
 
         return chopped, used_files
 
+    def overview_chop(
+            self, tmin, tmax, deltat_pixel, cache,
+            group_selector=None,
+            trace_selector=None,
+            lock=None):
+
+        '''
+        Get min/max envelopes of traces for display.
+
+        For each relevant trace, the coarsest level of the trace's overview
+        pyramid with bins not longer than ``deltat_pixel`` is used. Raw
+        samples are only read when the pyramid of a file has not been
+        computed yet. Traces without a suitable overview level are skipped
+        (see :py:func:`can_use_overview`).
+
+        :param deltat_pixel: duration of a display pixel [s]
+        :param cache: :py:class:`OverviewCache` object
+        :param lock: optional lock to be held while the pile is accessed, e.g.
+            when the pile is shared with other threads. It is not held while
+            overview pyramids are computed.
+        :returns: list of :py:class:`pyrocko.trace.Trace` objects holding
+            alternating minima and maxima of the overview bins
+        '''
+
+        if lock is not None:
+            with lock:
+                traces = self.relevant(
+                    tmin, tmax, group_selector, trace_selector)
+        else:
+            traces = self.relevant(tmin, tmax, group_selector, trace_selector)
+
+        envelopes = []
+        for tr in traces:
+            if not can_use_overview(tr, deltat_pixel, cache.level_min):
+                continue
+
+            pyramid = cache.get(tr.file, lock).get(overview_key(tr))
+            if pyramid is None:
+                continue
+
+            level = pyramid.get_level(deltat_pixel)
+            if level is None:
+                continue
+
+            env = pyramid.envelope(tmin, tmax, level)
+            if env is None:
+                continue
+
+            env_tmin, env_deltat, ydata = env
+            envelopes.append(trace.Trace(
+                tr.network, tr.station, tr.location, tr.channel,
+                tmin=env_tmin, deltat=env_deltat, ydata=ydata,
+                meta={'overview_level': level}))
+
+        return envelopes
+
     def _process_chopped(
             self, chopped, degap, maxgap, maxlap, want_incomplete, wmax, wmin,
             tpad):
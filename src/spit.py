@@ -3,6 +3,7 @@
 # The Pyrocko Developers, 21st Century
 # ---|P------/S----------~Lg----------
 from __future__ import division
+import os
 import struct
 import logging
 import numpy as num
@@ -233,6 +234,8 @@ class SPTree(object):
         :param addargs: additional arguments to pass to f
         '''
 
+        self._flat = None
+
         if filename is None:
             assert all(v is not None for v in (f, ftol, xbounds, xtols))
 
@@ -365,8 +368,60 @@ class SPTree(object):
     def __call__(self, x):
         return self.interpolate(x)
 
-    def interpolate_many(self, x):
-        return self.root.interpolate_many(x)
+    def interpolate_many(self, x, nthreads=1):
+        '''
+        Interpolate at many points.
+
+        :param x: coordinates, shape (npoints, ndim)
+        :param nthreads: number of threads to use for large point sets, ``0``
+            to use all available CPUs
+
+        :returns: interpolated values, shape (npoints,), ``nan`` where the
+            tree is undefined
+
+        The cells are located and evaluated for all points at once, using the
+        flattened tree (see :py:meth:`flatten`).
+        '''
+
+        x = num.asarray(x, dtype=float)
+        assert x.ndim == 2 and x.shape[1] == self.ndim
+
+        flat = self.flatten()
+
+        npoints = x.shape[0]
+        if nthreads == 0:
+            nthreads = os.cpu_count() or 1
+
+        nthreads = min(nthreads, npoints // g_min_points_per_thread)
+
+        if nthreads <= 1:
+            return flat.interpolate_many(x)
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        result = num.empty(npoints, dtype=float)
+        ibounds = num.linspace(0, npoints, nthreads+1).astype(int)
+
+        def work(ithread):
+            ia, ib = ibounds[ithread], ibounds[ithread+1]
+            result[ia:ib] = flat.interpolate_many(x[ia:ib])
+
+        with ThreadPoolExecutor(max_workers=nthreads) as executor:
+            list(executor.map(work, range(nthreads)))
+
+        return result
+
+    def flatten(self):
+        '''
+        Get tree as contiguous arrays.
+
+        :returns: :py:class:`FlatSPTree` object, cached
+        '''
+
+        if self._flat is None:
+            self._flat = FlatSPTree(self)
+
+        return self._flat
 
     def _continue_fill(self):
         cells_to_continue, self.cells_to_continue = self.cells_to_continue, []
@@ -496,6 +551,114 @@ class SPTree(object):
             plt.show()
 
 
+g_min_points_per_thread = 10000
+
+
+class FlatSPTree(object):
+    '''
+    Space partitioning tree flattened into contiguous arrays.
+
+    Cells are stored in breadth-first order. The children of a cell are
+    stored contiguously, in the order in which they are created when the cell
+    is deepened, so that the child containing a point can be computed from
+    the split coordinates of the parent cell.
+    '''
+
+    def __init__(self, tree):
+        cells = [tree.root]
+        for cell in cells:
+            cells.extend(cell.children)
+
+        ncells = len(cells)
+        ndim = tree.ndim
+
+        self.ndim = ndim
+        self.xbounds = num.empty((ncells, ndim, 2), dtype=float)
+        self.a = num.empty((ncells, ndim, 2), dtype=float)
+        self.b = num.empty((ncells, ndim, 2), dtype=float)
+        self.f = num.empty((ncells, 2**ndim), dtype=float)
+        self.ichild = num.full(ncells, -1, dtype=int)
+        self.split = num.zeros((ncells, ndim), dtype=float)
+        self.strides = num.zeros((ncells, ndim), dtype=int)
+
+        ichild = 1
+        for icell, cell in enumerate(cells):
+            self.xbounds[icell] = cell.xbounds
+            self.a[icell] = cell.a
+            self.b[icell] = cell.b
+            self.f[icell] = cell.f.ravel()
+            if cell.children:
+                self.ichild[icell] = ichild
+                ichild += len(cell.children)
+                first = cell.children[0]
+                ndivs = num.array(
+                    cell.children[-1].index - first.index + 1, dtype=int)
+
+                self.split[icell] = first.xbounds[:, 1]
+                self.strides[icell] = (ndivs > 1) * num.cumprod(
+                    num.concatenate((ndivs[1:], [1]))[::-1])[::-1]
+
+        self.defined = num.all(num.isfinite(self.f), axis=1)
+
+        # corner selectors, corresponding to C ordered f with shape [2]*ndim
+        self.corners = num.array(
+            list(num.ndindex(*([2]*ndim))), dtype=int).reshape(-1, ndim)
+
+    def locate(self, x):
+        '''
+        Get indices of leaf cells containing given points.
+
+        :returns: cell indices, shape (npoints,), ``-1`` for points which
+            are not covered by the tree
+        '''
+
+        npoints = x.shape[0]
+        icells = num.zeros(npoints, dtype=int)
+        ipoints = num.arange(npoints)
+        while ipoints.size != 0:
+            ic = icells[ipoints]
+            ichild = self.ichild[ic]
+            inner = ichild >= 0
+            ipoints = ipoints[inner]
+            ic = ic[inner]
+            ichild = ichild[inner]
+            xp = x[ipoints]
+
+            xb = self.xbounds[ic]
+            inside = num.all(
+                and_(xb[:, :, 0] <= xp, xp <= xb[:, :, 1]), axis=1)
+
+            icells[ipoints[~inside]] = -1
+            ipoints = ipoints[inside]
+            ic = ic[inside]
+            ichild = ichild[inside]
+            xp = xp[inside]
+
+            # points on a split go to the upper cell, as in
+            # Cell.interpolate_many
+            icells[ipoints] = ichild + num.sum(
+                (xp >= self.split[ic]) * self.strides[ic], axis=1)
+
+        return icells
+
+    def interpolate_many(self, x):
+        icells = self.locate(x)
+        result = num.full(x.shape[0], num.nan)
+        ok = icells >= 0
+        ok[ok] = self.defined[icells[ok]]
+        icells = icells[ok]
+        x = x[ok]
+
+        ws = (x[:, :, num.newaxis] - self.a[icells]) / self.b[icells]
+        idims = num.arange(self.ndim)
+        wn = num.ones((x.shape[0], self.corners.shape[0]))
+        for corner_index, corner in enumerate(self.corners):
+            wn[:, corner_index] = num.prod(ws[:, idims, corner], axis=1)
+
+        result[ok] = num.sum(wn * self.f[icells], axis=1)
+        return result
+
+
 def getset(d, k, f, addargs):
     try:
         return d[k]
@@ -532,7 +695,6 @@ if __name__ == '__main__':
     tree = SPTree(f, 0.01, [[0., 1.], [0., 1.], [0., 1.]], [0.025, 0.05, 0.1])
 
     import tempfile
-    import os
     fid, fn = tempfile.mkstemp()
     tree.dump(fn)
     tree = SPTree(filename=fn)
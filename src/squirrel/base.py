@@ -12,11 +12,13 @@ import math
 import logging
 import threading
 import queue
+import concurrent.futures
 from collections import defaultdict
 
 from pyrocko.guts import Object, Int, List, Tuple, String, Timestamp, Dict
 from pyrocko import util, trace
 from pyrocko.progress import progress
+from pyrocko.io.io_common import FileLoadError
 
 from . import model, io, cache, dataset
 
@@ -197,6 +199,23 @@ class Squirrel(Selection):
     :type persistent:
         :py:class:`str`
 
+    :param waveform_cache_size_limit:
+        Size limit [bytes] for the in-memory waveform cache. When exceeded,
+        least recently used waveform data is released. By default, the cache
+        size is not limited. See
+        :py:class:`~pyrocko.squirrel.cache.ContentCache`.
+    :type waveform_cache_size_limit:
+        :py:class:`int`
+
+    :param waveform_disk_cache:
+        If ``True``, keep decoded waveform data in a persistent second-level
+        cache in the ``'decoded'`` subdirectory of the cache directory, so
+        that repeated reads of the same data, also by other processes, skip
+        the decoding step. See
+        :py:class:`~pyrocko.squirrel.cache.WaveformDiskCache`.
+    :type waveform_disk_cache:
+        :py:class:`bool`
+
     This is the central class of the Squirrel framework. It provides a unified
     interface to query and access seismic waveforms, station meta-data and
     event information from local file collections and remote data sources. For
@@ -272,7 +291,8 @@ class Squirrel(Selection):
     '''
 
     def __init__(
-            self, env=None, database=None, cache_path=None, persistent=None):
+            self, env=None, database=None, cache_path=None, persistent=None,
+            waveform_cache_size_limit=None, waveform_disk_cache=False):
 
         if not isinstance(env, environment.Environment):
             env = environment.get_environment(env)
@@ -292,11 +312,17 @@ class Squirrel(Selection):
         self.get_database().set_basepath(os.path.dirname(env.get_basepath()))
 
         self._content_caches = {
-            'waveform': cache.ContentCache(),
+            'waveform': cache.ContentCache(
+                size_limit=waveform_cache_size_limit),
             'default': cache.ContentCache()}
 
         self._cache_path = cache_path
 
+        self._waveform_disk_cache = None
+        if waveform_disk_cache:
+            self._waveform_disk_cache = cache.WaveformDiskCache(
+                os.path.join(cache_path, 'decoded'))
+
         self._sources = []
         self._operators = []
         self._operator_registry = {}
@@ -305,6 +331,7 @@ class Squirrel(Selection):
 
         self._pile = None
         self._n_choppers_active = 0
+        self._prefetched = {}
 
         self._names.update({
             'nuts': self.name + '_nuts',
@@ -543,7 +570,8 @@ class Squirrel(Selection):
             format='detect',
             include=None,
             exclude=None,
-            check=True):
+            check=True,
+            nworkers=None):
 
         '''
         Add files to the selection.
@@ -589,6 +617,12 @@ class Squirrel(Selection):
         :type check:
             bool
 
+        :param nworkers:
+            Number of worker processes to use for indexing new or modified
+            files. By default, files are indexed in the calling process.
+        :type nworkers:
+            int
+
         :Complexity:
             O(log N)
         '''
@@ -611,18 +645,24 @@ class Squirrel(Selection):
                     pass_through=lambda path: path.startswith('virtual:')
                 ), kind_mask, format)
 
-            self._load(check)
+            self._load(check, nworkers=nworkers)
             self._update_nuts()
 
-    def reload(self):
+    def reload(self, nworkers=None):
         '''
         Check for modifications and reindex modified files.
 
         Based on file modification times.
+
+        :param nworkers:
+            Number of worker processes to use for reindexing. By default,
+            files are indexed in the calling process.
+        :type nworkers:
+            int
         '''
 
         self._set_file_states_force_check()
-        self._load(check=True)
+        self._load(check=True, nworkers=nworkers)
         self._update_nuts()
 
     def add_virtual(self, nuts, virtual_paths=None):
@@ -698,12 +738,13 @@ class Squirrel(Selection):
         self.add_volatile(nuts)
         return path
 
-    def _load(self, check):
+    def _load(self, check, nworkers=None):
         for _ in io.iload(
                 self,
                 content=[],
                 skip_unchanged=True,
-                check=check):
+                check=check,
+                nworkers=nworkers):
             pass
 
     def _update_nuts(self, transaction=None):
@@ -1610,20 +1651,37 @@ class Squirrel(Selection):
         Loads the actual content objects (channel, station, waveform, ...) from
         file. For efficiency, sibling content (all stuff in the same file
         segment) will also be loaded as a side effect. The loaded contents are
-        cached in the Squirrel object.
+        cached in the Squirrel object. If the persistent waveform disk cache
+        is enabled, decoded waveform content is read from and stored to it.
         '''
 
         content_cache = self._content_caches[cache_id]
         if not content_cache.has(nut):
 
-            for nut_loaded in io.iload(
+            disk_cache = None
+            if cache_id == 'waveform':
+                disk_cache = self._waveform_disk_cache
+
+            nuts_loaded = None
+            if cache_id == 'waveform':
+                nuts_loaded = self._get_prefetched(nut)
+
+            if nuts_loaded is None and disk_cache is not None:
+                nuts_loaded = disk_cache.get(nut)
+
+            if nuts_loaded is None:
+                nuts_loaded = list(io.iload(
                     nut.file_path,
                     segment=nut.file_segment,
                     format=nut.file_format,
                     database=self._database,
                     update_selection=self,
-                    show_progress=show_progress):
+                    show_progress=show_progress))
+
+                if disk_cache is not None:
+                    disk_cache.put(nuts_loaded)
 
+            for nut_loaded in nuts_loaded:
                 content_cache.put(nut_loaded)
 
         try:
@@ -1633,6 +1691,89 @@ class Squirrel(Selection):
             raise error.NotAvailable(
                 'Unable to retrieve content: %s, %s, %s, %s' % nut.key)
 
+    def _load_records(self, nut, tmin, tmax):
+        # Partial read: for short time windows out of long waveform nuts,
+        # only decode the records overlapping the window, using the record
+        # index stored in the database. Returns None when not applicable, in
+        # which case the full content is loaded through the content cache.
+
+        if (tmax - tmin) > 0.5 * (nut.tmax - nut.tmin) \
+                or nut.file_path.startswith('virtual:') \
+                or (nut.file_path, nut.file_segment) in self._prefetched \
+                or self._content_caches['waveform']._has(nut):
+
+            return None
+
+        try:
+            backend = nut.get_io_backend()
+            if not hasattr(backend, 'iload_records'):
+                return None
+
+            record_index = self.get_database().get_record_index(nut)
+            if record_index is None or nut.file_modified():
+                return None
+
+            return list(
+                backend.iload_records(nut, record_index, tmin, tmax)) or None
+
+        except (io.UnknownFormat, FileLoadError, OSError):
+            return None
+
+    def _load_segment(self, nut):
+        # Runs in prefetch worker threads: must not access the database.
+
+        disk_cache = self._waveform_disk_cache
+        if disk_cache is not None:
+            nuts = disk_cache.get(nut)
+            if nuts is not None:
+                return nuts
+
+        nuts = list(io.iload(
+            nut.file_path,
+            segment=nut.file_segment,
+            format=nut.file_format,
+            content=['waveform'],
+            show_progress=False))
+
+        if disk_cache is not None:
+            disk_cache.put(nuts)
+
+        return nuts
+
+    def _prefetch_waveforms(self, executor, tmin, tmax, codes, keys):
+        content_cache = self._content_caches['waveform']
+        args = self._get_selection_args(
+            WAVEFORM, None, tmin, tmax, None, codes)
+
+        for nut in self.iter_nuts('waveform', *args):
+            key = nut.file_path, nut.file_segment
+            if key in self._prefetched \
+                    or nut.file_path.startswith('virtual:') \
+                    or content_cache._has(nut):
+                continue
+
+            self._prefetched[key] = executor.submit(self._load_segment, nut)
+            keys.add(key)
+
+    def _get_prefetched(self, nut):
+        future = self._prefetched.pop((nut.file_path, nut.file_segment), None)
+        if future is None:
+            return None
+
+        try:
+            nuts = future.result()
+        except Exception:
+            # Let the regular loading mechanism handle the problem.
+            return None
+
+        if not nuts or any(
+                nut_loaded.file_mtime != nut.file_mtime
+                for nut_loaded in nuts):
+
+            return None
+
+        return nuts
+
     def advance_accessor(self, accessor_id='default', cache_id=None):
         '''
         Notify memory caches about consumer moving to a new data batch.
@@ -1695,9 +1836,57 @@ class Squirrel(Selection):
 
             self._content_caches[cache_].clear_accessor(accessor_id)
 
+    def set_cache_size_limit(self, size_limit, cache_id='waveform'):
+        '''
+        Set size limit of a memory cache.
+
+        :param size_limit:
+            Maximum size of the cached sample data [bytes]. ``None`` disables
+            the limit.
+        :type size_limit:
+            int
+
+        :param cache_id:
+            Name of the cache to be limited.
+        :type cache_id:
+            str
+
+        Least recently used data is released when the limit is exceeded. See
+        :py:class:`~pyrocko.squirrel.cache.ContentCache` for details.
+        '''
+
+        self._content_caches[cache_id].set_size_limit(size_limit)
+
     def get_cache_stats(self, cache_id):
+        '''
+        Get information about a memory cache's state.
+
+        :param cache_id:
+            Name of the cache.
+        :type cache_id:
+            str
+
+        :returns:
+            :py:class:`~pyrocko.squirrel.cache.ContentCacheStats` object with
+            entry, byte, hit, miss and eviction counters.
+        '''
+
         return self._content_caches[cache_id].get_stats()
 
+    def get_disk_cache_stats(self):
+        '''
+        Get information about usage of the persistent waveform disk cache.
+
+        :returns:
+            :py:class:`~pyrocko.squirrel.cache.WaveformDiskCacheStats` object
+            or ``None`` if the disk cache is not enabled.
+        '''
+
+        if self._waveform_disk_cache is None:
+            return None
+
+        return self._waveform_disk_cache.get_stats()
+
     @filldocs
     def get_stations(
             self, obj=None, tmin=None, tmax=None, time=None, codes=None,
@@ -2227,8 +2416,17 @@ class Squirrel(Selection):
             return []
 
         if load_data:
-            traces = [
-                self.get_content(nut, 'waveform', accessor_id) for nut in nuts]
+            traces = []
+            for nut in nuts:
+                traces_partial = None
+                if not uncut:
+                    traces_partial = self._load_records(nut, tmin, tmax)
+
+                if traces_partial is not None:
+                    traces.extend(traces_partial)
+                else:
+                    traces.append(
+                        self.get_content(nut, 'waveform', accessor_id))
 
         else:
             traces = [
@@ -2269,7 +2467,7 @@ class Squirrel(Selection):
             degap=True, maxgap=5, maxlap=None,
             snap=None, include_last=False, load_data=True,
             accessor_id=None, clear_accessor=True, operator_params=None,
-            grouping=None):
+            grouping=None, prefetch=0):
 
         '''
         Iterate window-wise over waveform archive.
@@ -2361,6 +2559,17 @@ class Squirrel(Selection):
         :type grouping:
             :py:class:`~pyrocko.squirrel.operator.Grouping`
 
+        :param prefetch:
+            Number of upcoming time windows for which waveform data should be
+            read and decoded in background threads, while the consumer is
+            processing the current batch. Up to ``prefetch`` file segments are
+            read concurrently. Prefetched data is handed over to the memory
+            cache when it is requested, so that release of cached data
+            follows the usual accessor logic. By default, no prefetching is
+            done.
+        :type prefetch:
+            int
+
         :yields:
             A list of :py:class:`~pyrocko.trace.Trace` objects for every
             extracted time window.
@@ -2391,6 +2600,8 @@ class Squirrel(Selection):
 
         tinc = tinc if tinc is not None else tmax - tmin
 
+        executor = None
+        prefetched_keys = set()
         try:
             if accessor_id is None:
                 accessor_id = 'chopper%i' % self._n_choppers_active
@@ -2418,37 +2629,67 @@ class Squirrel(Selection):
                     codes_patterns_list(scl)
                     for scl in operator.iter_in_codes()]
 
+            def window(iwin):
+                return tmin+iwin*tinc, min(tmin+(iwin+1)*tinc, tmax)
+
             ngroups = len(codes_list)
-            for igroup, scl in enumerate(codes_list):
-                for iwin in range(nwin):
-                    wmin, wmax = tmin+iwin*tinc, min(tmin+(iwin+1)*tinc, tmax)
-
-                    chopped = self.get_waveforms(
-                        tmin=wmin-tpad,
-                        tmax=wmax+tpad,
-                        codes=scl,
-                        snap=snap,
-                        include_last=include_last,
-                        load_data=load_data,
-                        want_incomplete=want_incomplete,
-                        degap=degap,
-                        maxgap=maxgap,
-                        maxlap=maxlap,
-                        accessor_id=accessor_id,
-                        operator_params=operator_params)
-
-                    self.advance_accessor(accessor_id)
-
-                    yield Batch(
-                        tmin=wmin,
-                        tmax=wmax,
-                        i=iwin,
-                        n=nwin,
-                        igroup=igroup,
-                        ngroups=ngroups,
-                        traces=chopped)
+            windows = [
+                (igroup, scl, iwin)
+                for igroup, scl in enumerate(codes_list)
+                for iwin in range(nwin)]
+
+            if prefetch and load_data:
+                executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=prefetch)
+
+            for iwindow, (igroup, scl, iwin) in enumerate(windows):
+                wmin, wmax = window(iwin)
+
+                if executor is not None:
+                    for (_, scl_ahead, iwin_ahead) in windows[
+                            (iwindow+prefetch if iwindow != 0 else 0):
+                            iwindow+prefetch+1]:
+
+                        wmin_ahead, wmax_ahead = window(iwin_ahead)
+                        self._prefetch_waveforms(
+                            executor,
+                            wmin_ahead-tpad, wmax_ahead+tpad, scl_ahead,
+                            prefetched_keys)
+
+                chopped = self.get_waveforms(
+                    tmin=wmin-tpad,
+                    tmax=wmax+tpad,
+                    codes=scl,
+                    snap=snap,
+                    include_last=include_last,
+                    load_data=load_data,
+                    want_incomplete=want_incomplete,
+                    degap=degap,
+                    maxgap=maxgap,
+                    maxlap=maxlap,
+                    accessor_id=accessor_id,
+                    operator_params=operator_params)
+
+                self.advance_accessor(accessor_id)
+
+                yield Batch(
+                    tmin=wmin,
+                    tmax=wmax,
+                    i=iwin,
+                    n=nwin,
+                    igroup=igroup,
+                    ngroups=ngroups,
+                    traces=chopped)
 
         finally:
+            if executor is not None:
+                for key in prefetched_keys:
+                    future = self._prefetched.pop(key, None)
+                    if future is not None:
+                        future.cancel()
+
+                executor.shutdown(wait=True)
+
             self._n_choppers_active -= 1
             if clear_accessor:
                 self.clear_accessor(accessor_id, 'waveform')
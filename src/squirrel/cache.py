@@ -3,10 +3,22 @@
 # The Pyrocko Developers, 21st Century
 # ---|P------/S----------~Lg----------
 
+import os
+import copy
+import shutil
+import pickle
 import logging
+import tempfile
+import os.path as op
+from collections import OrderedDict
 
+import numpy as num
+
+from pyrocko import util
 from pyrocko.guts import Object, Int
 
+from .model import ehash
+
 logger = logging.getLogger('psq.cache')
 
 
@@ -19,6 +31,51 @@ class ContentCacheStats(Object):
     naccessors = Int.T(
         help='Number of accessors currently holding references to cache '
              'items.')
+    nbytes = Int.T(
+        default=0,
+        help='Estimated size of the sample data held in the cache [bytes].')
+    size_limit = Int.T(
+        optional=True,
+        help='Size limit of the cache [bytes]. ``None`` means unlimited.')
+    nhits = Int.T(
+        default=0,
+        help='Number of content requests which could be served from the '
+             'cache.')
+    nmisses = Int.T(
+        default=0,
+        help='Number of content requests which could not be served from the '
+             'cache.')
+    nevictions = Int.T(
+        default=0,
+        help='Number of file segments dropped from the cache to stay within '
+             'the size limit.')
+
+
+def get_nbytes(nut):
+    '''
+    Estimate memory size of the sample data attached to a nut.
+
+    Only data arrays (the ``ydata`` attribute of waveform content) are
+    accounted for. Meta-data content is considered to be of negligible size.
+
+    :param nut:
+        Content item with attached data object.
+    :type nut:
+        :py:class:`~pyrocko.squirrel.model.Nut`
+
+    :returns:
+        Size in bytes.
+    '''
+
+    nbytes = 0
+    seen = set()
+    for obj in [nut.content] + list(nut.raw_content.values()):
+        ydata = getattr(obj, 'ydata', None)
+        if ydata is not None and id(ydata) not in seen:
+            seen.add(id(ydata))
+            nbytes += getattr(ydata, 'nbytes', 0)
+
+    return nbytes
 
 
 class ContentCache(object):
@@ -67,11 +124,37 @@ class ContentCache(object):
     event. For a process requiring data from two independent positions of
     extraction, e.g. for cross-correlations between all possible pairs of a set
     of events, two separate accessor names could be used.
+
+    **Size limit**
+
+    Optionally, a size limit can be set for the cache (``size_limit``
+    argument or :py:meth:`set_size_limit`). The cache then keeps track of the
+    memory occupied by the sample data of its items (see :py:func:`get_nbytes`)
+    and releases the least recently used file segments whenever the limit is
+    exceeded - even if they are still referenced by an accessor. Evicted
+    content is transparently re-read from file when it is requested again. The
+    most recently inserted file segment is never evicted, so that a single
+    segment larger than the limit can still be accessed.
+
+    :param size_limit:
+        Maximum size of the cached sample data [bytes]. By default, the size
+        of the cache is not limited.
+    :type size_limit:
+        int
     '''
 
-    def __init__(self):
-        self._entries = {}
+    def __init__(self, size_limit=None):
+        self._entries = OrderedDict()
         self._accessor_ticks = {}
+        self._size_limit = size_limit
+        self._nbytes = 0
+        self._nhits = 0
+        self._nmisses = 0
+        self._nevictions = 0
+
+    def _remove_entry(self, path_segment):
+        entry = self._entries.pop(path_segment)
+        self._nbytes -= entry[3]
 
     def _prune_outdated(self, path, segment, nut_mtime):
         try:
@@ -81,7 +164,30 @@ class ContentCache(object):
 
         if cache_mtime != nut_mtime:
             logger.debug('Forgetting (outdated): %s %s' % (path, segment))
-            del self._entries[path, segment]
+            self._remove_entry((path, segment))
+
+    def _evict(self):
+        if self._size_limit is None:
+            return
+
+        while self._nbytes > self._size_limit and len(self._entries) > 1:
+            path_segment = next(iter(self._entries))
+            logger.debug('Forgetting (size limit): %s %s' % path_segment)
+            self._remove_entry(path_segment)
+            self._nevictions += 1
+
+    def set_size_limit(self, size_limit):
+        '''
+        Set or change the size limit of the cache.
+
+        :param size_limit:
+            Maximum size of the cached sample data [bytes]. ``None`` disables
+            the limit.
+        :type size_limit:
+            int
+        '''
+        self._size_limit = size_limit
+        self._evict()
 
     def put(self, nut):
         '''
@@ -96,9 +202,18 @@ class ContentCache(object):
         self._prune_outdated(path, segment, nut.file_mtime)
 
         if (path, segment) not in self._entries:
-            self._entries[path, segment] = nut.file_mtime, {}, {}
+            self._entries[path, segment] = [nut.file_mtime, {}, {}, 0]
+
+        entry = self._entries[path, segment]
+        nbytes = get_nbytes(nut)
+        if element in entry[1]:
+            nbytes -= get_nbytes(entry[1][element])
 
-        self._entries[path, segment][1][element] = nut
+        entry[1][element] = nut
+        entry[3] += nbytes
+        self._nbytes += nbytes
+        self._entries.move_to_end((path, segment))
+        self._evict()
 
     def get(self, nut, accessor='default', model='squirrel'):
         '''
@@ -126,6 +241,7 @@ class ContentCache(object):
 
         entry[2][accessor] = self._accessor_ticks[accessor]
         el = entry[1][element]
+        self._entries.move_to_end((path, segment))
 
         if model == 'squirrel':
             return el.content
@@ -138,6 +254,9 @@ class ContentCache(object):
         '''
         Check if item's content is currently in cache.
 
+        The outcome is counted as cache hit or miss in the statistics (see
+        :py:meth:`get_stats`).
+
         :param nut:
             Content item.
         :type nut:
@@ -147,6 +266,14 @@ class ContentCache(object):
             :py:class:`bool`
 
         '''
+        if self._has(nut):
+            self._nhits += 1
+            return True
+        else:
+            self._nmisses += 1
+            return False
+
+    def _has(self, nut):
         path, segment, element, nut_mtime = nut.key
 
         try:
@@ -183,7 +310,7 @@ class ContentCache(object):
 
         for path_segment in delete:
             logger.debug('Forgetting (advance): %s %s' % path_segment)
-            del self._entries[path_segment]
+            self._remove_entry(path_segment)
 
         self._accessor_ticks[accessor] += 1
 
@@ -204,7 +331,7 @@ class ContentCache(object):
 
         for path_segment in delete:
             logger.debug('Forgetting (clear): %s %s' % path_segment)
-            del self._entries[path_segment]
+            self._remove_entry(path_segment)
 
         del self._accessor_ticks[accessor]
 
@@ -215,8 +342,9 @@ class ContentCache(object):
         for accessor in list(self._accessor_ticks.keys()):
             self.clear_accessor(accessor)
 
-        self._entries = {}
+        self._entries = OrderedDict()
         self._accessor_ticks = {}
+        self._nbytes = 0
 
     def get_stats(self):
         '''
@@ -226,4 +354,187 @@ class ContentCache(object):
         '''
         return ContentCacheStats(
             nentries=len(self._entries),
-            naccessors=len(self._accessor_ticks))
+            naccessors=len(self._accessor_ticks),
+            nbytes=self._nbytes,
+            size_limit=self._size_limit,
+            nhits=self._nhits,
+            nmisses=self._nmisses,
+            nevictions=self._nevictions)
+
+
+class WaveformDiskCacheStats(Object):
+    '''
+    Information about on-disk waveform cache usage.
+    '''
+    nhits = Int.T(
+        default=0,
+        help='Number of file segments served from the disk cache.')
+    nmisses = Int.T(
+        default=0,
+        help='Number of file segments not found in the disk cache.')
+    nputs = Int.T(
+        default=0,
+        help='Number of file segments written to the disk cache.')
+
+
+class WaveformDiskCache(object):
+    '''
+    Persistent on-disk cache for decoded waveform data.
+
+    Decoding of compressed waveform formats (e.g. STEIM compressed miniSEED)
+    can dominate the cost of data access when the same data is read
+    repeatedly by many processes on the same host. This cache stores the
+    decoded sample arrays of complete file segments, keyed by ``(path,
+    segment, mtime)`` of the original file, in NumPy's ``.npy`` format. When
+    read back, the sample arrays are memory-mapped (copy-on-write), so that no
+    decoding takes place and only the pages actually accessed are read from
+    disk.
+
+    The disk cache is a second level cache: it is consulted by
+    :py:meth:`~pyrocko.squirrel.base.Squirrel.get_content` when waveform
+    content is not available in the memory
+    :py:class:`ContentCache`, before falling back to reading the original
+    file through the io backend.
+
+    Entries are written atomically, so that multiple processes can safely
+    share a cache directory. Outdated entries are never reused because the
+    modification time of the original file is part of the key, but they are
+    also not automatically removed. Use :py:meth:`clear` to purge the cache.
+
+    :param path:
+        Directory where the cache entries are stored.
+    :type path:
+        str
+    '''
+
+    def __init__(self, path):
+        self._path = path
+        self._nhits = 0
+        self._nmisses = 0
+        self._nputs = 0
+
+    def _entry_path(self, path, segment, mtime):
+        h = ehash('%s,%s,%s' % (path, segment, repr(mtime)))
+        return op.join(self._path, h[:2], h)
+
+    def _cachable(self, nut):
+        return not nut.file_path.startswith('virtual:') \
+            and nut.file_mtime is not None
+
+    def get(self, nut):
+        '''
+        Get decoded contents of the file segment containing a given nut.
+
+        :param nut:
+            Content item.
+        :type nut:
+            :py:class:`~pyrocko.squirrel.model.Nut`
+
+        :returns:
+            List of :py:class:`~pyrocko.squirrel.model.Nut` objects with
+            attached content for all elements in the file segment or ``None``
+            if the segment is not available in the cache or if the original
+            file has been modified.
+        '''
+
+        if not self._cachable(nut):
+            return None
+
+        entry_path = self._entry_path(
+            nut.file_path, nut.file_segment, nut.file_mtime)
+
+        try:
+            with open(op.join(entry_path, 'nuts.pickle'), 'rb') as f:
+                nuts = pickle.load(f)
+
+            if nut.file_modified():
+                raise OSError('File modified: %s' % nut.file_path)
+
+            for inut, nut_loaded in enumerate(nuts):
+                nut_loaded.content.ydata = num.load(
+                    op.join(entry_path, '%i.npy' % inut), mmap_mode='c')
+                nut_loaded.content._squirrel_key = nut_loaded.key
+
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            self._nmisses += 1
+            return None
+
+        logger.debug(
+            'Loaded from disk cache: %s %s' % (
+                nut.file_path, nut.file_segment))
+
+        self._nhits += 1
+        return nuts
+
+    def put(self, nuts):
+        '''
+        Store decoded contents of a file segment.
+
+        :param nuts:
+            All content items of a single file segment, with attached
+            :py:class:`~pyrocko.trace.Trace` content. Nothing is stored if
+            any of the items has no sample data attached.
+        :type nuts:
+            :py:class:`list` of :py:class:`~pyrocko.squirrel.model.Nut`
+        '''
+
+        if not nuts or not all(
+                self._cachable(nut)
+                and getattr(nut.content, 'ydata', None) is not None
+                for nut in nuts):
+
+            return
+
+        nut = nuts[0]
+        entry_path = self._entry_path(
+            nut.file_path, nut.file_segment, nut.file_mtime)
+
+        if op.exists(entry_path):
+            return
+
+        util.ensuredir(op.dirname(entry_path))
+        temp_path = tempfile.mkdtemp(dir=op.dirname(entry_path))
+        try:
+            nuts_dump = []
+            for inut, nut in enumerate(nuts):
+                num.save(
+                    op.join(temp_path, '%i.npy' % inut),
+                    nut.content.ydata)
+
+                nut_dump = copy.copy(nut)
+                nut_dump.content = nut.content.copy(data=False)
+                nut_dump.content.ydata = None
+                nuts_dump.append(nut_dump)
+
+            with open(op.join(temp_path, 'nuts.pickle'), 'wb') as f:
+                pickle.dump(nuts_dump, f, protocol=2)
+
+            os.rename(temp_path, entry_path)
+            self._nputs += 1
+
+        except OSError as e:
+            logger.debug(
+                'Could not write to disk cache: %s %s: %s' % (
+                    nut.file_path, nut.file_segment, str(e)))
+
+        finally:
+            if op.exists(temp_path):
+                shutil.rmtree(temp_path)
+
+    def clear(self):
+        '''
+        Remove all entries from the disk cache.
+        '''
+        if op.exists(self._path):
+            shutil.rmtree(self._path)
+
+    def get_stats(self):
+        '''
+        Get information about disk cache usage.
+
+        :returns: :py:class:`WaveformDiskCacheStats` object.
+        '''
+        return WaveformDiskCacheStats(
+            nhits=self._nhits,
+            nmisses=self._nmisses,
+            nputs=self._nputs)
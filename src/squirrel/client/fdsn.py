@@ -9,7 +9,7 @@ import time
 import os
 import copy
 import logging
-import tempfile
+import concurrent.futures
 import importlib.util
 from collections import defaultdict
 try:
@@ -26,7 +26,7 @@ from pyrocko.client import fdsn
 
 from pyrocko import util, trace, io
 from pyrocko.io.io_common import FileLoadError
-from pyrocko.io import stationxml
+from pyrocko.io import stationxml, mseed
 from pyrocko.progress import progress
 from pyrocko import has_paths
 
@@ -273,6 +273,17 @@ class FDSNSource(Source, has_paths.HasPaths):
         optional=True,
         help='Path to Python module to locally patch metadata errors.')
 
+    download_nworkers = Int.T(
+        default=4,
+        help='Maximum number of concurrent waveform download requests.')
+
+    download_batch_size = Int.T(
+        default=20,
+        help='Maximum number of waveform orders combined into a single '
+             'download request. Smaller batches are used automatically when '
+             'the server rejects requests as being too large or does not '
+             'respond in time.')
+
     def __init__(self, site, query_args=None, **kwargs):
         Source.__init__(self, site=site, query_args=query_args, **kwargs)
 
@@ -280,6 +291,8 @@ class FDSNSource(Source, has_paths.HasPaths):
         self._hash = self.make_hash()
         self._source_id = 'client:fdsn:%s' % self._hash
         self._error_infos = []
+        self._executor = None
+        self._batch_size = None
 
     def describe(self):
         return self._source_id
@@ -611,110 +624,219 @@ class FDSNSource(Source, has_paths.HasPaths):
 
         return d
 
+    def _get_executor(self):
+        # Worker threads are kept alive between calls, so that their HTTP
+        # sessions can reuse open connections to the server.
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, self.download_nworkers),
+                thread_name_prefix='fdsn-download')
+
+        return self._executor
+
+    def _download_orders(self, orders):
+        # Runs in download worker threads. Batches rejected by the server as
+        # too large or timing out are split and retried. Returns list of
+        # results (orders, time, traces, exception) and the number of splits
+        # needed.
+
+        session = fdsn.get_session()
+        credentials = self._get_user_credentials()
+
+        results = []
+        nsplits = 0
+        todo = [(orders, 1)]
+        while todo:
+            orders_now, itry = todo.pop(0)
+            self._log_info_data(
+                'downloading, %s' % order_summary(orders_now))
+
+            try:
+                data = fdsn.dataselect(
+                    site=self.site,
+                    selection=orders_to_selection(orders_now),
+                    session=session,
+                    **credentials)
+
+                now = time.time()
+                trs = list(mseed.iload_bytes(data.read()))
+                results.append((orders_now, now, trs, None))
+
+            except (fdsn.RequestEntityTooLarge, fdsn.Timeout) as e:
+                if len(orders_now) > 1:
+                    nsplits += 1
+                    i = len(orders_now) // 2
+                    todo[0:0] = [(orders_now[:i], 1), (orders_now[i:], 1)]
+
+                elif isinstance(e, fdsn.Timeout) and itry < 2:
+                    todo.insert(0, (orders_now, itry + 1))
+
+                else:
+                    results.append((orders_now, time.time(), None, e))
+
+            except (util.DownloadError, FileLoadError) as e:
+                results.append((orders_now, time.time(), None, e))
+
+        return results, nsplits
+
+    def _handle_downloaded(
+            self, orders_now, now, trs, exception, elog, success,
+            error_permanent, error_temporary):
+
+        paths_added = []
+        nsuccess = 0
+
+        if isinstance(exception, fdsn.EmptyResult):
+            for order in orders_now:
+                elog.append(now, order, 'empty result')
+                error_permanent(order)
+
+        elif isinstance(exception, fdsn.RequestEntityTooLarge):
+            for order in orders_now:
+                elog.append(now, order, 'request too large')
+                error_permanent(order)
+
+        elif isinstance(exception, fdsn.Timeout):
+            for order in orders_now:
+                elog.append(now, order, 'timeout', str(exception))
+                error_temporary(order)
+
+        elif isinstance(exception, FileLoadError):
+            for order in orders_now:
+                elog.append(now, order, 'invalid data', str(exception))
+                error_temporary(order)
+
+        elif exception is not None:
+            for order in orders_now:
+                elog.append(now, order, 'http error', str(exception))
+                error_temporary(order)
+
+        else:
+            by_nslc = defaultdict(list)
+            for tr in trs:
+                by_nslc[tr.nslc_id].append(tr)
+
+            for order in orders_now:
+                trs_order = []
+                err_this = None
+                for tr in by_nslc[order.codes.nslc]:
+                    try:
+                        order.validate(tr)
+                        trs_order.append(tr.chop(
+                            order.tmin, order.tmax, inplace=False))
+
+                    except trace.NoData:
+                        err_this = (
+                            'empty result', 'empty sub-interval')
+
+                    except InvalidWaveform as e:
+                        err_this = ('invalid waveform', str(e))
+
+                if len(trs_order) == 0:
+                    if err_this is None:
+                        err_this = ('empty result', '')
+
+                    elog.append(now, order, *err_this)
+                    error_permanent(order)
+                else:
+                    if len(trs_order) != 1:
+                        if err_this:
+                            elog.append(
+                                now, order,
+                                'partial result, %s' % err_this[0],
+                                err_this[1])
+                        else:
+                            elog.append(now, order, 'partial result')
+
+                    paths = self._archive.add(trs_order)
+                    paths_added.extend(paths)
+
+                    nsuccess += 1
+                    success(order)
+
+        return paths_added, nsuccess
+
     def download_waveforms(
             self, orders, success, batch_add, error_permanent,
             error_temporary):
 
-        elog = ErrorLog(site=self.site)
-        orders.sort(key=orders_sort_key)
-        neach = 20
-        i = 0
-        task = make_task(
-            'FDSN "%s" waveforms: downloading' % self.site, len(orders))
+        '''
+        Download waveforms for given orders.
 
-        while i < len(orders):
-            orders_now = orders[i:i+neach]
-            selection_now = orders_to_selection(orders_now)
+        Orders are combined into batches, each being fetched with a single
+        POST request. Up to :py:gattr:`download_nworkers` requests are run
+        concurrently. The batch size adapts to the server: it is reduced when
+        requests are rejected as too large or time out and grows again after
+        successful requests.
+        '''
 
-            nsuccess = 0
-            elog.append_checkpoint()
-            self._log_info_data(
-                'downloading, %s' % order_summary(orders_now))
+        elog = ErrorLog(site=self.site)
+        orders = sorted(orders, key=orders_sort_key)
+        batch_size_max = max(1, self.download_batch_size)
+        if self._batch_size is None:
+            self._batch_size = batch_size_max
 
-            all_paths = []
-            with tempfile.TemporaryDirectory() as tmpdir:
-                try:
-                    data = fdsn.dataselect(
-                        site=self.site, selection=selection_now,
-                        **self._get_user_credentials())
-
-                    now = time.time()
-
-                    path = op.join(tmpdir, 'tmp.mseed')
-                    with open(path, 'wb') as f:
-                        while True:
-                            buf = data.read(1024)
-                            if not buf:
-                                break
-                            f.write(buf)
-
-                    trs = io.load(path)
-
-                    by_nslc = defaultdict(list)
-                    for tr in trs:
-                        by_nslc[tr.nslc_id].append(tr)
-
-                    for order in orders_now:
-                        trs_order = []
-                        err_this = None
-                        for tr in by_nslc[order.codes.nslc]:
-                            try:
-                                order.validate(tr)
-                                trs_order.append(tr.chop(
-                                    order.tmin, order.tmax, inplace=False))
-
-                            except trace.NoData:
-                                err_this = (
-                                    'empty result', 'empty sub-interval')
-
-                            except InvalidWaveform as e:
-                                err_this = ('invalid waveform', str(e))
-
-                        if len(trs_order) == 0:
-                            if err_this is None:
-                                err_this = ('empty result', '')
-
-                            elog.append(now, order, *err_this)
-                            error_permanent(order)
-                        else:
-                            if len(trs_order) != 1:
-                                if err_this:
-                                    elog.append(
-                                        now, order,
-                                        'partial result, %s' % err_this[0],
-                                        err_this[1])
-                                else:
-                                    elog.append(now, order, 'partial result')
-
-                            paths = self._archive.add(trs_order)
-                            all_paths.extend(paths)
-
-                            nsuccess += 1
-                            success(order)
-
-                except fdsn.EmptyResult:
-                    now = time.time()
-                    for order in orders_now:
-                        elog.append(now, order, 'empty result')
-                        error_permanent(order)
-
-                except util.HTTPError as e:
-                    now = time.time()
-                    for order in orders_now:
-                        elog.append(now, order, 'http error', str(e))
-                        error_temporary(order)
-
-            emessage = elog.summarize_recent()
-            self._log_info_data(
-                '%i download%s successful' % (
-                    nsuccess, util.plural_s(nsuccess))
-                + (', %s' % emessage if emessage else ''))
+        task = make_task(
+            'FDSN "%s" waveforms: downloading' % self.site, len(orders))
 
-            if all_paths:
-                batch_add(all_paths)
+        executor = self._get_executor()
+        nworkers = max(1, self.download_nworkers)
 
-            i += neach
-            task.update(i)
+        i = 0
+        ndone = 0
+        running = {}
+        try:
+            while i < len(orders) or running:
+                while i < len(orders) and len(running) < nworkers:
+                    orders_now = orders[i:i+self._batch_size]
+                    future = executor.submit(
+                        self._download_orders, orders_now)
+
+                    running[future] = orders_now
+                    i += len(orders_now)
+
+                done, _ = concurrent.futures.wait(
+                    list(running.keys()),
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+
+                for future in done:
+                    orders_batch = running.pop(future)
+                    results, nsplits = future.result()
+
+                    if nsplits:
+                        self._batch_size = max(1, min(
+                            len(result[0]) for result in results))
+                    else:
+                        self._batch_size = min(
+                            batch_size_max,
+                            self._batch_size + max(1, self._batch_size // 2))
+
+                    nsuccess = 0
+                    all_paths = []
+                    elog.append_checkpoint()
+                    for orders_now, now, trs, exception in results:
+                        paths, nsuccess_this = self._handle_downloaded(
+                            orders_now, now, trs, exception, elog, success,
+                            error_permanent, error_temporary)
+
+                        all_paths.extend(paths)
+                        nsuccess += nsuccess_this
+
+                    emessage = elog.summarize_recent()
+                    self._log_info_data(
+                        '%i download%s successful' % (
+                            nsuccess, util.plural_s(nsuccess))
+                        + (', %s' % emessage if emessage else ''))
+
+                    if all_paths:
+                        batch_add(all_paths)
+
+                    ndone += len(orders_batch)
+                    task.update(ndone)
+
+        finally:
+            for future in running:
+                future.cancel()
 
         for agg in elog.iter_aggregates():
             logger.warning(str(agg))
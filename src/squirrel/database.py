@@ -213,6 +213,7 @@ class Database(object):
             self._conn.set_trace_callback(self._log_statement)
 
         self._listeners = []
+        self._have_record_index = False
         self._initialize_db()
         self._basepath = None
 
@@ -325,6 +326,7 @@ class Database(object):
                         'upgrade the Pyrocko library.'
                         % ((self._database_path, ) + self.version))
 
+                self._initialize_record_index(cursor)
                 return
 
             cursor.execute(self._register_table(
@@ -456,6 +458,67 @@ class Database(object):
                         name text UNIQUE)
                 '''))
 
+            self._initialize_record_index(cursor)
+
+    def _initialize_record_index(self, cursor):
+        # Table added after database version 1.0. It is created on demand,
+        # also in existing databases. Older versions of the library ignore
+        # it, the triggers keep it consistent. If it cannot be added, e.g.
+        # to a read-only database, the database is used without it.
+
+        sql_create_table = self._register_table(
+            '''
+                CREATE TABLE IF NOT EXISTS record_index (
+                    file_id integer,
+                    file_segment integer,
+                    file_element integer,
+                    records blob)
+            ''')
+
+        if 1 == len(list(
+                cursor.execute(
+                    '''
+                        SELECT name FROM sqlite_master
+                            WHERE type = 'table' AND name == 'record_index'
+                    '''))):
+
+            self._have_record_index = True
+            return
+
+        try:
+            cursor.execute(sql_create_table)
+
+            cursor.execute(
+                '''
+                    CREATE UNIQUE INDEX IF NOT EXISTS index_record_index
+                    ON record_index (file_id, file_segment, file_element)
+                ''')
+
+            cursor.execute(
+                '''
+                    CREATE TRIGGER IF NOT EXISTS delete_records_on_delete_file
+                    BEFORE DELETE ON files FOR EACH ROW
+                    BEGIN
+                      DELETE FROM record_index where file_id == old.file_id;
+                    END
+                ''')
+
+            cursor.execute(
+                '''
+                    CREATE TRIGGER IF NOT EXISTS delete_records_on_update_file
+                    BEFORE UPDATE OF size ON files FOR EACH ROW
+                    BEGIN
+                      DELETE FROM record_index where file_id == old.file_id;
+                    END
+                ''')
+
+            self._have_record_index = True
+
+        except sqlite3.OperationalError as e:
+            logger.warning(
+                'Cannot add record index to database "%s", partial waveform '
+                'reads are disabled: %s' % (self._database_path, e))
+
     def dig(self, nuts, transaction=None):
         '''
         Store or update content meta-information.
@@ -522,6 +585,54 @@ class Database(object):
                   nut.tmax_seconds, nut.tmax_offset,
                   nut.kscale) for nut in nuts))
 
+            if not self._have_record_index:
+                return
+
+            c.executemany(
+                '''
+                    INSERT OR REPLACE INTO record_index VALUES
+                        ((
+                            SELECT file_id FROM files
+                            WHERE path == ?
+                         ),?,?,?)
+                ''',
+                ((self.relpath(nut.file_path),
+                  nut.file_segment, nut.file_element,
+                  sqlite3.Binary(nut.record_index))
+                 for nut in nuts if nut.record_index is not None))
+
+    def get_record_index(self, nut):
+        '''
+        Get record index stored for a given nut.
+
+        The record index is provided by the io backend during indexing and
+        describes where the pieces of the content are located within the file.
+        Its layout is specific to the io backend.
+
+        :returns: :py:class:`bytes` or ``None`` if not available
+        '''
+
+        if not self._have_record_index:
+            return None
+
+        sql = '''
+            SELECT record_index.records
+            FROM files
+            INNER JOIN record_index ON files.file_id == record_index.file_id
+            WHERE files.path == ?
+                AND record_index.file_segment == ?
+                AND record_index.file_element == ?
+        '''
+
+        for row in self._conn.execute(sql, (
+                self.relpath(nut.file_path),
+                nut.file_segment,
+                nut.file_element)):
+
+            return bytes(row[0])
+
+        return None
+
     def undig(self, path):
 
         path = self.relpath(abspath(path))
@@ -5,11 +5,27 @@
 
 from __future__ import absolute_import, print_function
 
-from pyrocko.io.io_common import get_stats, touch  # noqa
+import mmap
+import logging
+from collections import defaultdict
+
+import numpy as num
+
+from pyrocko.io.io_common import get_stats, touch, FileLoadError  # noqa
 from ... import model
 
+logger = logging.getLogger('psq.io.mseed')
+
 SEGMENT_SIZE = 1024*1024
 
+# Layout of the record index stored in the database for each waveform nut.
+# Record start and end times refer to the first and last sample.
+g_record_dtype = num.dtype([
+    ('offset', num.int64),
+    ('length', num.int32),
+    ('tmin', num.float64),
+    ('tmax', num.float64)])
+
 
 def provided_formats():
     return ['mseed']
@@ -24,6 +40,58 @@ def detect(first512):
         return None
 
 
+def get_records(file_path):
+    '''
+    Scan record headers of a file.
+
+    :returns: dict with ``(network, station, location, channel)`` as keys and
+        record arrays of type :py:data:`g_record_dtype` as values, or ``None``
+        if the file cannot be scanned.
+    '''
+
+    from pyrocko import mseed_ext
+
+    try:
+        with open(file_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                rec_tuples = mseed_ext.get_records(mm)
+
+    except (OSError, ValueError, mseed_ext.MSeedError) as e:
+        logger.debug(
+            'Cannot build record index for file %s: %s' % (file_path, e))
+        return None
+
+    by_nslc = defaultdict(list)
+    for (network, station, location, channel, offset, length, itmin, itmax,
+            _, _) in rec_tuples:
+
+        by_nslc[network, station, location, channel].append(
+            (offset, length,
+             itmin / mseed_ext.HPTMODULUS,
+             itmax / mseed_ext.HPTMODULUS))
+
+    return dict(
+        (nslc, num.array(records, dtype=g_record_dtype))
+        for (nslc, records) in by_nslc.items())
+
+
+def make_record_index(records, offset_start, offset_end, tmin, tmax, deltat):
+    '''
+    Select records belonging to a waveform nut and pack them for storage.
+    '''
+
+    mask = num.logical_and.reduce((
+        records['offset'] >= offset_start,
+        records['offset'] < offset_end,
+        records['tmin'] >= tmin - 0.5*deltat,
+        records['tmin'] < tmax))
+
+    if not num.any(mask):
+        return None
+
+    return records[mask].tobytes()
+
+
 def iload(format, file_path, segment, content):
     assert format == 'mseed'
     from pyrocko.io import mseed
@@ -37,6 +105,10 @@ def iload(format, file_path, segment, content):
         offset = segment
         nsegments = 1
 
+    records = None
+    if segment is None and not load_data:
+        records = get_records(file_path)
+
     file_segment = None
     itr = 0
     for tr in mseed.iload(
@@ -56,8 +128,62 @@ def iload(format, file_path, segment, content):
             tmax=tr.tmin + tr.deltat * nsamples,
             deltat=tr.deltat)
 
+        if records is not None and tr.nslc_id in records:
+            # offset_end is not advanced when the segment reaches the end of
+            # the file
+            offset_end = tr.meta['offset_end'] \
+                if not tr.meta['last'] else num.iinfo(num.int64).max
+
+            nut.record_index = make_record_index(
+                records[tr.nslc_id],
+                tr.meta['offset_start'], offset_end,
+                nut.tmin, nut.tmax, tr.deltat)
+
         if 'waveform' in content:
             nut.content = tr
 
         yield nut
         itr += 1
+
+
+def iload_records(nut, record_index, tmin, tmax):
+    '''
+    Read only those records of a waveform nut which overlap a time span.
+
+    The file is memory-mapped and the selected records are decoded in place.
+    Runs of adjacent records are decoded together. Yields traces, which are
+    not cut to the requested time span.
+    '''
+
+    from pyrocko.io import mseed
+
+    records = num.frombuffer(record_index, dtype=g_record_dtype)
+    deltat = nut.deltat or 0.0
+    records = records[num.logical_and(
+        records['tmax'] >= tmin - deltat,
+        records['tmin'] <= tmax + deltat)]
+
+    if records.size == 0:
+        return
+
+    offsets = records['offset']
+    ends = offsets + records['length']
+    breaks = num.nonzero(offsets[1:] != ends[:-1])[0] + 1
+    istarts = num.concatenate([[0], breaks])
+    iends = num.concatenate([breaks, [records.size]])
+
+    try:
+        with open(nut.file_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as data:
+                    traces = []
+                    for istart, iend in zip(istarts, iends):
+                        with data[offsets[istart]:ends[iend-1]] as run:
+                            traces.extend(mseed.iload_bytes(run))
+
+    except (OSError, ValueError) as e:
+        raise FileLoadError(
+            'Cannot read records from file %s: %s' % (nut.file_path, e))
+
+    for tr in traces:
+        yield tr
@@ -29,7 +29,64 @@ def detect(first512):
     return None
 
 
+def _channel_span(channel, far_future):
+    tmin = channel.start_date
+    tmax = channel.end_date
+    if tmax is not None and tmax > far_future:
+        tmax = None
+
+    deltat = None
+    if channel.sample_rate is not None \
+            and channel.sample_rate.value != 0.0:
+
+        deltat = 1.0 / channel.sample_rate.value
+
+    return tmin, tmax, deltat
+
+
+def _make_response_nut(codes, channel, offset, far_future):
+    tmin, tmax, deltat = _channel_span(channel, far_future)
+    return model.make_response_nut(
+        file_segment=offset,
+        file_element=0,
+        codes=model.CodesNSLCE(*(codes + ('',))),
+        tmin=tmin,
+        tmax=tmax,
+        deltat=deltat)
+
+
+def _convert_response(nut, codes, response, want_content):
+    from pyrocko.io import stationxml
+
+    context = '.'.join(codes)
+    try:
+        resp = response.get_squirrel_response(
+            context, **nut.response_kwargs)
+
+    except stationxml.StationXMLError as e:
+        logger.warning(
+            'Bad instrument response (%s): %s' % (context, str(e)))
+        return False
+
+    if want_content:
+        nut.content = resp
+        nut.raw_content['stationxml'] = response
+
+    return True
+
+
 def iload(format, file_path, segment, content):
+    '''
+    Read StationXML file.
+
+    Stations and channels are indexed under file segment 0. The file is
+    streamed and ``<Response>`` elements are skipped while indexing. Each
+    response is assigned its own file segment, namely the byte offset of the
+    channel it belongs to, so that loading it only requires parsing of that
+    single channel element. Responses which cannot be converted are reported
+    when they are loaded.
+    '''
+
     assert format == 'stationxml'
 
     far_future = time.time() + 20*Y
@@ -37,14 +94,29 @@ def iload(format, file_path, segment, content):
     from pyrocko.io import stationxml
     value_or_none = stationxml.value_or_none
 
-    sx = stationxml.load_xml(filename=file_path)
+    if segment:
+        codes, channel = stationxml.load_channel_xml(file_path, segment)
+        if channel.response:
+            nut = _make_response_nut(codes, channel, segment, far_future)
+            if _convert_response(
+                    nut, codes, channel.response, 'response' in content):
+
+                yield nut
+
+        return
+
+    # responses belong to their own segments and are only needed here when
+    # indexing the file
+    indexing = segment is None
 
     inut = 0
 
-    for network in sx.network_list:
-        for station in network.station_list:
-            net = network.code
-            sta = station.code
+    for codes, node, offset, response_pending in \
+            stationxml.iload_xml_nodes(filename=file_path, responses=False):
+
+        if isinstance(node, stationxml.Station):
+            station = node
+            net, sta = codes
 
             tmin = station.start_date
             tmax = station.end_date
@@ -65,76 +137,40 @@ def iload(format, file_path, segment, content):
                     elevation=value_or_none(station.elevation),
                     **station_nut.station_kwargs)
 
-                station_copy = copy.copy(station)
-                station_copy.channel_list = []
-
-                station_nut.raw_content['stationxml'] = station_copy
+                station_nut.raw_content['stationxml'] = station
 
             yield station_nut
             inut += 1
 
-            for channel in station.channel_list:
-                cha = channel.code
-                loc = channel.location_code.strip()
-
-                tmin = channel.start_date
-                tmax = channel.end_date
-                if tmax is not None and tmax > far_future:
-                    tmax = None
-
-                deltat = None
-                if channel.sample_rate is not None \
-                        and channel.sample_rate.value != 0.0:
-
-                    deltat = 1.0 / channel.sample_rate.value
-
-                nut = model.make_channel_nut(
-                    file_segment=0,
-                    file_element=inut,
-                    codes=model.CodesNSLCE(net, sta, loc, cha, ''),
-                    tmin=tmin,
-                    tmax=tmax,
-                    deltat=deltat)
-
-                if 'channel' in content:
-                    nut.content = model.Channel(
-                        lat=channel.latitude.value,
-                        lon=channel.longitude.value,
-                        elevation=value_or_none(channel.elevation),
-                        depth=value_or_none(channel.depth),
-                        azimuth=value_or_none(channel.azimuth),
-                        dip=value_or_none(channel.dip),
-                        **nut.channel_kwargs)
-
-                    channel_copy = copy.copy(channel)
-                    channel_copy.response = None
-                    nut.raw_content['stationxml'] = channel_copy
-
-                yield nut
-                inut += 1
-
-                context = '%s.%s.%s.%s' % (net, sta, loc, cha)
+        elif isinstance(node, stationxml.Channel):
+            channel = node
+            net, sta, loc, cha = codes
+            tmin, tmax, deltat = _channel_span(channel, far_future)
 
-                if channel.response:
-
-                    nut = model.make_response_nut(
-                        file_segment=0,
-                        file_element=inut,
-                        codes=model.CodesNSLCE(net, sta, loc, cha, ''),
-                        tmin=tmin,
-                        tmax=tmax,
-                        deltat=deltat)
-
-                    try:
-                        resp = channel.response.get_squirrel_response(
-                            context, **nut.response_kwargs)
-
-                        if 'response' in content:
-                            nut.content = resp
-                            nut.raw_content['stationxml'] = channel.response
-
-                        yield nut
-                        inut += 1
+            nut = model.make_channel_nut(
+                file_segment=0,
+                file_element=inut,
+                codes=model.CodesNSLCE(net, sta, loc, cha, ''),
+                tmin=tmin,
+                tmax=tmax,
+                deltat=deltat)
+
+            if 'channel' in content:
+                nut.content = model.Channel(
+                    lat=channel.latitude.value,
+                    lon=channel.longitude.value,
+                    elevation=value_or_none(channel.elevation),
+                    depth=value_or_none(channel.depth),
+                    azimuth=value_or_none(channel.azimuth),
+                    dip=value_or_none(channel.dip),
+                    **nut.channel_kwargs)
+
+                channel_copy = copy.copy(channel)
+                channel_copy.response = None
+                nut.raw_content['stationxml'] = channel_copy
+
+            yield nut
+            inut += 1
 
-                    except stationxml.StationXMLError as e:
-                        logger.debug('Bad instrument response: %s' % str(e))
+            if indexing and response_pending:
+                yield _make_response_nut(codes, channel, offset, far_future)
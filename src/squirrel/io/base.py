@@ -7,6 +7,7 @@ from __future__ import absolute_import, print_function
 
 import time
 import logging
+import collections
 from builtins import str as newstr
 
 from pyrocko import util
@@ -128,6 +129,47 @@ def supported_content_kinds():
     return g_content_kinds + ['waveform_promise']
 
 
+def _iload_file(format, path, segment, content):
+    mod = get_backend(format)
+    mtime, size = mod.get_stats(path)
+
+    if segment is not None:
+        logger.debug(
+            'Reading file "%s", segment "%s".' % (path, segment))
+    else:
+        logger.debug(
+            'Reading file "%s".' % path)
+
+    for nut in mod.iload(format, path, segment, content):
+        nut.file_path = path
+        nut.file_format = format
+        nut.file_mtime = mtime
+        nut.file_size = size
+        if nut.content is not None:
+            nut.content._squirrel_key = nut.key
+
+        yield nut
+
+
+def _load_file(job):
+    # Worker function for parallel loading. Exceptions of type FileLoadError
+    # are passed back to the caller as value, so that they can be handled in
+    # the same way as in the serial case.
+
+    format, path, segment, content = job
+    if format is None:
+        return None
+
+    try:
+        if format == 'detect':
+            format = detect_format(path)
+
+        return format, list(_iload_file(format, path, segment, content)), None
+
+    except FileLoadError as e:
+        return format, None, e
+
+
 def iload(
         paths,
         segment=None,
@@ -137,7 +179,8 @@ def iload(
         skip_unchanged=False,
         content=g_content_kinds,
         show_progress=True,
-        update_selection=None):
+        update_selection=None,
+        nworkers=None):
 
     '''
     Iteratively load content or index/reindex meta-information from files.
@@ -186,6 +229,15 @@ def iload(
     :type content:
         :py:class:`list` of :py:class:`str`
 
+    :param nworkers:
+        Number of worker processes to use for format detection and reading of
+        new or modified files. By default (``None`` or ``1``), files are read
+        in the calling process. With multiple workers, the resulting
+        meta-information is still written to the database by the calling
+        process only. Cannot be combined with ``segment``.
+    :type nworkers:
+        int
+
     This generator yields :py:class:`~pyrocko.squirrel.model.Nut` objects for
     individual pieces of information found when reading the given files. Such a
     nut may represent a waveform, a station, a channel, an event or other data
@@ -194,7 +246,8 @@ def iload(
     is stored in the squirrel meta-information database. If possible, this
     function avoids accessing the actual disk files and provides the requested
     information straight from the database. Modified files are recognized and
-    reindexed as needed.
+    reindexed as needed. Updates to the database are collected and written in
+    batches.
     '''
 
     from ..selection import Selection
@@ -204,6 +257,8 @@ def iload(
     selection = None
     kind_ids = to_kind_ids(content)
 
+    parallel = nworkers is not None and nworkers > 1
+
     if isinstance(paths, (str, newstr)):
         paths = [paths]
     else:
@@ -225,6 +280,10 @@ def iload(
             raise TypeError(
                 'iload: need selection when called with "skip_unchanged=True"')
 
+    if parallel and segment is not None:
+        raise TypeError(
+            'iload: segment argument cannot be used with multiple workers')
+
     temp_selection = None
     transaction = None
     if database:
@@ -281,22 +340,42 @@ def iload(
     n_files = 0
     tcommit = time.time()
 
-    clean = False
-    try:
-        for (format, path), old_nuts in it:
-            if task is not None:
-                condition = '(nuts: %i from file, %i from cache)\n  %s' % (
-                    n_load, n_db, path)
-                task.update(n_files, condition)
+    dig_nuts = []
+    dig_paths = []
 
-            n_files += 1
-            if database and transaction:
-                tnow = time.time()
-                if tnow - tcommit > 20. or n_files % 1000 == 0:
-                    transaction.commit()
-                    tcommit = tnow
-                    transaction.begin()
+    def begin_transaction():
+        nonlocal transaction
+        if not transaction:
+            transaction = database.transaction('update content index')
+            transaction.begin()
 
+    def flush_dig():
+        if not dig_paths:
+            return
+
+        begin_transaction()
+        database.dig(dig_nuts, transaction=transaction)
+        if update_selection is not None:
+            update_selection._set_file_states_force_check(
+                dig_paths, transaction=transaction)
+            update_selection._update_nuts(transaction=transaction)
+
+        del dig_nuts[:]
+        del dig_paths[:]
+
+    def reset(path):
+        logger.error('Cannot read file: %s' % path)
+        if database:
+            begin_transaction()
+            database.reset(path, transaction=transaction)
+
+    def plan():
+        # Decide for each file, whether the inventory from the database can
+        # be used or if the file has to be read. Yields tuples
+        # (path, old_nuts, modified, format), where format is None if the
+        # file does not have to be read and old_nuts is None if the file
+        # cannot be accessed.
+        for (format, path), old_nuts in it:
             try:
                 if check and old_nuts and old_nuts[0].file_modified():
                     old_nuts = []
@@ -314,49 +393,93 @@ def iload(
                         for nut in old_nuts)
 
                     if db_only_operation:
-                        # logger.debug('using cached information for file %s, '
-                        #              % path)
+                        yield path, old_nuts, modified, None
+                        continue
 
-                        for nut in old_nuts:
-                            if nut.kind_id in kind_ids:
-                                database.undig_content(nut)
+                if format == 'detect' and old_nuts \
+                        and not old_nuts[0].file_modified():
 
-                            n_db += 1
-                            yield nut
+                    format = old_nuts[0].file_format
 
-                        continue
+            except FileLoadError:
+                yield path, None, None, None
+                continue
 
-                if format == 'detect':
-                    if old_nuts and not old_nuts[0].file_modified():
-                        format_this = old_nuts[0].file_format
-                    else:
-                        format_this = detect_format(path)
-                else:
-                    format_this = format
+            yield path, old_nuts, modified, format
 
-                mod = get_backend(format_this)
-                mtime, size = mod.get_stats(path)
+    if parallel:
+        from pyrocko.parimap import parimap
 
-                if segment is not None:
-                    logger.debug(
-                        'Reading file "%s", segment "%s".' % (path, segment))
-                else:
-                    logger.debug(
-                        'Reading file "%s".' % path)
-
-                nuts = []
-                for nut in mod.iload(format_this, path, segment, content):
-                    nut.file_path = path
-                    nut.file_format = format_this
-                    nut.file_mtime = mtime
-                    nut.file_size = size
-                    if nut.content is not None:
-                        nut.content._squirrel_key = nut.key
-
-                    nuts.append(nut)
-                    n_load += 1
+        planned = collections.deque()
+
+        def jobs():
+            for entry in plan():
+                planned.append(entry)
+                path, _, _, format = entry
+                yield format, path, segment, content
+
+        results = parimap(_load_file, jobs(), nprocs=nworkers)
+
+        def loaded():
+            for result in results:
+                yield planned.popleft() + (result,)
+
+    clean = False
+    try:
+        for (path, old_nuts, modified, format_this, result) in (
+                loaded() if parallel
+                else (entry + (None,) for entry in plan())):
+
+            if task is not None:
+                condition = '(nuts: %i from file, %i from cache)\n  %s' % (
+                    n_load, n_db, path)
+                task.update(n_files, condition)
+
+            n_files += 1
+            if database and transaction:
+                tnow = time.time()
+                if tnow - tcommit > 20. or n_files % 1000 == 0:
+                    flush_dig()
+                    transaction.commit()
+                    tcommit = tnow
+                    transaction.begin()
+
+            if old_nuts is None:
+                reset(path)
+                continue
+
+            if format_this is None:
+                for nut in old_nuts:
+                    if nut.kind_id in kind_ids:
+                        database.undig_content(nut)
+
+                    n_db += 1
                     yield nut
 
+                continue
+
+            try:
+                if parallel:
+                    format_this, nuts, exception = result
+                    if exception is not None:
+                        raise exception
+
+                    for nut in nuts:
+                        n_load += 1
+                        yield nut
+
+                else:
+                    if format_this == 'detect':
+                        format_this = detect_format(path)
+
+                    nuts = []
+                    for nut in _iload_file(
+                            format_this, path, segment, content):
+
+                        nuts.append(nut)
+                        n_load += 1
+                        yield nut
+
                 if database and nuts != old_nuts:
                     if old_nuts or modified:
                         logger.debug(
@@ -364,32 +487,15 @@ def iload(
                             % path)
 
                     if segment is not None:
-                        nuts = list(mod.iload(format_this, path, None, []))
-                        for nut in nuts:
-                            nut.file_path = path
-                            nut.file_format = format_this
-                            nut.file_mtime = mtime
-                            nut.file_size = size
-
-                    if not transaction:
-                        transaction = database.transaction(
-                            'update content index')
-                        transaction.begin()
-
-                    database.dig(nuts, transaction=transaction)
-                    if update_selection is not None:
-                        update_selection._set_file_states_force_check(
-                            [path], transaction=transaction)
-                        update_selection._update_nuts(transaction=transaction)
+                        nuts = list(_iload_file(format_this, path, None, []))
+
+                    dig_nuts.extend(nuts)
+                    dig_paths.append(path)
+                    if len(dig_paths) >= 100:
+                        flush_dig()
 
             except FileLoadError:
-                logger.error('Cannot read file: %s' % path)
-                if database:
-                    if not transaction:
-                        transaction = database.transaction(
-                            'update content index')
-                        transaction.begin()
-                    database.reset(path, transaction=transaction)
+                reset(path)
 
         clean = True
 
@@ -402,6 +508,9 @@ def iload(
             else:
                 task.fail(condition + ' terminated')
 
+        if database:
+            flush_dig()
+
         if database and transaction:
             transaction.commit()
             transaction.close()
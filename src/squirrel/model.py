@@ -1180,6 +1180,7 @@ class Nut(Object):
     raw_content = Dict.T(String.T(), Any.T())
 
     content_in_db = False
+    record_index = None
 
     def __init__(
             self,
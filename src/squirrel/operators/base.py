@@ -11,6 +11,7 @@ import re
 from ..model import QuantityType, match_codes, CodesNSLCE
 from .. import error
 
+from pyrocko import trace
 from pyrocko.guts import Object, String, Duration, Float, clone, List
 
 guts_prefix = 'squirrel.ops'
@@ -350,18 +351,16 @@ class Restitution(Operator):
             params.frequency_max,
             params.frequency_max * params.frequency_taper_factor)
 
-        trs_rest = []
-        for tr in trs:
-            tr_rest = tr.transfer(
-                tfade=tpad,
-                freqlimits=freqlimits,
-                transfer_function=resp,
-                invert=True)
+        trs_rest = trace.transfer_many(
+            trs,
+            tfade=tpad,
+            freqlimits=freqlimits,
+            transfer_functions=resp,
+            invert=True)
 
+        for tr_rest in trs_rest:
             tr_rest.set_codes(*out_codes[0])
 
-            trs_rest.append(tr_rest)
-
         return trs_rest
 
 
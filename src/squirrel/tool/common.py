@@ -297,8 +297,8 @@ class SquirrelArgumentParser(PyrockoArgumentParser):
         :py:class:`~pyrocko.squirrel.base.Squirrel` instance.
 
         This will  optional arguments ``--add``, ``--include``, ``--exclude``,
-        ``--optimistic``, ``--format``, ``--add-only``, ``--persistent``, and
-        ``--dataset``.
+        ``--optimistic``, ``--format``, ``--add-only``, ``--persistent``,
+        ``--dataset``, and ``--nworkers``.
 
         Call ``args.make_squirrel()`` on the arguments returned from
         :py:meth:`parse_args` to finally instantiate and configure the
@@ -395,7 +395,7 @@ def add_squirrel_selection_arguments(parser):
 
     This will  optional arguments ``--add``, ``--include``, ``--exclude``,
     ``--optimistic``, ``--format``, ``--add-only``, ``--persistent``,
-    and ``--dataset`` to a given argument parser.
+    ``--dataset``, and ``--nworkers`` to a given argument parser.
 
     Once finished with parsing, call
     :py:func:`squirrel_from_selection_arguments` to finally instantiate and
@@ -486,6 +486,15 @@ def add_squirrel_selection_arguments(parser):
              'datasets. Run ```squirrel template``` to obtain examples of '
              'dataset description files.')
 
+    group.add_argument(
+        '--nworkers',
+        dest='nworkers',
+        type=int,
+        metavar='N',
+        help='Run ``N`` worker processes in parallel when indexing new or '
+             'modified files. By default, files are indexed in a single '
+             'process.')
+
 
 def squirrel_from_selection_arguments(args):
     '''
@@ -515,7 +524,8 @@ def squirrel_from_selection_arguments(args):
             format=args.format,
             kinds=args.kinds_add or None,
             include=args.include,
-            exclude=args.exclude)
+            exclude=args.exclude,
+            nworkers=args.nworkers)
 
     for dataset_path in args.datasets:
         squirrel.add_dataset(dataset_path, check=args.check)
@@ -10,12 +10,15 @@ import os
 import signal
 import select
 import logging
-import tempfile
+import asyncio
+from xml.etree import ElementTree
 
 from pyrocko.io import mseed
+from pyrocko.io.io_common import FileLoadError
 
 logger = logging.getLogger('pyrocko.streaming.slink')
 RECORD_LENGTH = 512
+PACKET_HEADER_LENGTH = 8
 
 
 def preexec():
@@ -114,17 +117,11 @@ class SlowSlink(object):
             if not ready:
                 return False
 
-            line = self.slink.stdout.read(RECORD_LENGTH)
+            record = self.slink.stdout.read(RECORD_LENGTH)
+            for tr in decode_record(record):
+                self.got_trace(tr)
 
-            with tempfile.NamedTemporaryFile(prefix='slink-stream') as f:
-                f.write(line)
-                f.flush()
-
-                traces = mseed.iload(f.name)
-                for tr in traces:
-                    self.got_trace(tr)
-
-                return True
+            return True
 
         except Exception as e:
             logger.debug(e)
@@ -132,3 +129,354 @@ class SlowSlink(object):
 
     def got_trace(self, tr):
         logger.info('Got trace from slinktool: %s' % tr)
+
+
+class SlinkError(SlowSlinkError):
+    pass
+
+
+def decode_record(record):
+    '''
+    Decode a single miniSEED record held in memory.
+
+    :param record: miniSEED record
+    :type record: :py:class:`bytes` or other object supporting the buffer
+        protocol
+
+    :returns: list of :py:class:`~pyrocko.trace.Trace` objects
+    '''
+
+    try:
+        return list(mseed.iload_bytes(record, record_length=len(record)))
+
+    except FileLoadError as e:
+        raise SlinkError(str(e))
+
+
+def record_station(record):
+    '''
+    Get ``(network, station)`` from the fixed header of a miniSEED record.
+    '''
+
+    return (
+        record[18:20].decode('ascii').strip(),
+        record[8:13].decode('ascii').strip())
+
+
+class Slink(object):
+    '''
+    Asynchronous SeedLink client.
+
+    Implements the SeedLink protocol (version 3) natively on top of
+    :py:mod:`asyncio`, without the need for the external ``slinktool``
+    program. Multiple stations are negotiated over a single connection
+    (multi-station mode). The sequence number of the last packet received
+    from each station is kept in :py:attr:`sequences`, so that the data
+    streams can be resumed without gaps or duplicates after a reconnect.
+
+    Records are decoded straight from memory. Override :py:meth:`got_trace`
+    or iterate over :py:meth:`iter_traces` to consume the data.
+
+    Usage::
+
+        sl = Slink('geofon.gfz-potsdam.de', 18000)
+        sl.add_stream('GE', 'APE', '', 'BHZ')
+        asyncio.run(sl.run())
+    '''
+
+    def __init__(
+            self, host='geofon.gfz-potsdam.de', port=18000, timeout=30.,
+            reconnect_delay=5.):
+
+        self.host = host
+        self.port = int(port)
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+        self.stations = {}
+        self.sequences = {}
+        self.server_id = None
+        self._reader = None
+        self._writer = None
+        self._running = False
+
+    def add_stream(self, network, station, location, channel):
+        '''
+        Add stream to be requested from the server.
+
+        Location and channel codes may contain ``?`` wildcards.
+        '''
+
+        self._add_selector(
+            network, station, '%s%s.D' % (location, channel))
+
+    def add_raw_stream_selector(self, stream_selector):
+        '''
+        Add streams given in ``slinktool`` syntax.
+
+        :param stream_selector: ``NET_STA[:SEL1 SEL2 ...][,...]``, where the
+            selectors have the form ``[LL]CCC[.T]``.
+        '''
+
+        for item in stream_selector.split(','):
+            if ':' in item:
+                station_id, selectors = item.split(':', 1)
+                selectors = selectors.split()
+            else:
+                station_id, selectors = item, []
+
+            try:
+                network, station = station_id.strip().split('_')
+            except ValueError:
+                raise SlinkError(
+                    'Invalid stream selector: %s' % stream_selector)
+
+            self.stations.setdefault((network, station), [])
+            for selector in selectors:
+                self._add_selector(network, station, selector)
+
+    def _add_selector(self, network, station, selector):
+        selectors = self.stations.setdefault((network, station), [])
+        if selector not in selectors:
+            selectors.append(selector)
+
+    async def _readline(self):
+        try:
+            line = await asyncio.wait_for(
+                self._reader.readline(), self.timeout)
+
+        except asyncio.TimeoutError:
+            raise SlinkError('Timeout while waiting for server response.')
+
+        if not line:
+            raise SlinkError('Connection closed by server.')
+
+        return line.decode('ascii', errors='replace').strip()
+
+    async def _command(self, command, expect_ok=True):
+        logger.debug('Sending command: %s' % command)
+        self._writer.write(command.encode('ascii') + b'\r\n')
+        await self._writer.drain()
+        if expect_ok:
+            response = await self._readline()
+            if response != 'OK':
+                raise SlinkError(
+                    'Command "%s" failed, server responded: %s' % (
+                        command, response))
+
+    def _data_command(self, network, station):
+        seq = self.sequences.get((network, station), None)
+        if seq is None:
+            return 'DATA'
+        else:
+            return 'DATA %06X' % ((seq + 1) % 0x1000000)
+
+    async def connect(self):
+        '''
+        Open connection to the server and exchange greetings.
+        '''
+
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout)
+
+        except (OSError, asyncio.TimeoutError) as e:
+            raise SlinkError(
+                'Cannot connect to %s:%i: %s' % (self.host, self.port, e))
+
+        await self._command('HELLO', expect_ok=False)
+        self.server_id = await self._readline()
+        await self._readline()
+        logger.debug('Connected to %s' % self.server_id)
+
+    async def negotiate(self):
+        '''
+        Request configured streams and start data transfer.
+
+        Streams of stations with known sequence numbers are resumed after the
+        last packet received.
+        '''
+
+        if not self.stations:
+            await self._command('DATA', expect_ok=False)
+            return
+
+        for (network, station), selectors in self.stations.items():
+            await self._command('STATION %s %s' % (station, network))
+            for selector in selectors:
+                await self._command('SELECT %s' % selector)
+
+            await self._command(self._data_command(network, station))
+
+        await self._command('END', expect_ok=False)
+
+    async def close(self):
+        '''
+        Close connection to the server.
+        '''
+
+        if self._writer is not None:
+            writer = self._writer
+            self._reader = self._writer = None
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def _read_packet(self):
+        try:
+            header = await self._reader.readexactly(PACKET_HEADER_LENGTH)
+            if header.startswith(b'SLINFO'):
+                record = await self._reader.readexactly(RECORD_LENGTH)
+                return None, header[7:8] == b'*', record
+
+            if header.startswith(b'ERROR'):
+                raise SlinkError('Server responded with error.')
+
+            if not header.startswith(b'SL'):
+                raise SlinkError('Invalid packet header received.')
+
+            try:
+                seq = int(header[2:8], 16)
+            except ValueError:
+                raise SlinkError('Invalid sequence number received.')
+
+            record = await self._reader.readexactly(RECORD_LENGTH)
+            return seq, False, record
+
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                raise SlinkError('Connection closed within packet.')
+
+            return None
+
+        except OSError as e:
+            raise SlinkError('Connection lost: %s' % e)
+
+    async def iter_packets(self):
+        '''
+        Iterate over data packets received from the server.
+
+        Yields tuples ``(sequence_number, record)``, the record being a
+        :py:class:`bytes` object containing a 512-byte miniSEED record.
+        Iteration stops when the connection is closed.
+        '''
+
+        while self._reader is not None:
+            packet = await self._read_packet()
+            if packet is None:
+                return
+
+            seq, _, record = packet
+            if seq is None:
+                continue
+
+            self.sequences[record_station(record)] = seq
+            yield seq, record
+
+    async def iter_traces(self):
+        '''
+        Iterate over traces received from the server.
+        '''
+
+        async for _, record in self.iter_packets():
+            for tr in decode_record(record):
+                yield tr
+
+    async def query_streams(self):
+        '''
+        Get list of streams available on the server.
+
+        Must be called on a freshly opened connection (see
+        :py:meth:`connect`).
+
+        :returns: list of ``(network, station, location, channel)`` tuples
+        '''
+
+        from pyrocko import mseed_ext
+
+        await self._command('INFO STREAMS', expect_ok=False)
+        chunks = []
+        while True:
+            packet = await self._read_packet()
+            if packet is None:
+                raise SlinkError('Connection closed by server.')
+
+            _, more, record = packet
+            try:
+                for tr_tuple in mseed_ext.get_traces_bytes(
+                        record, True, RECORD_LENGTH):
+                    chunks.append(tr_tuple[8].tobytes())
+
+            except mseed_ext.MSeedError as e:
+                raise SlinkError(str(e))
+
+            if not more:
+                break
+
+        try:
+            root = ElementTree.fromstring(b''.join(chunks).rstrip(b'\0'))
+        except ElementTree.ParseError as e:
+            raise SlinkError('Cannot parse stream list: %s' % e)
+
+        streams = []
+        for station in root.iter('station'):
+            for stream in station.iter('stream'):
+                if stream.get('type', 'D') != 'D':
+                    continue
+
+                streams.append((
+                    station.get('network'),
+                    station.get('name'),
+                    stream.get('location'),
+                    stream.get('seedname')))
+
+        return streams
+
+    async def run(self, reconnect=False):
+        '''
+        Receive data and pass it on to :py:meth:`got_trace`.
+
+        :param reconnect: if ``True``, reconnect after connection loss and
+            resume the streams where they stopped.
+        '''
+
+        self._running = True
+        while self._running:
+            try:
+                await self.connect()
+                await self.negotiate()
+                async for tr in self.iter_traces():
+                    self.got_trace(tr)
+
+            except SlinkError as e:
+                if not reconnect:
+                    raise
+
+                logger.error(str(e))
+
+            finally:
+                await self.close()
+
+            if not reconnect:
+                break
+
+            if self._running:
+                logger.info('Reconnecting to %s:%i in %g s' % (
+                    self.host, self.port, self.reconnect_delay))
+
+                await asyncio.sleep(self.reconnect_delay)
+
+        self._running = False
+
+    def stop(self):
+        '''
+        Request termination of :py:meth:`run`.
+        '''
+
+        self._running = False
+        if self._writer is not None:
+            self._writer.close()
+
+    def got_trace(self, tr):
+        logger.info('Got trace from SeedLink server: %s' % tr)
@@ -13,7 +13,8 @@ import math
 import copy
 import logging
 import hashlib
-from collections import defaultdict
+import threading
+from collections import defaultdict, OrderedDict
 
 import numpy as num
 from scipy import signal
@@ -1851,36 +1852,9 @@ class Trace(Object):
     def _get_tapered_coefs(
             self, ntrans, freqlimits, transfer_function, invert=False):
 
-        deltaf = 1./(self.deltat*ntrans)
-        nfreqs = ntrans//2 + 1
-        transfer = num.ones(nfreqs, dtype=complex)
-        hi = snapper(nfreqs, deltaf)
-        if freqlimits is not None:
-            a, b, c, d = freqlimits
-            freqs = num.arange(hi(d)-hi(a), dtype=float)*deltaf \
-                + hi(a)*deltaf
-
-            if invert:
-                coeffs = transfer_function.evaluate(freqs)
-                if num.any(coeffs == 0.0):
-                    raise InfiniteResponse('%s.%s.%s.%s' % self.nslc_id)
-
-                transfer[hi(a):hi(d)] = 1.0 / transfer_function.evaluate(freqs)
-            else:
-                transfer[hi(a):hi(d)] = transfer_function.evaluate(freqs)
-
-            tapered_transfer = costaper(a, b, c, d, nfreqs, deltaf)*transfer
-        else:
-            if invert:
-                raise Exception(
-                    'transfer: `freqlimits` must be given when `invert` is '
-                    'set to `True`')
-
-            freqs = num.arange(nfreqs) * deltaf
-            tapered_transfer = transfer_function.evaluate(freqs)
-
-        tapered_transfer[0] = 0.0  # don't introduce static offsets
-        return tapered_transfer
+        return _get_tapered_coefs(
+            self.deltat, ntrans, freqlimits, transfer_function, invert,
+            '%s.%s.%s.%s' % self.nslc_id)
 
     def fill_template(self, template, **additional):
         '''
@@ -1963,6 +1937,338 @@ class Trace(Object):
         return snuffle([self], **kwargs)
 
 
+class TraceBatch(object):
+
+    '''
+    Container for many equally sampled and time-aligned traces.
+
+    A ``TraceBatch`` holds the samples of many traces with common sampling
+    interval, start time and number of samples in a single 2D NumPy array of
+    shape ``(ntraces, nsamples)``. Processing methods operate on the whole
+    array at once and avoid the per-trace overhead of looping over lists of
+    :py:class:`Trace` objects.
+
+    :param codes: list of ``(network, station, location, channel)`` or
+        ``(network, station, location, channel, extra)`` tuples, one for each
+        row of ``ydata``
+    :param tmin: system time of first sample in [s]
+    :param deltat: sampling interval in [s]
+    :param ydata: 2D numpy array with data samples, shape
+        ``(ntraces, nsamples)``
+
+    Use :py:meth:`from_traces` and :py:meth:`to_traces` to convert from and
+    to lists of :py:class:`Trace` objects.
+    '''
+
+    def __init__(self, codes, tmin, deltat, ydata):
+        ydata = num.asarray(ydata)
+        if ydata.ndim != 2 or ydata.shape[0] != len(codes):
+            raise ValueError(
+                'TraceBatch: ydata must be a 2D array with one row per entry '
+                'in codes')
+
+        self.codes = [tuple(c) for c in codes]
+        self.tmin = tmin
+        self.deltat = deltat
+        self.ydata = ydata
+
+    @classmethod
+    def from_traces(cls, traces):
+        '''
+        Create batch from a list of traces.
+
+        :param traces: list of :py:class:`Trace` objects with common sampling
+            interval, start time and number of samples
+
+        The samples are copied into a new 2D array. Raises
+        :py:exc:`MisalignedTraces` if the traces are not aligned.
+        '''
+
+        if not traces:
+            raise NoData()
+
+        tr0 = traces[0]
+        nsamples = tr0.data_len()
+        for tr in traces[1:]:
+            if not (same_sampling_rate(tr0, tr)
+                    and abs(tr.tmin - tr0.tmin) < 0.01*tr0.deltat
+                    and tr.data_len() == nsamples):
+
+                raise MisalignedTraces(
+                    'TraceBatch: traces %s and %s are not aligned' % (
+                        tr0.name(), tr.name()))
+
+        dtype = num.result_type(*[tr.ydata for tr in traces])
+        ydata = num.empty((len(traces), nsamples), dtype=dtype)
+        for itr, tr in enumerate(traces):
+            ydata[itr, :] = tr.ydata
+
+        return cls(
+            [tr.nslc_id + ((tr.extra,) if tr.extra else ())
+             for tr in traces],
+            tr0.tmin, tr0.deltat, ydata)
+
+    def to_traces(self):
+        '''
+        Get list of traces.
+
+        :returns: list of :py:class:`Trace` objects
+
+        The data arrays of the returned traces are views into the rows of the
+        batch's data array (no samples are copied).
+        '''
+
+        traces = []
+        for codes, ydata in zip(self.codes, self.ydata):
+            network, station, location, channel = codes[:4]
+            extra = codes[4] if len(codes) > 4 else ''
+            traces.append(Trace(
+                network, station, location, channel, extra=extra,
+                tmin=self.tmin, deltat=self.deltat, ydata=ydata))
+
+        return traces
+
+    @property
+    def ntraces(self):
+        return self.ydata.shape[0]
+
+    @property
+    def nsamples(self):
+        return self.ydata.shape[1]
+
+    @property
+    def tmax(self):
+        return self.tmin + (self.nsamples - 1) * self.deltat
+
+    def copy(self, data=True):
+        '''
+        Make a deep copy of the batch.
+        '''
+
+        return TraceBatch(
+            list(self.codes), self.tmin, self.deltat,
+            self.ydata.copy() if data else self.ydata)
+
+    def nyquist_check(self, frequency, intro='Corner frequency', warn=True,
+                      raise_exception=False):
+
+        '''
+        Check if a given frequency is above the Nyquist frequency.
+
+        See :py:meth:`Trace.nyquist_check`.
+        '''
+
+        if frequency >= 0.5/self.deltat:
+            message = '%s (%g Hz) is equal to or higher than nyquist ' \
+                      'frequency (%g Hz). (TraceBatch)' \
+                % (intro, frequency, 0.5/self.deltat)
+            if warn:
+                logger.warning(message)
+            if raise_exception:
+                raise AboveNyquist(message)
+
+    def _filter(self, order, corners, btype, demean):
+        (b, a) = _get_cached_filter_coefs(
+            order, [corner*2.0*self.deltat for corner in corners],
+            btype=btype)
+
+        data = self.ydata.astype(num.float64)
+        if demean:
+            data -= num.mean(data, axis=1)[:, num.newaxis]
+
+        self.ydata = signal.lfilter(b, a, data, axis=1)
+
+    def lowpass(self, order, corner, nyquist_warn=True,
+                nyquist_exception=False, demean=True):
+
+        '''
+        Apply Butterworth lowpass to all traces.
+
+        See :py:meth:`Trace.lowpass`.
+        '''
+
+        self.nyquist_check(
+            corner, 'Corner frequency of lowpass', nyquist_warn,
+            nyquist_exception)
+
+        self._filter(order, [corner], 'low', demean)
+
+    def highpass(self, order, corner, nyquist_warn=True,
+                 nyquist_exception=False, demean=True):
+
+        '''
+        Apply Butterworth highpass to all traces.
+
+        See :py:meth:`Trace.highpass`.
+        '''
+
+        self.nyquist_check(
+            corner, 'Corner frequency of highpass', nyquist_warn,
+            nyquist_exception)
+
+        self._filter(order, [corner], 'high', demean)
+
+    def bandpass(self, order, corner_hp, corner_lp, demean=True):
+        '''
+        Apply Butterworth bandpass to all traces.
+
+        See :py:meth:`Trace.bandpass`.
+        '''
+
+        self.nyquist_check(corner_hp, 'Lower corner frequency of bandpass')
+        self.nyquist_check(corner_lp, 'Higher corner frequency of bandpass')
+        self._filter(order, [corner_hp, corner_lp], 'band', demean)
+
+    def taper(self, taperer, inplace=True):
+        '''
+        Apply a :py:class:`Taper` to all traces.
+
+        :param taperer: instance of :py:class:`Taper` subclass
+        :param inplace: apply taper inplace
+
+        The taper window is evaluated once and applied to all rows.
+        '''
+
+        batch = self if inplace else self.copy()
+
+        window = num.ones(batch.nsamples)
+        taperer(window, batch.tmin, batch.deltat)
+        if not num.issubdtype(batch.ydata.dtype, num.floating):
+            batch.ydata = batch.ydata.astype(num.float64)
+
+        batch.ydata *= window[num.newaxis, :]
+
+        if not inplace:
+            return batch
+
+    def downsample(self, ndecimate, snap=False, demean=False,
+                   ftype='fir-remez'):
+
+        '''
+        Downsample all traces by a given integer factor.
+
+        See :py:meth:`Trace.downsample`.
+        '''
+
+        newdeltat = self.deltat*ndecimate
+        ilag = 0
+        if snap:
+            ilag = int(round(
+                (math.ceil(self.tmin / newdeltat) * newdeltat - self.tmin)
+                / self.deltat))
+
+            if ilag > 0 and ilag < self.nsamples:
+                self.tmin += ilag*self.deltat
+            else:
+                ilag = 0
+
+        data = self.ydata.astype(num.float64)
+        if demean:
+            data -= num.mean(data, axis=1)[:, num.newaxis]
+
+        if data.size != 0:
+            b, a, n = util.decimate_coeffs(ndecimate, None, ftype)
+            data = signal.lfilter(b, a, data, axis=1)[
+                :, n//2+ilag::ndecimate].copy()
+
+        self.ydata = data
+        self.deltat = reuse(self.deltat*ndecimate)
+
+    def envelope(self, inplace=True):
+        '''
+        Calculate the envelopes of all traces.
+
+        See :py:meth:`Trace.envelope`.
+        '''
+
+        env = num.abs(signal.hilbert(self.ydata.astype(float), axis=1))
+        if inplace:
+            self.ydata = env
+        else:
+            batch = self.copy(data=False)
+            batch.ydata = env
+            return batch
+
+    def transfer(self,
+                 tfade=0.,
+                 freqlimits=None,
+                 transfer_function=None,
+                 cut_off_fading=True,
+                 demean=True,
+                 invert=False):
+
+        '''
+        Return new batch with transfer function applied to all traces.
+
+        The transfer function is evaluated once and applied to all traces
+        through a single FFT over the 2D data array. See
+        :py:meth:`Trace.transfer` for a description of the arguments.
+        '''
+
+        if transfer_function is None:
+            transfer_function = FrequencyResponse()
+
+        if self.tmax - self.tmin <= tfade*2.:
+            raise TraceTooShort(
+                'TraceBatch too short for fading length setting. '
+                'trace length = %g, fading length = %g'
+                % (self.tmax-self.tmin, tfade))
+
+        ndata = self.nsamples
+        if freqlimits is None and transfer_function.is_scalar():
+            data = self.ydata.astype(num.float64)
+
+            c = num.abs(transfer_function.evaluate(num.ones(1))[0])
+            if invert:
+                c = 1.0/c
+
+            data *= c
+
+            if tfade != 0.0:
+                data *= costaper(
+                    0., tfade, self.deltat*(ndata-1)-tfade, self.deltat*ndata,
+                    ndata, self.deltat)[num.newaxis, :]
+
+        else:
+            ntrans = nextpow2(ndata*1.2)
+            coefs = _get_tapered_coefs(
+                self.deltat, ntrans, freqlimits, transfer_function,
+                invert=invert, name='TraceBatch')
+
+            data_pad = num.zeros((self.ntraces, ntrans), dtype=float)
+            data_pad[:, :ndata] = self.ydata
+            if demean:
+                data_pad[:, :ndata] -= num.mean(
+                    self.ydata, axis=1)[:, num.newaxis]
+
+            if tfade != 0.0:
+                data_pad[:, :ndata] *= costaper(
+                    0., tfade, self.deltat*(ndata-1)-tfade, self.deltat*ndata,
+                    ndata, self.deltat)[num.newaxis, :]
+
+            fdata = num.fft.rfft(data_pad, axis=1)
+            fdata *= coefs[num.newaxis, :]
+            data = num.fft.irfft(fdata, n=ntrans, axis=1)[:, :ndata]
+
+        output = self.copy(data=False)
+        if cut_off_fading and tfade != 0.0:
+            # same sample selection as with Trace.chop
+            ibeg = int(round(tfade / self.deltat))
+            iend = int(round((self.tmax - self.tmin - tfade) / self.deltat))
+            if iend <= ibeg:
+                raise TraceTooShort(
+                    'TraceBatch too short for fading length setting. '
+                    'trace length = %g, fading length = %g'
+                    % (self.tmax-self.tmin, tfade))
+
+            output.tmin = self.tmin + ibeg*self.deltat
+            output.ydata = data[:, ibeg:iend].copy()
+        else:
+            output.ydata = num.ascontiguousarray(data)
+
+        return output
+
+
 def snuffle(traces, **kwargs):
     '''
     Show traces in a snuffler window.
@@ -2745,6 +3051,122 @@ def deconvolve(
     return c
 
 
+def transfer_many(
+        traces,
+        tfade=0.,
+        freqlimits=None,
+        transfer_functions=None,
+        cut_off_fading=True,
+        demean=True,
+        invert=False):
+
+    '''
+    Apply transfer functions to many traces.
+
+    Gives the same results as calling :py:meth:`Trace.transfer` on each of
+    the traces. Traces with common sampling interval and number of samples
+    are stacked into a 2D array and transformed with a single FFT. The
+    transfer function coefficients are evaluated only once for each distinct
+    response.
+
+    :param traces: list of :py:class:`Trace` objects
+    :param transfer_functions: :py:class:`FrequencyResponse` object to be
+        applied to all traces or list with one response for each trace.
+
+    See :py:meth:`Trace.transfer` for a description of the other arguments.
+
+    :returns: list of new :py:class:`Trace` objects, in the order of the input
+        traces
+    '''
+
+    if transfer_functions is None \
+            or isinstance(transfer_functions, FrequencyResponse):
+        transfer_functions = [transfer_functions] * len(traces)
+
+    if len(transfer_functions) != len(traces):
+        raise ValueError(
+            'transfer_many: number of transfer functions does not match '
+            'number of traces')
+
+    kwargs = dict(
+        tfade=tfade,
+        freqlimits=freqlimits,
+        cut_off_fading=cut_off_fading,
+        demean=demean,
+        invert=invert)
+
+    outputs = [None] * len(traces)
+    groups = defaultdict(list)
+    for itr, (tr, transfer_function) in enumerate(
+            zip(traces, transfer_functions)):
+
+        if transfer_function is None:
+            transfer_function = FrequencyResponse()
+
+        if (freqlimits is None and transfer_function.is_scalar()) \
+                or tr.tmax - tr.tmin <= tfade*2.:
+
+            # nothing to gain from batching flat responses; too short traces
+            # raise the appropriate exception
+            outputs[itr] = tr.transfer(
+                transfer_function=transfer_function, **kwargs)
+        else:
+            groups[tr.deltat, tr.data_len()].append((itr, transfer_function))
+
+    for (deltat, ndata), group in groups.items():
+        ntrans = nextpow2(ndata*1.2)
+
+        data_pad = num.zeros((len(group), ntrans), dtype=float)
+        icoefs = num.zeros(len(group), dtype=int)
+        coefs = []
+        coefs_ids = {}
+        for irow, (itr, transfer_function) in enumerate(group):
+            tr = traces[itr]
+            data_pad[irow, :ndata] = tr.ydata
+            if id(transfer_function) not in coefs_ids:
+                coefs_ids[id(transfer_function)] = len(coefs)
+                coefs.append(tr._get_tapered_coefs(
+                    ntrans, freqlimits, transfer_function, invert=invert))
+
+            icoefs[irow] = coefs_ids[id(transfer_function)]
+
+        if demean:
+            data_pad[:, :ndata] -= num.mean(
+                data_pad[:, :ndata], axis=1)[:, num.newaxis]
+
+        if tfade != 0.0:
+            data_pad[:, :ndata] *= costaper(
+                0., tfade, deltat*(ndata-1)-tfade, deltat*ndata,
+                ndata, deltat)[num.newaxis, :]
+
+        fdata = num.fft.rfft(data_pad, axis=1)
+        if len(coefs) == 1:
+            fdata *= coefs[0][num.newaxis, :]
+        else:
+            fdata *= num.array(coefs)[icoefs]
+
+        ddata = num.fft.irfft(fdata, n=ntrans, axis=1)
+
+        for irow, (itr, _) in enumerate(group):
+            tr = traces[itr]
+            output = tr.copy(data=False)
+            output.set_ydata(ddata[irow, :ndata].copy())
+            if cut_off_fading and tfade != 0.0:
+                try:
+                    output.chop(
+                        output.tmin+tfade, output.tmax-tfade, inplace=True)
+
+                except NoData:
+                    raise TraceTooShort(
+                        'Trace %s.%s.%s.%s too short for fading length '
+                        'setting. trace length = %g, fading length = %g'
+                        % (tr.nslc_id + (tr.tmax-tr.tmin, tfade)))
+
+            outputs[itr] = output
+
+    return outputs
+
+
 def assert_same_sampling_rate(a, b, eps=1.0e-6):
     assert same_sampling_rate(a, b, eps), \
         'Sampling rates differ: %g != %g' % (a.deltat, b.deltat)
@@ -3195,6 +3617,150 @@ def costaper(a, b, c, d, nfreqs, deltaf):
     return tap
 
 
+class _TaperedCoefsCache(object):
+    '''
+    LRU cache of tapered transfer function coefficients.
+
+    Entries are keyed by a digest of the response's current content together
+    with the FFT length, sampling interval, frequency taper and direction.
+    The digest is recomputed on every lookup, so that modified responses are
+    never served stale coefficients. Only Guts objects are cached.
+    '''
+
+    def __init__(self, nbytes_max=128*1024**2):
+        self.nbytes_max = nbytes_max
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self.nhits = 0
+        self.nmisses = 0
+
+    def _update_digest(self, h, val):
+        if isinstance(val, Object):
+            cls = val.__class__
+            h.update(('<%s.%s>' % (cls.__module__, cls.__name__)).encode())
+            for prop in cls.T.properties:
+                h.update(prop.name.encode('utf8'))
+                self._update_digest(h, getattr(val, prop.name))
+
+        elif isinstance(val, (list, tuple)):
+            h.update(b'[')
+            for x in val:
+                self._update_digest(h, x)
+
+            h.update(b']')
+
+        elif isinstance(val, num.ndarray):
+            h.update(('%s%s' % (val.dtype.str, val.shape)).encode())
+            h.update(num.ascontiguousarray(val).tobytes())
+
+        else:
+            h.update(repr(val).encode('utf8'))
+
+    def key(self, deltat, ntrans, freqlimits, transfer_function, invert):
+        if not isinstance(transfer_function, Object):
+            return None
+
+        h = hashlib.sha1()
+        self._update_digest(h, transfer_function)
+
+        return (
+            h.digest(),
+            ntrans,
+            deltat,
+            tuple(freqlimits) if freqlimits is not None else None,
+            bool(invert))
+
+    def get(self, key):
+        with self._lock:
+            coefs = self._entries.get(key, None)
+            if coefs is not None:
+                self._entries.move_to_end(key)
+                self.nhits += 1
+            else:
+                self.nmisses += 1
+
+            return coefs
+
+    def put(self, key, coefs):
+        if coefs.nbytes > self.nbytes_max:
+            return
+
+        coefs.flags.writeable = False
+        with self._lock:
+            if key in self._entries:
+                return
+
+            self._entries[key] = coefs
+            self._nbytes += coefs.nbytes
+            while self._nbytes > self.nbytes_max:
+                _, old = self._entries.popitem(last=False)
+                self._nbytes -= old.nbytes
+
+
+g_tapered_coefs_cache = _TaperedCoefsCache()
+
+
+def _get_tapered_coefs(
+        deltat, ntrans, freqlimits, transfer_function, invert=False,
+        name=''):
+
+    key = g_tapered_coefs_cache.key(
+        deltat, ntrans, freqlimits, transfer_function, invert)
+
+    if key is not None:
+        coefs = g_tapered_coefs_cache.get(key)
+        if coefs is not None:
+            return coefs
+
+    coefs = _evaluate_tapered_coefs(
+        deltat, ntrans, freqlimits, transfer_function, invert, name)
+
+    if key is not None:
+        g_tapered_coefs_cache.put(key, coefs)
+
+    return coefs
+
+
+def _evaluate_tapered_coefs(
+        deltat, ntrans, freqlimits, transfer_function, invert=False,
+        name=''):
+
+    deltaf = 1./(deltat*ntrans)
+    nfreqs = ntrans//2 + 1
+    transfer = num.ones(nfreqs, dtype=complex)
+    hi = snapper(nfreqs, deltaf)
+    if freqlimits is not None:
+        a, b, c, d = freqlimits
+        freqs = num.arange(hi(d)-hi(a), dtype=float)*deltaf \
+            + hi(a)*deltaf
+
+        if invert:
+            coeffs = transfer_function.evaluate(freqs)
+            if num.any(coeffs == 0.0):
+                raise InfiniteResponse(name)
+
+            transfer[hi(a):hi(d)] = 1.0 / transfer_function.evaluate(freqs)
+        else:
+            transfer[hi(a):hi(d)] = transfer_function.evaluate(freqs)
+
+        tapered_transfer = costaper(a, b, c, d, nfreqs, deltaf)*transfer
+    else:
+        if invert:
+            raise Exception(
+                'transfer: `freqlimits` must be given when `invert` is '
+                'set to `True`')
+
+        freqs = num.arange(nfreqs) * deltaf
+        tapered_transfer = transfer_function.evaluate(freqs)
+
+    tapered_transfer[0] = 0.0  # don't introduce static offsets
+    return tapered_transfer
+
+
 def t2ind(t, tdelta, snap=round):
     return int(snap(t/tdelta))
 
@@ -0,0 +1,146 @@
+from __future__ import division, print_function, absolute_import
+
+import unittest
+
+import numpy as num
+
+from pyrocko import autopick, trace, util
+
+
+def make_traces(nchannels, nsamples, deltat):
+    num.random.seed(23)
+    ydata = num.random.normal(size=(nchannels, nsamples))
+    for ichannel in range(nchannels):
+        istart = nsamples // 2 + ichannel * 100
+        ydata[ichannel, istart:istart+300] *= 20.
+
+    return [
+        trace.Trace(
+            'XX', 'STA%i' % ichannel, '', 'BHZ', deltat=deltat, tmin=0.,
+            ydata=ydata[ichannel])
+        for ichannel in range(nchannels)]
+
+
+class AutopickTestCase(unittest.TestCase):
+
+    def test_recursive_stalta_many(self):
+        deltat = 0.01
+        traces = make_traces(5, 5000, deltat)
+
+        data = num.array([tr.ydata**2 for tr in traces], dtype=num.float32)
+        ns = int(round(1.0 / deltat))
+        temp = num.zeros((len(traces), ns+3), dtype=num.float32)
+        temp = autopick.recursive_stalta_many(
+            1., 10., 1., 1., 1., data, deltat, temp=temp, nparallel=2)
+
+        for itr, tr in enumerate(traces):
+            etr = tr.copy()
+            etr.ydata = (tr.ydata**2).astype(num.float32)
+            temp1 = autopick.recursive_stalta(1., 10., 1., 1., 1., etr)
+            num.testing.assert_equal(etr.ydata, data[itr])
+            num.testing.assert_equal(temp1, temp[itr])
+
+        with self.assertRaises(autopick.AutopickError):
+            autopick.recursive_stalta_many(
+                1., 10., 1., 1., 1., data.astype(num.float64), deltat)
+
+        # continuing from the filter state gives the one-shot result
+        data = num.array([tr.ydata**2 for tr in traces], dtype=num.float32)
+        data_ref = data.copy()
+        autopick.recursive_stalta_many(1., 10., 1., 1., 1., data_ref, deltat)
+        for isplit in [2000, 1101, 4899]:
+            data1 = data[:, :isplit].copy()
+            data2 = data[:, isplit:].copy()
+            temp = autopick.recursive_stalta_many(
+                1., 10., 1., 1., 1., data1, deltat)
+            autopick.recursive_stalta_many(
+                1., 10., 1., 1., 1., data2, deltat, temp=temp)
+
+            num.testing.assert_allclose(
+                num.hstack((data1, data2)), data_ref, rtol=1e-4)
+
+    def test_detect_triggers(self):
+        cf = num.array([
+            [0., 5., 3., 1., 0., 5., 5.],
+            [5., 3., 3., 3., 3., 1., 0.]])
+
+        triggers, active = autopick.detect_triggers(
+            cf, 4., 2., active=num.array([False, True]))
+
+        assert triggers == [(0, 1, 3), (1, None, 5), (0, 5, None)]
+        assert active.tolist() == [True, False]
+
+    def test_detector_streaming(self):
+        deltat = 0.01
+        nsamples = 20000
+        traces = make_traces(4, nsamples, deltat)
+
+        def check(triggers):
+            assert len(triggers) == len(traces)
+            for itr, (nslc_id, tmin, tmax) in enumerate(triggers):
+                assert nslc_id == traces[itr].nslc_id
+                assert abs(tmin - (nsamples // 2 + itr * 100) * deltat) < 0.1
+                assert tmin < tmax
+
+        detector = autopick.StaLtaDetector(1., 10., level_on=4., level_off=2.)
+        cf_traces, triggers = detector.process(traces)
+        assert len(cf_traces) == len(traces)
+        assert detector.flush() == []
+        check(triggers)
+
+        triggers_chunked = []
+        nchunk = 1500
+        for istart in range(0, nsamples, nchunk):
+            chunk = [
+                tr.chop(
+                    istart*deltat, (istart+nchunk)*deltat, inplace=False,
+                    include_last=False)
+                for tr in traces]
+
+            triggers_chunked.extend(detector.process(chunk)[1])
+
+        triggers_chunked.extend(detector.flush())
+        check(triggers_chunked)
+        for (_, tmin1, tmax1), (_, tmin2, tmax2) in zip(
+                triggers, triggers_chunked):
+
+            assert tmin1 == tmin2
+            assert tmax1 == tmax2
+
+    def test_detector_short_windows(self):
+        deltat = 0.01
+        nsamples = 20000
+        traces = make_traces(4, nsamples, deltat)
+
+        detector = autopick.StaLtaDetector(1., 10., level_on=4., level_off=2.)
+        cf_ref, _ = detector.process(traces)
+        detector.reset()
+
+        # windows shorter than tshort, for new and continued channels
+        cf_chunked = []
+        for istart, iend in [
+                (0, 5), (5, 205), (205, 210), (210, 17000),
+                (17000, 17003), (17003, nsamples)]:
+
+            chunk = [
+                tr.chop(
+                    istart*deltat, iend*deltat, inplace=False,
+                    include_last=False)
+                for tr in traces]
+
+            cf_chunked.extend(detector.process(chunk)[0])
+
+        detector.flush()
+
+        for tr_ref in cf_ref:
+            ydata = num.concatenate([
+                tr.ydata for tr in cf_chunked
+                if tr.nslc_id == tr_ref.nslc_id])
+
+            assert ydata.size == nsamples
+            num.testing.assert_allclose(ydata, tr_ref.ydata, rtol=1e-5)
+
+
+if __name__ == '__main__':
+    util.setup_logging('test_autopick', 'warning')
+    unittest.main()
@@ -6,6 +6,7 @@ import math
 import re
 import sys
 import datetime
+import os
 import os.path as op
 import time
 import shutil
@@ -1366,6 +1367,176 @@ t: 2018-08-06 12:53:20
 ''')
         assert isinstance(x3.t, time_float)
 
+    def testInit(self):
+
+        class Y(Object):
+            v = Int.T(default=1)
+
+        class X(Object):
+            a = Int.T()
+            b = Float.T(default=2.0)
+            c = List.T(Int.T())
+            d = Y.T(default=Y.D(v=3))
+            e = Y.T(default=Y(v=4))
+            f = Timestamp.T(default=Timestamp.D('2020-01-01 00:00:00'))
+            g = String.T(optional=True)
+
+        with self.assertRaises(ArgumentError):
+            X()
+
+        with self.assertRaises(ArgumentError):
+            X(a=1, z=2)
+
+        x1 = X(a=1)
+        x2 = X(a=1)
+        assert x1.b == 2.0 and x1.g is None
+        assert x1.c == [] and x1.c is not x2.c
+        assert x1.d.v == 3 and x1.d is not x2.d
+        assert x1.e.v == 4 and x1.e is not x2.e
+        assert x1.f == x2.f
+        assert X.T.direct_init
+
+        class Z(X):
+            h = Int.T(default=0)
+
+            def __setattr__(self, name, value):
+                self.__dict__.setdefault('log', []).append(name)
+                Object.__setattr__(self, name, value)
+
+        assert not Z.T.direct_init
+        z = Z(a=1)
+        assert z.log == ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h']
+
+        class W(Z):
+            guts_direct_init = True
+
+        # opt-in must come from the class defining __setattr__
+        assert not W.T.direct_init
+
+        class V(X):
+            guts_direct_init = True
+
+            def __setattr__(self, name, value):
+                self.__dict__.setdefault('log', []).append(name)
+                Object.__setattr__(self, name, value)
+
+        assert V.T.direct_init
+        v = V(a=1)
+        assert not hasattr(v, 'log')
+        v.a = 2
+        assert v.log == ['a']
+
+    def testLoadCache(self):
+        from tempfile import mkdtemp
+        from pyrocko import model
+        from pyrocko.io import stationxml
+
+        tempdir = mkdtemp()
+        cachedir = op.join(tempdir, 'cache')
+        fname = op.join(tempdir, 'events.yaml')
+        fname_xml = op.join(tempdir, 'event.xml')
+
+        events = [
+            model.Event(lat=float(i), time=float(i), name='ev%i' % i)
+            for i in range(10)]
+
+        dump_all(events, filename=fname)
+        for i in range(2):
+            events2 = load_all(filename=fname, cache=cachedir)
+            assert [ev.dump() for ev in events2] \
+                == [ev.dump() for ev in events]
+
+        # object coming from the cache is not a shared instance
+        assert load_all(filename=fname, cache=cachedir)[0] is not events2[0]
+
+        events[0].name = 'modified'
+        dump_all(events, filename=fname)
+        events2 = load_all(filename=fname, cache=cachedir)
+        assert events2[0].name == 'modified'
+
+        # pickles written by other versions of pyrocko are not reused
+        import pyrocko
+        version = getattr(pyrocko, '__version__', None)
+        pyrocko.__version__ = 'other'
+        try:
+            events[0].name = 'modified2'
+            dump_all(events, filename=fname)
+            load_all(filename=fname, cache=cachedir)
+        finally:
+            if version is None:
+                del pyrocko.__version__
+            else:
+                pyrocko.__version__ = version
+
+        events[0].name = 'modified3'
+        stat = os.stat(fname)
+        dump_all(events, filename=fname)
+        os.utime(fname, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert os.stat(fname).st_size == stat.st_size
+        events2 = load_all(filename=fname, cache=cachedir)
+        assert events2[0].name == 'modified3'
+
+        assert load_all.__name__ == 'load_all'
+        assert pyrocko.guts.cached_load_args.__doc__
+
+        sx = stationxml.FDSNStationXML(
+            source='test',
+            network_list=[stationxml.Network(code='XX', station_list=[
+                stationxml.Station(
+                    code='STA%i' % i,
+                    latitude=stationxml.Latitude(1.0),
+                    longitude=stationxml.Longitude(2.0),
+                    elevation=stationxml.Distance(0.0))
+                for i in range(3)])])
+
+        sx.dump_xml(filename=fname_xml)
+        for i in range(2):
+            sx2 = load_xml(filename=fname_xml, cache=cachedir)
+            assert sx2.dump_xml() == sx.dump_xml()
+
+        # loader options are part of the cache key
+        with open(fname_xml, 'w') as f:
+            f.write(sx.dump_xml().replace(
+                '<Source>', '<Bogus>1</Bogus><Source>'))
+
+        load_xml(filename=fname_xml, cache=cachedir)
+        with self.assertRaises(ArgumentError):
+            load_xml(filename=fname_xml, strict=True, cache=cachedir)
+
+        class A(Object):
+            x = Int.T()
+
+        # local class cannot be pickled, must fall back to normal loading
+        A(x=1).dump(filename=fname)
+        for i in range(2):
+            assert load(filename=fname, cache=cachedir).x == 1
+
+        shutil.rmtree(tempdir)
+
+    def benchmark_init(self):
+        from pyrocko import model
+        from pyrocko.io import stationxml
+
+        n = 100000
+        t0 = time.time()
+        for i in range(n):
+            model.Event(lat=1.0, lon=2.0, time=0.0, magnitude=5.0)
+
+        t1 = time.time()
+        for i in range(n):
+            stationxml.Latitude(value=1.0)
+
+        t2 = time.time()
+        event = model.Event(lat=1.0, lon=2.0, time=0.0, magnitude=5.0)
+        for i in range(n):
+            event.validate()
+
+        t3 = time.time()
+        print()
+        print('Event():              %6.2f us' % ((t1 - t0) / n * 1e6))
+        print('stationxml.Latitude:  %6.2f us' % ((t2 - t1) / n * 1e6))
+        print('Event.validate():     %6.2f us' % ((t3 - t2) / n * 1e6))
+
 
 def makeBasicTypeTest(Type, sample, sample_in=None, xml=False):
 
@@ -219,6 +219,60 @@ class IOTestCase(unittest.TestCase):
                 ltr = io.load(fn, format='mseed')[0]
                 num.testing.assert_equal(tr.ydata, ltr.ydata)
 
+    def testMSeedIloadBytes(self):
+        import mmap
+        from pyrocko.io.mseed import get_bytes, iload_bytes
+
+        c = '12'
+        nsample = 1000
+        tr = trace.Trace(
+            c, c, c, c, deltat=0.01, ydata=num.random.randint(
+                -200, 200, size=nsample).astype(num.int32))
+
+        mseed_bytes = get_bytes([tr], record_length=512)
+
+        fn = os.path.join(self.tmpdir, 'mseed_iload_bytes')
+        with open(fn, 'wb') as f:
+            f.write(mseed_bytes)
+
+        with open(fn, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            for data in (
+                    mseed_bytes,
+                    bytearray(mseed_bytes),
+                    memoryview(mseed_bytes),
+                    mm):
+
+                trs = list(iload_bytes(data))
+                assert len(trs) == 1
+                assert trs[0].nslc_id == tr.nslc_id
+                assert trs[0].meta['last']
+                num.testing.assert_equal(trs[0].ydata, tr.ydata)
+
+            mm.close()
+
+        trs = list(iload_bytes(mseed_bytes, load_data=False))
+        assert trs[0].ydata is None
+        assert abs(trs[0].tmax - tr.tmax) < tr.deltat * 0.01
+
+        # trailing incomplete record is not decoded
+        trs = list(iload_bytes(memoryview(mseed_bytes)[:-100]))
+        assert trs[0].meta['offset_end'] == len(mseed_bytes) - 512
+        assert not trs[0].meta['last']
+        assert trs[0].ydata.size < nsample
+
+        assert list(iload_bytes(b'')) == []
+
+        with self.assertRaises(FileLoadError):
+            list(iload_bytes(b'\0' * 1024))
+
+        from pyrocko import mseed_ext
+        with self.assertRaises(TypeError):
+            mseed_ext.get_traces_bytes(b'abc')
+
+        with self.assertRaises(mseed_ext.MSeedError):
+            mseed_ext.get_traces_bytes(b'abc', None)
+
     def testMSeedAppend(self):
         c = '12'
         nsample = 100
@@ -380,6 +434,53 @@ class IOTestCase(unittest.TestCase):
         sx2 = guts.load_xml(string=s)
         assert sx.dump_xml() == sx2.dump_xml()
 
+    def testStationXMLIloadNodes(self):
+        from pyrocko.io import stationxml
+
+        sx = common.make_stationxml(nnetworks=2, nstations=2, nchannels=3)
+        fpath = pjoin(self.tmpdir, 'nodes.stationxml')
+        sx.dump_xml(filename=fpath)
+
+        nodes = list(stationxml.iload_xml_nodes(filename=fpath))
+        assert [codes for (codes, node, _, _) in nodes[:4]] == [
+            ('N0', 'S00', '', 'HHE'),
+            ('N0', 'S00', '', 'HHN'),
+            ('N0', 'S00', '', 'HHZ'),
+            ('N0', 'S00')]
+
+        assert nodes[-1][0] == ('N1',)
+        channels = [
+            node for (_, node, _, _) in nodes
+            if isinstance(node, stationxml.Channel)]
+
+        assert len(channels) == 12
+        assert all(channel.response is not None for channel in channels)
+        assert all(
+            not node.station_list for (_, node, _, _) in nodes
+            if isinstance(node, stationxml.Network))
+
+        nodes_lazy = list(stationxml.iload_xml_nodes(
+            filename=fpath, responses=False))
+
+        assert len(nodes_lazy) == len(nodes)
+        for (codes, node, offset, pending), (_, node_full, _, _) in zip(
+                nodes_lazy, nodes):
+
+            if isinstance(node, stationxml.Channel):
+                assert pending
+                assert node.response is None
+
+                codes_loaded, channel = stationxml.load_channel_xml(
+                    fpath, offset)
+
+                assert codes_loaded == codes
+                assert channel.dump_xml() == node_full.dump_xml()
+            else:
+                assert not pending
+
+        with self.assertRaises(stationxml.StationXMLError):
+            stationxml.load_channel_xml(fpath, nodes_lazy[3][2])
+
     def testReadTDMSiDAS(self):
         from pyrocko.io import tdms_idas
         fpath = common.test_data_file('test_idas.tdms')
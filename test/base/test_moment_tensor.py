@@ -7,7 +7,9 @@ import numpy as num
 
 from pyrocko.moment_tensor import \
     magnitude_to_moment, moment_to_magnitude, MomentTensor, r2d, symmat6, \
-    dynecm, kagan_angle, rotation_from_angle_and_axis, random_axis
+    dynecm, kagan_angle, rotation_from_angle_and_axis, random_axis, \
+    kagan_angles, iter_kagan_angles, both_strike_dip_rake_many, \
+    standard_decomposition_many
 
 from pyrocko import util, guts
 
@@ -162,6 +164,55 @@ class MomentTensorTestCase(unittest.TestCase):
 
         assert abs(kagan_angle(mt1, mt2) - 10.0) < 0.0001
 
+    def testKaganMany(self):
+        mts = [MomentTensor.random_mt() for _ in range(50)] \
+            + [MomentTensor.random_dc() for _ in range(50)]
+        m6s = num.array([mt.m6() for mt in mts])
+
+        angles_ref = num.array(
+            [[kagan_angle(mt1, mt2) for mt2 in mts[:20]] for mt1 in mts])
+
+        angles = kagan_angles(m6s)
+        assert angles.shape == (100, 100)
+        assert num.all(num.diag(angles) == 0.0)
+        num.testing.assert_allclose(angles[:, :20], angles_ref, atol=1e-4)
+
+        angles2 = kagan_angles(m6s, mts[:20], block_size=7, nthreads=3)
+        num.testing.assert_allclose(angles2, angles_ref, atol=1e-4)
+
+        blocks = []
+        for ia_min, ia_max, block in iter_kagan_angles(mts, block_size=30):
+            assert block.shape == (ia_max - ia_min, 100)
+            blocks.append(block)
+
+        num.testing.assert_equal(num.vstack(blocks), angles)
+
+    def testBothStrikeDipRakeMany(self):
+        mts = [MomentTensor.random_mt() for _ in range(100)] + [
+            MomentTensor(strike=strike, dip=dip, rake=rake)
+            for strike in (0., 90., 180., 270.)
+            for dip in (0., 45., 90.)
+            for rake in (-180., -90., 0., 90.)]
+
+        sdrs = both_strike_dip_rake_many(mts)
+        sdrs_ref = num.array([mt.both_strike_dip_rake() for mt in mts])
+        num.testing.assert_allclose(sdrs, sdrs_ref, atol=1e-6)
+
+    def testStandardDecompositionMany(self):
+        mts = [MomentTensor.random_mt() for _ in range(100)] + [
+            MomentTensor.random_dc(), MomentTensor(m=num.eye(3))]
+
+        moments, ratios, ms = standard_decomposition_many(
+            num.array([mt.m6() for mt in mts]))
+
+        for imt, mt in enumerate(mts):
+            for icomp, (moment, ratio, m) in enumerate(
+                    mt.standard_decomposition()):
+
+                assert abs(moments[imt, icomp] - moment) < 1e-9
+                assert abs(ratios[imt, icomp] - ratio) < 1e-9
+                num.testing.assert_allclose(ms[imt, icomp], m, atol=1e-9)
+
     def test_pt_to_sdr(self):
         for _ in range(100):
             mt1 = MomentTensor.random_dc(scalar_moment=1.0)
@@ -137,6 +137,108 @@ class PileTestCase(unittest.TestCase):
         for tr in p.iter_all(include_last=True):
             assert numeq(tr.ydata, num.arange(100, dtype=float), 0.001)
 
+    def testMinMaxLevels(self):
+        pile = genuine_pile
+        rstate = num.random.RandomState(123)
+        for n in (1, 15, 16, 17, 1000, 1024, 12345):
+            ydata = rstate.randint(-1000, 1000, size=n).astype(num.int32)
+            levels = pile.make_minmax_levels(ydata, level_min=4)
+            assert levels[-1][0].size == 1
+            assert levels[-1][0][0] == ydata.min()
+            assert levels[-1][1][0] == ydata.max()
+            for k, (mins, maxs) in enumerate(levels):
+                nbin = 2**(k+4)
+                for i in (0, mins.size // 2, mins.size - 1):
+                    assert mins[i] == ydata[i*nbin:(i+1)*nbin].min()
+                    assert maxs[i] == ydata[i*nbin:(i+1)*nbin].max()
+
+    def testOverviewChop(self):
+        pile = genuine_pile
+        import shutil
+
+        datadir = tempfile.mkdtemp()
+        try:
+            deltat = 0.01
+            tmin = 1234567890.
+            rstate = num.random.RandomState(123)
+            ydata = rstate.randint(-1000, 1000, size=100000).astype(num.int32)
+            tr = trace.Trace(
+                'XX', 'STA', '', 'BHZ', tmin=tmin, deltat=deltat, ydata=ydata)
+
+            fn = pjoin(datadir, 'data.mseed')
+            io.save([tr], fn)
+
+            p = pile.make_pile([fn], show_progress=False)
+            cachedir = pjoin(datadir, '_overview_cache_')
+            cache = pile.OverviewCache(cachedir)
+
+            deltat_pixel = 1.0
+            ctmin, ctmax = tmin + 100., tmin + 500.
+            envs = p.overview_chop(ctmin, ctmax, deltat_pixel, cache)
+            assert len(envs) == 1
+            env = envs[0]
+            level = env.meta['overview_level']
+            assert deltat * 2**level <= deltat_pixel
+            assert env.tmin <= ctmin and env.tmax >= ctmax - deltat_pixel
+            assert env.nslc_id == tr.nslc_id
+
+            i0 = int(round((env.tmin - tmin) / deltat))
+            nbin = 2**level
+            for i in range(env.ydata.size // 2):
+                chunk = ydata[i0+i*nbin:i0+(i+1)*nbin]
+                assert env.ydata[2*i] == chunk.min()
+                assert env.ydata[2*i+1] == chunk.max()
+
+            # raw samples needed when zoomed in
+            assert not p.overview_chop(
+                ctmin, ctmin+1., deltat*2, cache)
+
+            # persistent cache is reused
+            cache2 = pile.OverviewCache(cachedir)
+            pyramids = cache2._load(fn, cache2._stamp(fn))
+            assert pyramids is not None
+            envs2 = p.overview_chop(ctmin, ctmax, deltat_pixel, cache2)
+            num.testing.assert_array_equal(envs2[0].ydata, env.ydata)
+
+            # lock is only held while the pile is accessed
+            class Lock(object):
+                nheld = 0
+                nacquired = 0
+
+                def acquire(self):
+                    self.nheld += 1
+                    self.nacquired += 1
+
+                def release(self):
+                    self.nheld -= 1
+
+                def __enter__(self):
+                    self.acquire()
+
+                def __exit__(self, *args):
+                    self.release()
+
+            lock = Lock()
+            make_minmax_levels = pile.make_minmax_levels
+
+            def make_minmax_levels_unlocked(*args, **kwargs):
+                assert lock.nheld == 0
+                return make_minmax_levels(*args, **kwargs)
+
+            pile.make_minmax_levels = make_minmax_levels_unlocked
+            try:
+                cache3 = pile.OverviewCache(pjoin(datadir, '_overview_3_'))
+                envs3 = p.overview_chop(
+                    ctmin, ctmax, deltat_pixel, cache3, lock=lock)
+            finally:
+                pile.make_minmax_levels = make_minmax_levels
+
+            num.testing.assert_array_equal(envs3[0].ydata, env.ydata)
+            assert lock.nheld == 0 and lock.nacquired == 2
+
+        finally:
+            shutil.rmtree(datadir)
+
 
 if __name__ == "__main__":
     util.setup_logging('test_pile', 'warning')
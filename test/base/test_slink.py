@@ -0,0 +1,208 @@
+from __future__ import division, print_function, absolute_import
+
+import asyncio
+import unittest
+
+import numpy as num
+
+from pyrocko import trace, util
+from pyrocko.io import mseed
+from pyrocko.streaming import slink
+
+
+def make_records(network, station, nrecords):
+    tr = trace.Trace(
+        network, station, '', 'BHZ',
+        tmin=util.str_to_time('2020-01-01 00:00:00'),
+        deltat=0.01,
+        ydata=num.random.randint(
+            -2**20, 2**20, size=nrecords*100).astype(num.int32))
+
+    data = mseed.get_bytes([tr], record_length=512)
+    records = [data[i:i+512] for i in range(0, len(data), 512)]
+    assert len(records) == nrecords
+    return records, tr.ydata
+
+
+STREAMS_XML = b'''<?xml version="1.0"?>
+<seedlink software="fake">
+<station name="AAA" network="XX">
+<stream location="" seedname="BHZ" type="D"/>
+<stream location="" seedname="LOG" type="L"/>
+</station>
+<station name="BBB" network="XX">
+<stream location="00" seedname="HHN" type="D"/>
+</station>
+</seedlink>'''
+
+
+class FakeSeedLinkServer(object):
+
+    def __init__(self, records):
+        self.records = records
+        self.commands = []
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self.handle, '127.0.0.1', 0)
+
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        requested = {}
+        station = None
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+
+            command = line.decode('ascii').strip()
+            self.commands.append(command)
+            toks = command.split()
+            if toks[0] == 'HELLO':
+                writer.write(b'SeedLink v3.1 (fake)\r\nfake\r\n')
+            elif toks[0] == 'STATION':
+                station = (toks[2], toks[1])
+                writer.write(b'OK\r\n')
+            elif toks[0] == 'SELECT':
+                writer.write(b'OK\r\n')
+            elif toks[0] == 'DATA':
+                requested[station] = int(toks[1], 16) if len(toks) > 1 \
+                    else 0
+                writer.write(b'OK\r\n')
+            elif toks[0] == 'INFO':
+                info = trace.Trace(
+                    'XX', 'INFO', '', 'LOG', deltat=1.0,
+                    ydata=num.frombuffer(STREAMS_XML, dtype=num.int8))
+
+                writer.write(b'SLINFO  ')
+                writer.write(mseed.get_bytes([info], record_length=512))
+            elif toks[0] == 'END':
+                for seq, record in enumerate(self.records):
+                    if seq >= requested.get(
+                            slink.record_station(record), len(self.records)):
+
+                        writer.write(b'SL%06X' % seq + record)
+
+                await writer.drain()
+                break
+
+        writer.close()
+
+
+class SlinkTestCase(unittest.TestCase):
+
+    def test_decode_record(self):
+        record = make_records('XX', 'AAA', 1)[0][0]
+        traces = slink.decode_record(record)
+        self.assertEqual(len(traces), 1)
+        self.assertEqual(traces[0].nslc_id, ('XX', 'AAA', '', 'BHZ'))
+        self.assertEqual(slink.record_station(record), ('XX', 'AAA'))
+
+        with self.assertRaises(slink.SlinkError):
+            slink.decode_record(b'\0' * 512)
+
+    def test_stream_and_resume(self):
+        records_a, ydata_a = make_records('XX', 'AAA', 3)
+        records_b, _ = make_records('XX', 'BBB', 3)
+        records = []
+        for ra, rb in zip(records_a, records_b):
+            records.extend([ra, rb])
+
+        server = FakeSeedLinkServer(records)
+
+        class Client(slink.Slink):
+            def __init__(self, *args, **kwargs):
+                slink.Slink.__init__(self, *args, **kwargs)
+                self.traces = []
+
+            def got_trace(self, tr):
+                self.traces.append(tr)
+
+        async def run():
+            port = await server.start()
+            try:
+                client = Client('127.0.0.1', port, timeout=5.)
+                client.add_stream('XX', 'AAA', '', 'BHZ')
+                client.add_raw_stream_selector('XX_BBB:BHZ.D')
+
+                await client.run()
+                traces_first = list(client.traces)
+                sequences = dict(client.sequences)
+
+                # pretend connection was lost after the first two packets
+                client.traces = []
+                client.sequences = {('XX', 'AAA'): 0, ('XX', 'BBB'): 1}
+                await client.run()
+
+                return traces_first, sequences, client.traces
+
+            finally:
+                await server.stop()
+
+        traces_first, sequences, traces_resumed = asyncio.run(run())
+
+        self.assertEqual(len(traces_first), len(records))
+        self.assertEqual(
+            sequences,
+            {('XX', 'AAA'): len(records) - 2, ('XX', 'BBB'): len(records) - 1})
+
+        self.assertEqual(
+            server.commands[:7], [
+                'HELLO',
+                'STATION AAA XX', 'SELECT BHZ.D', 'DATA',
+                'STATION BBB XX', 'SELECT BHZ.D', 'DATA'])
+
+        self.assertIn('DATA 000001', server.commands)
+        self.assertIn('DATA 000002', server.commands)
+        self.assertEqual(len(traces_resumed), len(records) - 2)
+
+        ydata = num.concatenate([
+            tr.ydata for tr in traces_first if tr.station == 'AAA'])
+
+        num.testing.assert_equal(ydata, ydata_a)
+
+    def test_query_streams(self):
+        server = FakeSeedLinkServer([])
+
+        async def run():
+            port = await server.start()
+            try:
+                client = slink.Slink('127.0.0.1', port, timeout=5.)
+                await client.connect()
+                try:
+                    return await client.query_streams()
+                finally:
+                    await client.close()
+
+            finally:
+                await server.stop()
+
+        streams = asyncio.run(run())
+        self.assertEqual(streams, [
+            ('XX', 'AAA', '', 'BHZ'),
+            ('XX', 'BBB', '00', 'HHN')])
+
+    def test_connection_refused(self):
+        async def run():
+            server = await asyncio.start_server(
+                lambda r, w: None, '127.0.0.1', 0)
+
+            port = server.sockets[0].getsockname()[1]
+            server.close()
+            await server.wait_closed()
+            client = slink.Slink('127.0.0.1', port, timeout=5.)
+            await client.run()
+
+        with self.assertRaises(slink.SlinkError):
+            asyncio.run(run())
+
+
+if __name__ == '__main__':
+    util.setup_logging('test_slink', 'warning')
+    unittest.main()
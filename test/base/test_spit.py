@@ -0,0 +1,67 @@
+from __future__ import division, print_function, absolute_import
+
+import os
+import unittest
+import tempfile
+
+import numpy as num
+
+from pyrocko import spit
+
+
+def f_ball(x):
+    x0 = num.array([0.5, 0.5, 0.5])
+    if num.sqrt(num.sum((x-x0)**2)) < 0.5:
+        return x[2]**4 + x[1]
+
+    return None
+
+
+class SPTreeTestCase(unittest.TestCase):
+
+    def test_interpolate_many(self):
+        tree = spit.SPTree(
+            f_ball, 0.05, [[0., 1.], [0., 1.], [0., 1.]], [0.05, 0.1, 0.2])
+
+        fid, fn = tempfile.mkstemp()
+        os.close(fid)
+        try:
+            tree.dump(fn)
+            tree_loaded = spit.SPTree(filename=fn)
+        finally:
+            os.unlink(fn)
+
+        rstate = num.random.RandomState(23)
+        x = rstate.uniform(-0.1, 1.1, size=(20000, 3))
+
+        # points on cell boundaries
+        x[:1000] = num.round(x[:1000] * 20.) / 20.
+        x[1000, 0] = num.nan
+
+        for t in (tree, tree_loaded):
+            ref = t.root.interpolate_many(x)
+            assert num.any(num.isfinite(ref))
+            assert num.any(num.isnan(ref))
+
+            for nthreads in (1, 2, 0):
+                spit.g_min_points_per_thread = 100
+                try:
+                    val = t.interpolate_many(x, nthreads=nthreads)
+                finally:
+                    spit.g_min_points_per_thread = 10000
+
+                num.testing.assert_array_equal(val, ref)
+
+        # away from cell boundaries
+        x, val = x[1001:], val[1001:]
+        inside = num.all(num.logical_and(0. <= x, x <= 1.), axis=1)
+        for xx, v in zip(x[inside][:100], val[inside][:100]):
+            v_single = tree_loaded.interpolate(xx)
+            if v_single is None:
+                continue
+
+            num.testing.assert_allclose(v, v_single, atol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
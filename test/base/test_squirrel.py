@@ -833,6 +833,120 @@ class SquirrelTestCase(unittest.TestCase):
         finally:
             shutil.rmtree(tempdir)
 
+    def test_fdsn_download_concurrent(self):
+        import threading
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        from pyrocko.io import mseed
+        from pyrocko.squirrel.client.fdsn import FDSNSource
+        from pyrocko.squirrel.model import WaveformOrder, CodesNSLCE
+
+        max_lines = 3
+        deltat = 1.0
+        requests_seen = []
+        clients_seen = set()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, code, data=b''):
+                self.send_response(code)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._reply(404)
+
+            def do_POST(self):
+                body = self.rfile.read(
+                    int(self.headers['Content-Length'])).decode('ascii')
+
+                lines = [
+                    line.split() for line in body.splitlines()
+                    if line.strip() and '=' not in line]
+
+                requests_seen.append(len(lines))
+                clients_seen.add(self.client_address)
+
+                if len(lines) > max_lines:
+                    self._reply(413)
+                    return
+
+                trs = []
+                for net, sta, loc, cha, stmin, stmax in lines:
+                    tmin = util.str_to_time(stmin.replace('T', ' '))
+                    tmax = util.str_to_time(stmax.replace('T', ' '))
+                    n = int(round((tmax - tmin) / deltat))
+                    trs.append(trace.Trace(
+                        net, sta, '' if loc == '--' else loc, cha,
+                        tmin=tmin, deltat=deltat,
+                        ydata=num.arange(n, dtype=num.int32)))
+
+                self._reply(200, mseed.get_bytes(trs, record_length=512))
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+
+        tempdir = os.path.join(self.tempdir, 'test_fdsn_download_concurrent')
+        util.ensuredir(tempdir)
+        try:
+            squirrel.init_environment(tempdir)
+            sq = squirrel.Squirrel(tempdir)
+            source = FDSNSource(
+                site='http://127.0.0.1:%i' % server.server_address[1],
+                download_nworkers=2,
+                download_batch_size=8)
+
+            source.setup(sq)
+
+            tmin = util.str_to_time('2020-01-01 00:00:00')
+            tmax = tmin + 600.
+            orders = [
+                WaveformOrder(
+                    source_id=source._source_id,
+                    codes=CodesNSLCE('XX', 'S%02i' % i, '', 'HHZ'),
+                    deltat=deltat,
+                    tmin=tmin,
+                    tmax=tmax)
+                for i in range(20)]
+
+            succeeded = []
+            failed = []
+            paths = []
+            source.download_waveforms(
+                orders,
+                success=succeeded.append,
+                batch_add=paths.extend,
+                error_permanent=failed.append,
+                error_temporary=failed.append)
+
+            assert len(succeeded) == len(orders)
+            assert not failed
+            assert any(nlines > max_lines for nlines in requests_seen)
+            assert source._batch_size < source.download_batch_size
+
+            # keep-alive: requests share connections of the worker threads
+            assert len(clients_seen) < len(requests_seen)
+
+            sq.add(paths)
+            trs = sq.get_waveforms(
+                codes=('XX', 'S07', '', 'HHZ'), tmin=tmin, tmax=tmax)
+
+            assert len(trs) == 1
+            assert trs[0].tmin == tmin
+            num.testing.assert_equal(
+                trs[0].ydata, num.arange(600, dtype=num.int32))
+
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+            shutil.rmtree(tempdir)
+
     @common.require_internet
     def test_fdsn_source(self):
         tmin = util.str_to_time('2018-01-01 00:00:00')
@@ -1016,6 +1130,74 @@ class SquirrelTestCase(unittest.TestCase):
         responses = sq.get_responses(model='stationxml')
         assert len(responses) == 12
 
+    def test_responses_lazy(self):
+        from pyrocko.io import stationxml
+
+        sx = common.make_stationxml(nnetworks=2, nstations=3, nchannels=3)
+        fpath = os.path.join(self.tempdir, 'test_responses_lazy.stationxml')
+        sx.dump_xml(filename=fpath)
+
+        database = squirrel.Database()
+        sq = squirrel.Squirrel(database=database)
+        sq.add(fpath)
+
+        assert len(sq.get_stations()) == 6
+        assert len(sq.get_channels()) == 18
+
+        nuts = sq.get_nuts(kind='response')
+        assert len(nuts) == 18
+        assert len(set(nut.file_segment for nut in nuts)) == 18
+
+        nnuts = sq.get_nnuts()
+        nentries = sq.get_cache_stats('default').nentries
+        resp = sq.get_response(
+            codes=('N1', 'S02', '', 'HHZ'), model='stationxml')
+
+        assert isinstance(resp, stationxml.Response)
+        assert resp.dump_xml() == sx.network_list[1].station_list[2] \
+            .channel_list[2].response.dump_xml()
+
+        # only the requested response has been loaded
+        assert sq.get_cache_stats('default').nentries == nentries + 1
+        assert sq.get_nnuts() == nnuts
+
+        responses = sq.get_responses()
+        assert len(responses) == 18
+
+        sx2 = sq.get_stationxml(level='response')
+        assert len(sx2.network_list) == 2
+        assert all(
+            channel.response is not None
+            for network in sx2.network_list
+            for station in network.station_list
+            for channel in station.channel_list)
+
+    def test_responses_bad(self):
+        from pyrocko.io import stationxml
+
+        sx = common.make_stationxml(nnetworks=1, nstations=1, nchannels=3)
+        sx.network_list[0].station_list[0].channel_list[0].response = \
+            stationxml.Response()
+
+        fpath = os.path.join(self.tempdir, 'test_responses_bad.stationxml')
+        sx.dump_xml(filename=fpath)
+
+        database = squirrel.Database()
+        sq = squirrel.Squirrel(database=database)
+        sq.add(fpath)
+
+        # responses are not parsed while indexing, bad ones are reported
+        # when requested
+        assert len(sq.get_channels()) == 3
+        nuts = sorted(sq.get_nuts(kind='response'), key=lambda nut: nut.codes)
+        assert len(nuts) == 3
+
+        with self.assertRaises(squirrel.NotAvailable):
+            sq.get_response(codes=nuts[0].codes)
+
+        for nut in nuts[1:]:
+            assert sq.get_response(codes=nut.codes) is not None
+
     def test_events(self):
         fpath = common.test_data_file('events2.txt')
         database = squirrel.Database()
@@ -1175,6 +1357,281 @@ class SquirrelTestCase(unittest.TestCase):
         finally:
             shutil.rmtree(datadir)
 
+    def test_cache_size_limit(self):
+        nfiles = 20
+        nsamples = 1000
+
+        tmin = 1234567890.
+        datadir = self.make_many_files(
+            nfiles, nsamples, ['xx'], ['S00'], ['C0'], tmin)
+
+        squirrel.init_environment(datadir)
+
+        try:
+            sq = squirrel.Squirrel(datadir)
+            sq.add(os.path.join(datadir, 'data'))
+
+            trs = sq.get_waveforms(uncut=True)
+            assert len(trs) == nfiles
+            nbytes = trs[0].ydata.nbytes
+
+            stats = sq.get_cache_stats('waveform')
+            assert stats.nentries == nfiles
+            assert stats.nbytes == nfiles * nbytes
+            assert stats.nmisses == nfiles
+            assert stats.nevictions == 0
+
+            sq.set_cache_size_limit(3 * nbytes)
+            stats = sq.get_cache_stats('waveform')
+            assert stats.nentries == 3
+            assert stats.nbytes == 3 * nbytes
+            assert stats.nevictions == nfiles - 3
+
+            trs = sq.get_waveforms(uncut=True)
+            assert len(trs) == nfiles
+            assert all(tr.data_len() == nsamples for tr in trs)
+
+            stats = sq.get_cache_stats('waveform')
+            assert stats.nentries == 3
+            assert stats.nbytes <= stats.size_limit
+            assert stats.nmisses + stats.nhits == 2 * nfiles
+
+            ttmax = trs[-1].tmax
+            nhits = stats.nhits
+            sq.get_waveforms(tmin=ttmax-10., tmax=ttmax)
+            assert sq.get_cache_stats('waveform').nhits == nhits + 1
+
+            sq.clear_accessor('default', 'waveform')
+            stats = sq.get_cache_stats('waveform')
+            assert stats.nentries == 0
+            assert stats.nbytes == 0
+
+        finally:
+            shutil.rmtree(datadir)
+
+    def test_waveform_disk_cache(self):
+        nfiles = 10
+        nsamples = 1000
+
+        tmin = 1234567890.
+        datadir = self.make_many_files(
+            nfiles, nsamples, ['xx'], ['S00'], ['C0'], tmin)
+
+        squirrel.init_environment(datadir)
+
+        try:
+            sq = squirrel.Squirrel(datadir, waveform_disk_cache=True)
+            sq.add(os.path.join(datadir, 'data'))
+            trs1 = sq.get_waveforms(uncut=True)
+            stats = sq.get_disk_cache_stats()
+            assert stats.nmisses == nfiles
+            assert stats.nputs == nfiles
+            del sq
+
+            sq = squirrel.Squirrel(datadir, waveform_disk_cache=True)
+            sq.add(os.path.join(datadir, 'data'))
+            trs2 = sq.get_waveforms(uncut=True)
+            stats = sq.get_disk_cache_stats()
+            assert stats.nhits == nfiles
+            assert stats.nputs == 0
+
+            assert len(trs1) == len(trs2) == nfiles
+            for tr1, tr2 in zip(trs1, trs2):
+                assert tr1.nslc_id == tr2.nslc_id
+                assert tr1.tmin == tr2.tmin
+                assert num.all(tr1.ydata == tr2.ydata)
+
+            tr = sq.get_waveforms(tmin=tmin+10., tmax=tmin+20.)[0]
+            assert num.all(tr.ydata == 1.0)
+
+            assert squirrel.Squirrel(datadir).get_disk_cache_stats() is None
+
+        finally:
+            shutil.rmtree(datadir)
+
+    def test_add_parallel(self):
+        nfiles = 50
+        nsamples = 100
+
+        stations = ['S%02i' % i for i in range(10)]
+        channels = ['C%01i' % i for i in range(3)]
+
+        tmin = 1234567890.
+        datadir = self.make_many_files(
+            nfiles, nsamples, ['xx'], stations, channels, tmin)
+
+        with open(os.path.join(datadir, 'data', 'garbage.mseed'), 'wb') as f:
+            f.write(b'garbage')
+
+        try:
+            nuts = []
+            for nworkers in [1, 4]:
+                database = squirrel.Database()
+                sq = squirrel.Squirrel(database=database)
+                sq.add(os.path.join(datadir, 'data'), nworkers=nworkers)
+                assert sq.get_nfiles() == nfiles + 1
+                nuts.append(sorted(
+                    (nut.file_path, nut.file_segment, nut.file_element,
+                     nut.codes, nut.tmin, nut.tmax)
+                    for nut in sq.get_waveform_nuts()))
+
+                trs = sq.get_waveforms(tmin=tmin+10, tmax=tmin+20)
+                assert len(trs) == 1
+                assert num.all(trs[0].get_ydata() == num.ones(10))
+
+            assert len(nuts[0]) == nfiles
+            assert nuts[0] == nuts[1]
+
+        finally:
+            shutil.rmtree(datadir)
+
+    def test_chopper_prefetch(self):
+        nfiles = 30
+        nsamples = 100
+
+        stations = ['S%02i' % i for i in range(10)]
+        channels = ['C%01i' % i for i in range(3)]
+
+        tmin = 1234567890.
+        datadir = self.make_many_files(
+            nfiles, nsamples, ['xx'], stations, channels, tmin)
+
+        try:
+            database = squirrel.Database()
+            sq = squirrel.Squirrel(database=database)
+            sq.add(os.path.join(datadir, 'data'))
+
+            results = []
+            for prefetch in [0, 3]:
+                batches = []
+                for batch in sq.chopper_waveforms(
+                        tinc=55., tpad=5., prefetch=prefetch):
+
+                    batches.append(
+                        (batch.tmin, batch.tmax, [
+                            (tr.nslc_id, tr.tmin, tr.tmax,
+                             float(num.sum(tr.ydata)))
+                            for tr in batch.traces]))
+
+                results.append(batches)
+                assert not sq._prefetched
+                assert sq.get_cache_stats('waveform').nentries == 0
+
+            assert len(results[0]) > 1
+            assert results[0] == results[1]
+
+        finally:
+            shutil.rmtree(datadir)
+
+    def test_record_index(self):
+        nchunks = 10
+        nsamples = 1000
+        deltat = 0.01
+        tmin = 1234567890.
+
+        datadir = tempfile.mkdtemp(dir=self.tempdir)
+        fn = os.path.join(datadir, 'multiplexed.mseed')
+
+        # records of two channels interleaved in a single file
+        ydatas = defaultdict(list)
+        for ichunk in range(nchunks):
+            for cha in ['C0', 'C1']:
+                ydata = num.random.randint(
+                    -2**20, 2**20, size=nsamples).astype(num.int32)
+                tr = trace.Trace(
+                    'xx', 'S00', '', cha,
+                    tmin=tmin + ichunk*nsamples*deltat,
+                    deltat=deltat, ydata=ydata)
+
+                io.save([tr], fn, record_length=512, append=True)
+                ydatas[cha].append(ydata)
+
+        try:
+            database = squirrel.Database()
+            sq = squirrel.Squirrel(database=database)
+            sq.add(fn)
+
+            nuts = sq.get_waveform_nuts()
+            assert len(nuts) == 2
+            for nut in nuts:
+                assert database.get_record_index(nut) is not None
+
+            ttmin = tmin + 42.31
+            ttmax = tmin + 47.5
+            for cha in ['C0', 'C1']:
+                trs = sq.get_waveforms(
+                    tmin=ttmin, tmax=ttmax, codes='*.*.*.%s' % cha)
+
+                assert len(trs) == 1
+                ydata = num.concatenate(ydatas[cha])
+                i = int(round((ttmin - tmin) / deltat))
+                n = int(round((ttmax - ttmin) / deltat))
+                assert trs[0].tmin == tmin + i * deltat
+                num.testing.assert_equal(trs[0].ydata, ydata[i:i+n])
+
+            assert sq.get_cache_stats('waveform').nentries == 0
+
+            trs = sq.get_waveforms(tmin=tmin, tmax=tmin + 99.)
+            assert len(trs) == 2
+            assert sq.get_cache_stats('waveform').nentries == 1
+
+            # record index is dropped with modified file
+            io.save([tr], fn, record_length=512, append=True)
+            sq.add(fn)
+            for nut in sq.get_waveform_nuts():
+                assert database.get_record_index(nut) is not None
+
+            database.remove(fn)
+            assert database.get_record_index(nuts[0]) is None
+
+        finally:
+            shutil.rmtree(datadir)
+
+    def test_record_index_read_only(self):
+        import sqlite3
+        from pyrocko.squirrel import database as sq_database
+
+        datadir = tempfile.mkdtemp(dir=self.tempdir)
+        fn_db = os.path.join(datadir, 'db.sqlite')
+        try:
+            squirrel.Database(fn_db)
+
+            # database created before the record index was introduced
+            conn = sqlite3.connect(fn_db)
+            conn.execute('DROP TRIGGER delete_records_on_delete_file')
+            conn.execute('DROP TRIGGER delete_records_on_update_file')
+            conn.execute('DROP TABLE record_index')
+            conn.commit()
+            conn.close()
+
+            connect = sq_database.sqlite3.connect
+
+            def connect_read_only(path, **kwargs):
+                return connect('file:%s?mode=ro' % path, uri=True, **kwargs)
+
+            sq_database.sqlite3.connect = connect_read_only
+            try:
+                database = squirrel.Database(fn_db)
+            finally:
+                sq_database.sqlite3.connect = connect
+
+            assert not database._have_record_index
+
+            # table is added when the database is writable
+            database = squirrel.Database(fn_db)
+            assert database._have_record_index
+
+            sq_database.sqlite3.connect = connect_read_only
+            try:
+                database = squirrel.Database(fn_db)
+            finally:
+                sq_database.sqlite3.connect = connect
+
+            assert database._have_record_index
+
+        finally:
+            shutil.rmtree(datadir)
+
     def test_add_waveforms(self):
         traces = []
 
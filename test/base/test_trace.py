@@ -871,6 +871,156 @@ class TraceTestCase(unittest.TestCase):
 
         assert tr1 == tr2
 
+    def test_trace_batch(self):
+        ntraces = 5
+        nsamples = 1000
+        deltat = 0.01
+        tmin = sometime
+
+        def make_traces():
+            num.random.seed(23)
+            return [
+                trace.Trace(
+                    'N', 'STA%i' % i, '', 'BHZ', tmin=tmin, deltat=deltat,
+                    ydata=num.random.normal(size=nsamples))
+                for i in range(ntraces)]
+
+        def check(traces, batch, eps=1e-9):
+            traces2 = batch.to_traces()
+            assert len(traces) == len(traces2)
+            for tr1, tr2 in zip(traces, traces2):
+                assert tr1.nslc_id == tr2.nslc_id
+                assert abs(tr1.tmin - tr2.tmin) < 1e-6 * deltat
+                assert tr1.deltat == tr2.deltat
+                assert tr1.data_len() == tr2.data_len()
+                assert numeq(tr1.ydata, tr2.ydata, eps)
+
+        traces = make_traces()
+        batch = trace.TraceBatch.from_traces(traces)
+        assert batch.ydata.shape == (ntraces, nsamples)
+        check(traces, batch, 0.0)
+
+        traces2 = batch.to_traces()
+        traces2[0].ydata[0] = 99.
+        assert batch.ydata[0, 0] == 99.
+
+        ops = [
+            ('lowpass', (4, 5.)),
+            ('highpass', (4, 1.)),
+            ('bandpass', (4, 1., 5.)),
+            ('downsample', (5,)),
+            ('envelope', ())]
+
+        for name, args in ops:
+            traces = make_traces()
+            batch = trace.TraceBatch.from_traces(traces)
+            for tr in traces:
+                getattr(tr, name)(*args)
+
+            getattr(batch, name)(*args)
+            check(traces, batch)
+
+        traces = make_traces()
+        batch = trace.TraceBatch.from_traces(traces)
+        taper = trace.CosFader(xfrac=0.1)
+        for tr in traces:
+            tr.taper(taper)
+
+        batch.taper(taper)
+        check(traces, batch)
+
+        resp = response.PoleZeroResponse(
+            poles=[-0.037+0.037j, -0.037-0.037j], zeros=[0j, 0j],
+            constant=2.)
+
+        for tfade, cut_off_fading in [(0., True), (1., True), (1., False)]:
+            for invert in [False, True]:
+                traces = make_traces()
+                batch = trace.TraceBatch.from_traces(traces)
+                kwargs = dict(
+                    tfade=tfade,
+                    freqlimits=(0.5, 1., 10., 20.),
+                    transfer_function=resp,
+                    cut_off_fading=cut_off_fading,
+                    invert=invert)
+
+                traces_out = [tr.transfer(**kwargs) for tr in traces]
+                check(traces_out, batch.transfer(**kwargs))
+
+        traces = make_traces()
+        traces[1].shift(deltat)
+        with self.assertRaises(trace.MisalignedTraces):
+            trace.TraceBatch.from_traces(traces)
+
+    def test_transfer_many(self):
+        deltat = 0.01
+        num.random.seed(23)
+        traces = []
+        for i, nsamples in enumerate([1000, 1000, 1000, 800, 1000]):
+            traces.append(trace.Trace(
+                'N', 'STA%i' % i, '', 'BHZ', tmin=sometime + i*10.,
+                deltat=deltat if i != 4 else deltat*2,
+                ydata=num.random.normal(size=nsamples)))
+
+        def make_resp(constant):
+            return response.PoleZeroResponse(
+                poles=[-0.037+0.037j, -0.037-0.037j], zeros=[0j, 0j],
+                constant=constant)
+
+        resps = [make_resp(2.), make_resp(3.), make_resp(2.), make_resp(2.),
+                 make_resp(2.)]
+
+        trace.g_tapered_coefs_cache.clear()
+        for resp_arg in [resps[0], resps]:
+            for tfade, cut_off_fading in [(0., True), (1., True), (1., False)]:
+                for invert in [False, True]:
+                    kwargs = dict(
+                        tfade=tfade,
+                        freqlimits=(0.5, 1., 10., 20.),
+                        cut_off_fading=cut_off_fading,
+                        invert=invert)
+
+                    traces_out = trace.transfer_many(
+                        traces, transfer_functions=resp_arg, **kwargs)
+
+                    assert len(traces_out) == len(traces)
+                    for itr, tr in enumerate(traces):
+                        tr_out = tr.transfer(
+                            transfer_function=resp_arg
+                            if resp_arg is resps[0] else resps[itr],
+                            **kwargs)
+
+                        assert tr_out.nslc_id == traces_out[itr].nslc_id
+                        assert tr_out.tmin == traces_out[itr].tmin
+                        assert numeq(
+                            tr_out.ydata, traces_out[itr].ydata, 1e-9)
+
+        # equal responses share cached coefficients
+        cache = trace.g_tapered_coefs_cache
+        nhits = cache.nhits
+        nmisses = cache.nmisses
+        traces[0].transfer(
+            freqlimits=(0.5, 1., 10., 20.), transfer_function=make_resp(2.))
+        assert cache.nhits == nhits + 1 and cache.nmisses == nmisses
+
+        traces[0].transfer(
+            freqlimits=(0.5, 1., 10., 20.), transfer_function=make_resp(4.))
+        assert cache.nmisses == nmisses + 1
+
+        # modified responses are not served stale coefficients
+        resp = make_resp(2.)
+        tr_out1 = traces[0].transfer(
+            freqlimits=(0.5, 1., 10., 20.), transfer_function=resp)
+        resp.constant = 20.
+        tr_out2 = traces[0].transfer(
+            freqlimits=(0.5, 1., 10., 20.), transfer_function=resp)
+        assert numeq(tr_out2.ydata, tr_out1.ydata * 10., 1e-9)
+
+        with self.assertRaises(trace.TraceTooShort):
+            trace.transfer_many(
+                traces, tfade=6., freqlimits=(0.5, 1., 10., 20.),
+                transfer_functions=resps[0])
+
 
 if __name__ == "__main__":
     util.setup_logging('test_trace', 'warning')
@@ -97,6 +97,51 @@ def make_dataset(dir=None, nstations=10, nchannels=3, tlen=10*D, deltat=0.01,
     return dir
 
 
+def make_stationxml(nnetworks=2, nstations=3, nchannels=3):
+    from pyrocko import response
+    from pyrocko.io import stationxml as sx
+
+    pz = response.PoleZeroResponse(
+        zeros=[0j, 0j],
+        poles=[-0.037+0.037j, -0.037-0.037j],
+        constant=1e9)
+
+    tmin = util.str_to_time('2010-01-01 00:00:00')
+
+    networks = []
+    for inetwork in range(nnetworks):
+        stations = []
+        for istation in range(nstations):
+            position = dict(
+                latitude=sx.Latitude(value=10. + istation),
+                longitude=sx.Longitude(value=20. + inetwork),
+                elevation=sx.Distance(value=100.))
+
+            channels = []
+            for cha in ['HHE', 'HHN', 'HHZ'][:nchannels]:
+                channels.append(sx.Channel(
+                    code=cha,
+                    location_code='',
+                    start_date=tmin,
+                    depth=sx.Distance(value=0.),
+                    sample_rate=sx.SampleRate(value=100.),
+                    response=sx.Response.from_pyrocko_pz_response(
+                        pz, 'M/S', 'COUNTS'),
+                    **position))
+
+            stations.append(sx.Station(
+                code='S%02i' % istation,
+                start_date=tmin,
+                channel_list=channels,
+                **position))
+
+        networks.append(sx.Network(
+            code='N%i' % inetwork,
+            station_list=stations))
+
+    return sx.FDSNStationXML(source='test', network_list=networks)
+
+
 def test_data_file(fn):
     fpath = test_data_file_no_download(fn)
     if not os.path.exists(fpath):
@@ -1,5 +1,6 @@
 from __future__ import division, print_function, absolute_import
 
+import os
 import time
 import sys
 import random
@@ -401,6 +402,46 @@ class GFTestCase(unittest.TestCase):
 
         store.close()
 
+    def test_record_cache(self):
+        nrecords = 8
+        random.seed(0)
+        num.random.seed(0)
+
+        store_dir = self.create(nrecords=nrecords)
+        store = gf.BaseStore(store_dir)
+        store_cached = gf.BaseStore(store_dir, record_cache_size=1024**2)
+
+        for _ in range(2):
+            for deci in (1, 2, 3):
+                for i in range(nrecords):
+                    for itmin, nsamples in [(None, None), (2, 5)]:
+                        tra = store.get(i, itmin, nsamples, decimate=deci)
+                        trb = store_cached.get(
+                            i, itmin, nsamples, decimate=deci)
+
+                        self.assertEqual(tra.itmin, trb.itmin)
+                        self.assertEqual(tra.is_zero, trb.is_zero)
+                        assert_ae(tra.data, trb.data)
+                        assert_ae(tra.begin_value, trb.begin_value)
+                        assert_ae(tra.end_value, trb.end_value)
+
+        stats = store_cached.stats()
+        nrequests = 3 * nrecords * 2
+        self.assertEqual(stats['record_cache_nmisses'], nrequests)
+        self.assertEqual(stats['record_cache_nhits'], nrequests)
+        assert 'record_cache_nhits' in store_cached.stats_keys
+        assert set(store_cached.stats_keys) <= set(stats.keys())
+        assert 0 < stats['record_cache_nbytes'] <= 1024**2
+
+        store_cached.set_record_cache_size(1000)
+        assert store_cached.stats()['record_cache_nbytes'] <= 1000
+
+        store_cached.set_record_cache_size(None)
+        self.assertEqual(store_cached.stats()['record_cache_nbytes'], 0)
+
+        store.close()
+        store_cached.close()
+
     def test_sum(self):
 
         nrecords = 8
@@ -679,6 +720,202 @@ class GFTestCase(unittest.TestCase):
                 logger.warning(
                     'test_stf_pre_post: max difference of %.1f %%' % perc)
 
+    def test_process_nworkers(self):
+        store_dir = self.get_pulse_store_dir()
+        engine = gf.LocalEngine(store_dirs=[store_dir])
+
+        sources = [
+            gf.ExplosionSource(
+                time=0.0,
+                depth=depth,
+                moment=moment)
+
+            for moment in [1., 2.] for depth in [100., 200., 300.]
+        ]
+
+        targets = [
+            gf.Target(
+                codes=('', 'ST%d' % i, '', component),
+                north_shift=shift,
+                east_shift=0.,
+                store_id='pulse')
+
+            for component in 'ZNE' for i, shift in enumerate([500., 800.])
+        ]
+
+        for calc_timeseries in [False, True]:
+            response_serial = engine.process(
+                sources=sources, targets=targets,
+                calc_timeseries=calc_timeseries)
+
+            response_parallel = engine.process(
+                sources=sources, targets=targets,
+                calc_timeseries=calc_timeseries, nworkers=3)
+
+            for (source, target, tr), (source_p, target_p, tr_p) in zip(
+                    response_serial.iter_results(),
+                    response_parallel.iter_results()):
+
+                assert source is source_p
+                assert target is target_p
+                assert tr.tmin == tr_p.tmin
+                num.testing.assert_equal(tr.get_ydata(), tr_p.get_ydata())
+
+    def test_dsource_cache(self):
+        store_dir = self.get_pulse_store_dir()
+        engine = gf.LocalEngine(store_dirs=[store_dir], dsource_cache_size=4)
+
+        sources = [
+            gf.RectangularExplosionSource(
+                time=0.0,
+                depth=depth,
+                length=100.,
+                width=50.,
+                moment=1.0)
+
+            for depth in [300., 400., 500.]
+        ]
+
+        targets = [
+            gf.Target(
+                codes=('', 'ST%d' % i, '', 'Z'),
+                north_shift=shift,
+                east_shift=0.,
+                store_id='pulse')
+
+            for i, shift in enumerate([500., 800.])
+        ]
+
+        response1 = engine.process(sources=sources, targets=targets)
+        assert response1.stats.n_dsource_cache_misses == 3
+        assert response1.stats.n_dsource_cache_hits == 0
+        assert response1.stats.n_dsource_cache_size == 3
+
+        response2 = engine.process(sources=sources, targets=targets[:1])
+        assert response2.stats.n_dsource_cache_misses == 0
+        assert response2.stats.n_dsource_cache_hits == 3
+
+        for results1, results2 in zip(
+                response1.results_list, response2.results_list):
+            num.testing.assert_equal(
+                results1[0].trace.data, results2[0].trace.data)
+
+        sources[0].width = 60.
+        response3 = engine.process(sources=sources, targets=targets)
+        assert response3.stats.n_dsource_cache_misses == 1
+        assert response3.stats.n_dsource_cache_hits == 2
+        assert response3.stats.n_dsource_cache_size == 4
+
+        engine.set_dsource_cache_size(2)
+        response4 = engine.process(sources=sources, targets=targets)
+        assert response4.stats.n_dsource_cache_size == 2
+
+        engine.set_dsource_cache_size(0)
+        response5 = engine.process(sources=sources, targets=targets)
+        assert response5.stats.n_dsource_cache_hits == 0
+        assert response5.stats.n_dsource_cache_misses == 0
+
+        for (_, _, tr4), (_, _, tr5) in zip(
+                response4.iter_results(), response5.iter_results()):
+            num.testing.assert_equal(tr4.get_ydata(), tr5.get_ydata())
+
+    def test_rupture_coef_mat_cache(self):
+        from pyrocko import config
+
+        conf = gf.ConfigTypeA(
+            id='empty_rupture',
+            source_depth_min=0.,
+            source_depth_max=20*km,
+            source_depth_delta=10*km,
+            distance_min=10*km,
+            distance_max=100*km,
+            distance_delta=10*km,
+            sample_rate=2.0,
+            ncomponents=10,
+            earthmodel_1d=cake.load_model())
+
+        store_dir = mkdtemp(prefix='gfstore_e')
+        self.tempdirs.append(store_dir)
+        gf.Store.create(store_dir, config=conf)
+        store = gf.Store(store_dir)
+
+        cache_dir = mkdtemp(prefix='okada_cache')
+        self.tempdirs.append(cache_dir)
+
+        def make_rupture(**kwargs):
+            rupture = gf.PseudoDynamicRupture(
+                length=10*km, width=5*km, depth=5*km, anchor='top',
+                strike=30., dip=60., rake=0., slip=1., nx=4, ny=2,
+                **kwargs)
+
+            rupture.discretize_patches(store)
+            rupture.get_slip()
+            return rupture
+
+        pconfig = config.raw_config()
+        cache_dir_orig = pconfig.cache_dir
+        pconfig.cache_dir = cache_dir
+        try:
+            rupture1 = make_rupture(coef_mat_cache=True)
+            fns = os.listdir(os.path.join(cache_dir, 'okada'))
+            assert len(fns) == 1
+
+            # modify the cached matrix to see that it is loaded from disk
+            num.save(
+                os.path.join(cache_dir, 'okada', fns[0]),
+                rupture1.coef_mat * 2.)
+
+            rupture2 = make_rupture(coef_mat_cache=True)
+            num.testing.assert_equal(rupture2.coef_mat, rupture1.coef_mat * 2.)
+
+            rupture3 = make_rupture()
+            num.testing.assert_equal(rupture3.coef_mat, rupture1.coef_mat)
+
+        finally:
+            pconfig.cache_dir = cache_dir_orig
+
+    def test_process_static_batch(self):
+        store_dir = self.get_pulse_store_dir()
+        engine = gf.LocalEngine(store_dirs=[store_dir])
+
+        sources = [
+            gf.ExplosionSource(
+                time=0.0,
+                depth=depth,
+                moment=1.0)
+
+            for depth in [300., 400.]
+        ]
+
+        def make_target(n, interpolation, tsnapshot):
+            return gf.StaticTarget(
+                north_shifts=num.linspace(100., 900., n),
+                east_shifts=num.zeros(n),
+                interpolation=interpolation,
+                tsnapshot=tsnapshot,
+                store_id='pulse')
+
+        targets = [
+            make_target(n, interpolation, tsnapshot)
+            for n in [10, 20]
+            for interpolation in ['nearest_neighbor', 'multilinear']
+            for tsnapshot in [None, 1.0]]
+
+        response = engine.process(sources=sources, targets=targets)
+
+        for isource, source in enumerate(sources):
+            for itarget, target in enumerate(targets):
+                response_single = engine.process(source, target)
+                result = response.results_list[isource][itarget]
+                result_single = response_single.results_list[0][0]
+
+                assert set(result.result.keys()) \
+                    == set(result_single.result.keys())
+
+                for k in result.result.keys():
+                    num.testing.assert_equal(
+                        result.result[k], result_single.result[k])
+
     def test_target_source_timing(self):
         store_dir = self.get_pulse_store_dir()
         engine = gf.LocalEngine(store_dirs=[store_dir])
@@ -965,6 +1202,47 @@ class GFTestCase(unittest.TestCase):
                 store.t('{cake:P}', args) + store.t('{vel_surface:10}', args),
                 0.1)
 
+    def test_timing_many(self):
+        timings = [
+            'P', 'last(S|P)', '(depthp|P)', 'first{stored:S|stored:P}-10',
+            '{stored:P}+10%', '{stored:depthp}+0.1S', 'vel_surface:15',
+            'vel:5', '+0.1S', '{vel_surface:5|stored:P}', 'cake:P']
+
+        for typ in ['a', 'b']:
+            store_dir = self.get_regional_ttt_store_dir(typ)
+            store = gf.Store(store_dir)
+
+            num.random.seed(10)
+            npoints = 50
+            source_depths = num.random.uniform(0., 20*km, npoints)
+            distances = num.random.uniform(10*km, 2000*km, npoints)
+
+            if typ == 'a':
+                args = (source_depths, distances)
+            else:
+                args = (5*km, source_depths, distances)
+
+            times = store.t_many(timings, args)
+            self.assertEqual(times.shape, (len(timings), distances.size))
+
+            for itiming, timing in enumerate(timings):
+                num.testing.assert_equal(
+                    store.t_many(timing, args), times[itiming])
+
+                for ipoint in range(distances.size):
+                    args_point = tuple(
+                        float(num.broadcast_to(x, distances.shape)[ipoint])
+                        for x in args)
+
+                    t = store.t(timing, args_point)
+                    if t is None:
+                        assert num.isnan(times[itiming, ipoint])
+                    else:
+                        assert numeq(t, times[itiming, ipoint], 0.01)
+
+            with self.assertRaises(gf.OutOfBounds):
+                store.t_many('P', tuple(x * 10. for x in args))
+
     def test_ttt_lsd(self):
         for typ in ['a', 'b']:
             store_dir = self.get_regional_ttt_store_dir(typ)
@@ -979,6 +1257,42 @@ class GFTestCase(unittest.TestCase):
             ph = store.get_stored_phase(phase_id + '.lsd')
             assert not ph.check_holes()
 
+    def test_ttt_nworkers(self):
+        conf = gf.ConfigTypeA(
+            id='ttt_nworkers',
+            source_depth_min=0.,
+            source_depth_max=20*km,
+            source_depth_delta=10*km,
+            distance_min=10*km,
+            distance_max=500*km,
+            distance_delta=10*km,
+            sample_rate=0.5,
+            ncomponents=10,
+            earthmodel_1d=cake.load_model(),
+            tabulated_phases=[
+                gf.TPDef(id=id, definition=defi) for (id, defi) in [
+                    ('P', 'P'),
+                    ('S', 'S')
+                ]
+            ])
+
+        stores = []
+        for nworkers in (1, 2):
+            store_dir = mkdtemp(prefix='gfstore_ttt')
+            self.tempdirs.append(store_dir)
+            gf.Store.create(store_dir, config=conf)
+            store = gf.Store(store_dir)
+            store.make_travel_time_tables(nworkers=nworkers)
+            stores.append(store)
+
+        for pdef in conf.tabulated_phases:
+            data = []
+            for store in stores:
+                with open(store.phase_filename(pdef.id), 'rb') as f:
+                    data.append(f.read())
+
+            assert data[0] == data[1]
+
     def test_interpolated_attribute(self):
         from time import time
         attribute = 'takeoff_angle'
@@ -7,7 +7,7 @@ from pyrocko import util
 from pyrocko import moment_tensor as pmt
 from pyrocko.modelling import (
     okada_ext, OkadaSource, GriffithCrack, make_okada_coefficient_matrix,
-    invert_fault_dislocations_bem)
+    invert_fault_dislocations_bem, OkadaHMatrix)
 
 
 from ..common import Benchmark
@@ -900,6 +900,99 @@ class OkadaTestCase(unittest.TestCase):
 
         num.testing.assert_almost_equal(m6s, m6s_old)
 
+    def test_okada_hmatrix(self):
+        source = OkadaSource(
+            lat=0., lon=0., depth=20*km,
+            al1=-10*km, al2=10*km, aw1=-5*km, aw2=5*km,
+            strike=30., dip=60., rake=0.,
+            shearmod=32.0e9, poisson=0.25)
+
+        source_list, _ = source.discretize(24, 12)
+        npatches = len(source_list)
+
+        stress = num.zeros((npatches, 3))
+        stress[:, 0] = -1.0e6
+        stress[:, 1] = -0.5e6
+
+        for pure_shear in (False, True):
+            coef_mat = make_okada_coefficient_matrix(
+                source_list, pure_shear=pure_shear)
+
+            # low accuracy to get low-rank blocks for this small fault
+            hmat = OkadaHMatrix(
+                source_list, pure_shear=pure_shear, eps=1e-4, leaf_size=8)
+
+            assert any(v is not None for (_, _, _, v) in hmat.blocks)
+            assert hmat.nbytes < coef_mat.nbytes
+
+            cmax = num.abs(coef_mat).max()
+            num.testing.assert_allclose(
+                hmat.to_dense(), coef_mat, atol=1e-4 * cmax)
+
+            x = num.random.RandomState(23).normal(size=npatches*3)
+            y = num.dot(coef_mat.T, x)
+            num.testing.assert_allclose(
+                hmat.rdot(x), y, atol=1e-4 * num.abs(y).max())
+
+            indices = num.arange(0, npatches*3, 2)
+            num.testing.assert_allclose(
+                hmat.restricted(indices).to_dense(),
+                coef_mat[indices, :][:, indices],
+                atol=1e-4 * cmax)
+
+            disloc = invert_fault_dislocations_bem(
+                stress, coef_mat=coef_mat, pure_shear=pure_shear)
+
+            disloc_hmat = invert_fault_dislocations_bem(
+                stress, coef_mat=hmat, pure_shear=pure_shear)
+
+            dmax = num.abs(disloc).max()
+            num.testing.assert_allclose(disloc_hmat, disloc, atol=1e-3 * dmax)
+
+            disloc_hmat = invert_fault_dislocations_bem(
+                stress, source_list=source_list, pure_shear=pure_shear,
+                hmatrix=True)
+
+            num.testing.assert_allclose(disloc_hmat, disloc, atol=1e-6 * dmax)
+
+    def test_okada_coef_mat_cache(self):
+        import tempfile
+        import shutil
+
+        source = OkadaSource(
+            lat=0., lon=0., depth=20*km,
+            al1=-5*km, al2=5*km, aw1=-5*km, aw2=5*km,
+            strike=30., dip=60., rake=0.,
+            shearmod=32.0e9, poisson=0.25)
+
+        source_list, _ = source.discretize(6, 6)
+
+        cache_dir = tempfile.mkdtemp(prefix='okada_cache')
+        try:
+            coef_mat = make_okada_coefficient_matrix(source_list)
+            coef_mat_c1 = make_okada_coefficient_matrix(
+                source_list, cache=cache_dir)
+            assert len(os.listdir(cache_dir)) == 1
+
+            coef_mat_c2 = make_okada_coefficient_matrix(
+                source_list, cache=cache_dir)
+
+            num.testing.assert_equal(coef_mat_c1, coef_mat)
+            num.testing.assert_equal(coef_mat_c2, coef_mat)
+
+            make_okada_coefficient_matrix(
+                source_list, pure_shear=True, cache=cache_dir)
+            assert len(os.listdir(cache_dir)) == 2
+
+            source_list[0].shearmod *= 2.
+            coef_mat_c3 = make_okada_coefficient_matrix(
+                source_list, cache=cache_dir)
+            assert len(os.listdir(cache_dir)) == 3
+            assert not num.all(coef_mat_c3 == coef_mat)
+
+        finally:
+            shutil.rmtree(cache_dir)
+
 
 if __name__ == '__main__':
     util.setup_logging('test_okada', 'warning')